@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import math
+import time
+import platform
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("MPLBACKEND", "Agg")
+import numpy as np
+from mobile_robot import (ArcLengthSpline, GridIndex, Path, PathTracker, SwerveKinematics,
+                          HolonomicKinematics, diff_drive_rollout, load_path, pure_pursuit_batch)
+from mobile_robot import kernels
+import pygame_pure_pursuit as pp
+import pygame_vector_pursuit as vp
+import pygame_pure_pursuit_revisited as rv
+import pygame_regulated_pure_pursuit as rg
+import pygame_stanley as st
+import pygame_Swerve as sw
+import pygame_MecanumNOmni as mo
+import pygame_differential_drive as dd
+
+# parameters
+PATH_SIZES = [1_000, 100_000, 1_000_000]   # waypoint 수
+ROBOT_COUNTS = [1, 100, 10_000]            # batch 함수의 로봇(명령) 수
+ROLLOUT_STEPS = 1000                       # 한 대 로봇 closed-loop 시뮬레이션 스텝 수
+JIT_CHECK_SEEDS = range(6)                 # JIT/NumPy 궤적 비교에 쓰는 zigzag seed
+JIT_TOLERANCE = 1e-6                       # JIT/NumPy 궤적 최대 차이 허용값 (스크립트 좌표 단위)
+BASELINE = "benchmark_baseline.json"
+UPDATE_BASELINE = False   # True: 이번 결과를 baseline으로 저장
+THRESHOLD = 1.25          # baseline 대비 이 비율보다 느리면 regression
+MIN_TIME = 0.2            # 측정 1회당 최소 시간 [s]
+REPEAT = 5                # 측정 반복 (최솟값 사용)
+NORMALIZE = False         # True: 기준 작업(calibration) 시간 비율로 머신 속도 변화를 보정
+
+# 한 호출당 시간 [s]: number번 호출을 REPEAT번 재고 가장 빠른 값 사용
+def time_per_call(fn, min_time=MIN_TIME, repeat=REPEAT):
+    fn()
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+# 머신 속도 기준: 순수 Python 루프 + 작은 NumPy 연산 (스크립트들의 호출 패턴과 비슷한 비율)
+_cal_a = np.random.default_rng(0).random((64, 64))
+
+def _calibration_work():
+    total = 0.0
+    for i in range(200):
+        total += math.sin(i) * math.cos(i)
+    for _ in range(20):
+        total += float(np.hypot(_cal_a[0], _cal_a[1]).sum())
+    return total
+
+def calibration():
+    return time_per_call(_calibration_work)
+
+# 간격이 약 1인 n개 waypoint 원 경로 (픽셀 단위 스크립트들의 경로와 비슷한 밀도)
+def circle_path(n, spacing=1.0):
+    radius = n * spacing / (2 * math.pi)
+    return Path(load_path("circle", radius=radius, n=n, endpoint=False), closed=True)
+
+# 벤치마크 케이스: (이름, 호출 함수, 시뮬레이션 1초당 호출 수)
+def controller_cases(n):
+    path = circle_path(n)
+    radius = n / (2 * math.pi)
+    pos = [radius + 3.0, 0.0]   # 경로 바깥쪽, 접선 방향
+    yaw = math.pi / 2
+    trackers = {name: PathTracker(path) for name in ("pp", "vp", "rv", "rg")}
+    ref_yaws = np.arctan2(path.ys, path.xs) + math.pi / 2
+    index = GridIndex(Path.from_ref(path.xs, path.ys, ref_yaws, closed=True))
+    spline = ArcLengthSpline(path.points, closed=True)
+    spline_s = spline.project(pos)[0]   # warm start (제어 루프에서처럼 이전 투영 위치)
+    return [
+        (f"pure_pursuit[n={n}]",
+         lambda: pp.pure_pursuit(pos, yaw, path, pp.LOOKAHEAD, trackers["pp"]), 60),
+        (f"vector_pursuit[n={n}]",
+         lambda: vp.vector_pursuit(pos, yaw, path, vp.LOOKAHEAD, trackers["vp"]), 1 / vp.dt),
+        (f"pure_pursuit_revisited[n={n}]",
+         lambda: rv.pure_pursuit_revisited(pos, yaw, path, 2.0, trackers["rv"]), 60),
+        (f"regulated_pure_pursuit[n={n}]",
+         lambda: rg.regulated_pure_pursuit(pos, yaw, path, rg.T, trackers["rg"]), 60),
+        (f"stanley_control[n={n}]",
+         lambda: st.stanley_control(pos[0], pos[1], yaw, 5.0, path.xs, path.ys, ref_yaws, index), 1 / st.dt),
+        (f"stanley_control_spline[n={n}]",
+         lambda: st.stanley_control_spline(pos[0], pos[1], yaw, 5.0, spline, spline_s), 1 / st.dt),
+        (f"GridIndex.build[n={n}]",
+         lambda: GridIndex(path), None),
+    ]
+
+# 경로 크기와 무관한 스칼라 함수들
+def scalar_cases():
+    obstacle_map = rg.make_obstacle_map()
+    return [
+        ("regulated_speed", lambda: rg.regulated_speed(rg.T, 0.1, (300.0, 250.0), rg.obstacle_centers,
+                                                       rg.obstacle_radius, obstacle_map=obstacle_map), 60),
+        ("compute_swerve", lambda: sw.compute_swerve(1.0, 0.5, 0.3), sw.FPS),
+        ("mecanum_wheels", lambda: mo.mecanum_wheels(1.0, 0.5, 0.3), mo.FPS),
+        ("omni3_wheels", lambda: mo.omni3_wheels(1.0, 0.5, 0.3), mo.FPS),
+        ("diff_drive.update_pose", lambda: dd.update_pose(0.0, 0.0, 0.3, 4.0, 2.0), 1 / dd.dt),
+    ]
+
+def batch_cases(count, path):
+    rng = np.random.default_rng(0)
+    commands = rng.uniform(-2, 2, (count, 3))
+    idx = rng.integers(0, len(path), count)
+    positions = path.points[idx] + rng.normal(0, 3.0, (count, 2))
+    yaws = rng.uniform(-math.pi, math.pi, count)
+    swerve = SwerveKinematics(sw.MODULE_POSITIONS)
+    mecanum = HolonomicKinematics.mecanum(mo.ROBOT_H / 2, mo.ROBOT_W / 2)
+    wheel_seq = rng.uniform(-4, 4, (count, 50, 2))
+    return [
+        (f"pure_pursuit_batch[robots={count}]",
+         lambda: pure_pursuit_batch(positions, yaws, path, pp.LOOKAHEAD, pp.WHEELBASE, idx, 64), 60),
+        (f"SwerveKinematics.inverse[N={count}]", lambda: swerve.inverse(commands), sw.FPS),
+        (f"HolonomicKinematics.inverse[N={count}]", lambda: mecanum.inverse(commands), mo.FPS),
+        (f"diff_drive_rollout[B={count},T=50]",
+         lambda: diff_drive_rollout(wheel_seq, dd.r, dd.a, dd.dt), None),
+    ]
+
+# 한 대 로봇 closed-loop 시뮬레이션 (센서 + 제어기 + 기구학 + 기록) 전체, jit은 numba가 설치되어 있을 때만
+# jit=False: NumPy 경로만 (JIT 결과가 NumPy와 다르면 속도 비교가 의미 없음)
+def rollout_cases(steps=ROLLOUT_STEPS, jit=True):
+    path = rv.generate_8_shape()
+    xs, ys, yaws = st.make_ref("circle", st.spline_points("circle"))
+    spline = ArcLengthSpline(np.column_stack((xs, ys)))
+    cases = []
+    for backend in ["numpy"] + (["jit"] if jit and kernels.HAVE_NUMBA else []):
+        jit = backend == "jit"
+        cases += [
+            (f"simulate_revisited[{backend},steps={steps}]",
+             lambda jit=jit: rv.simulate(path, steps, jit=jit), rv.STEP_RATE / steps),
+            (f"simulate_stanley[{backend},steps={steps}]",
+             lambda jit=jit: st.simulate(st.VehicleModel(10.0, 15.0, 0, 5.0), xs, ys, yaws, steps, spline=spline,
+                                         jit=jit), 1 / st.dt / steps),
+        ]
+    return cases
+
+# JIT kernel과 NumPy 경로가 같은 결과를 내는지: zigzag (seed별, 센서 노이즈/제어 주기 포함), 8자, Stanley 원
+# 반환: 허용값을 넘은 케이스 [(이름, 최대 차이)] (numba가 없으면 빈 목록)
+def jit_mismatches(steps=ROLLOUT_STEPS, seeds=JIT_CHECK_SEEDS, tol=JIT_TOLERANCE):
+    if not kernels.HAVE_NUMBA:
+        return []
+    runs = [(f"revisited[zigzag,seed={seed}]",
+             lambda jit, seed=seed: rv.simulate(rv.generate_zigzag(seed), steps, jit=jit)) for seed in seeds]
+    runs.append(("revisited[zigzag,noise]",
+                 lambda jit: rv.simulate(rv.generate_zigzag(), steps, control_rate=20, sensor_noise=(2.0, 0.01),
+                                         seed=1, jit=jit)))
+    runs.append(("revisited[8_shape]", lambda jit: rv.simulate(rv.generate_8_shape(), steps, jit=jit)))
+    xs, ys, yaws = st.make_ref("circle", st.spline_points("circle"))
+    spline = ArcLengthSpline(np.column_stack((xs, ys)))
+    runs.append(("stanley[circle]", lambda jit: st.simulate(st.VehicleModel(10.0, 15.0, 0, 5.0), xs, ys, yaws, steps,
+                                                           spline=spline, jit=jit)))
+    mismatches = []
+    for name, run in runs:
+        a, b = run(False), run(True)
+        diff = max(float(np.max(np.abs(np.asarray(a[key]) - np.asarray(b[key])))) for key in a)
+        if not diff <= tol:
+            mismatches.append((name, diff))
+    return mismatches
+
+def run_benchmarks(path_sizes=PATH_SIZES, robot_counts=ROBOT_COUNTS, jit=True):
+    cases = scalar_cases() + rollout_cases(jit=jit)
+    for n in path_sizes:
+        cases += controller_cases(n)
+    batch_path = circle_path(100_000)
+    for count in robot_counts:
+        cases += batch_cases(count, batch_path)
+
+    results = {"calibration": {"per_call": calibration(), "per_sim_second": None}}
+    for name, fn, calls_per_sim_second in cases:
+        per_call = time_per_call(fn)
+        results[name] = {
+            "per_call": per_call,
+            "per_sim_second": per_call * calls_per_sim_second if calls_per_sim_second else None,
+        }
+        sim = results[name]["per_sim_second"]
+        sim_text = f"{sim * 1e3:10.3f} ms/sim-s" if sim is not None else ""
+        print(f"{name:<42} {per_call * 1e6:12.2f} us/call {sim_text}", flush=True)
+    return results
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def save_baseline(results, filename=BASELINE):
+    with open(filename, "w") as f:
+        json.dump({"info": machine_info(), "results": results}, f, indent=2)
+
+def load_baseline(filename=BASELINE):
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return json.load(f)["results"]
+
+# baseline 대비 비율 표 출력, regression 케이스 이름 목록 반환
+# NORMALIZE면 calibration 시간 비율로 나눈 값을 사용
+def compare(results, baseline, threshold=THRESHOLD, normalize=NORMALIZE):
+    regressions = []
+    scale = 1.0
+    if normalize and "calibration" in results and "calibration" in baseline:
+        scale = results["calibration"]["per_call"] / baseline["calibration"]["per_call"]
+        print(f"machine speed factor {scale:.2f} (calibration now / baseline)")
+    print(f"\n{'case':<42} {'now [us]':>12} {'base [us]':>12} {'ratio':>7}")
+    for name, r in results.items():
+        if name == "calibration":
+            continue
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<42} {r['per_call'] * 1e6:12.2f} {'-':>12} {'new':>7}")
+            continue
+        ratio = r["per_call"] / base["per_call"] / scale
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:<42} {r['per_call'] * 1e6:12.2f} {base['per_call'] * 1e6:12.2f} {ratio:7.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    mismatches = jit_mismatches()
+    for name, diff in mismatches:
+        print(f"JIT/NumPy mismatch: {name} (max diff {diff:.3g} > {JIT_TOLERANCE:g}), skipping jit rollouts")
+    results = run_benchmarks(jit=not mismatches)
+    baseline = load_baseline()
+    if UPDATE_BASELINE or baseline is None:
+        save_baseline(results)
+        print(f"\nbaseline saved -> {BASELINE}")
+    else:
+        regressions = compare(results, baseline)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) (> {THRESHOLD:.2f}x baseline)")
+            sys.exit(1)
+        print("\nno regressions")
+    if mismatches:
+        sys.exit(1)
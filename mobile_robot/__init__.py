@@ -0,0 +1,21 @@
+# 튜토리얼 스크립트들이 공유하는 경로 추종/기구학 유틸리티 (NumPy만 사용)
+from .path import Path, as_path, is_closed
+from .tracking import PathTracker
+from .spatial import GridIndex, SpatialHash
+from .batch import pure_pursuit_batch, update_robots_batch, cross_track_error_batch
+from .geometry import (circle_segments, circle_polyline_intersection, circle_polyline_intersection_batch,
+                       project_points)
+from .trail import TrajectoryBuffer
+from .kinematics import (bicycle_step, unicycle_step, unicycle_rollout, diff_drive_twist, diff_drive_rollout,
+                         SwerveKinematics, HolonomicKinematics, integrate_body_twist)
+from .metrics import path_progress, tracking_metrics
+from .obstacles import ObstacleMap
+from .profiler import FrameProfiler
+from .recorder import TrajectoryRecorder, Recording, load_recording
+from .loop import FixedTimestep, MultiRateScheduler, interpolate_pose
+from .sensor import PoseSensor
+from .spline import ArcLengthSpline
+from .pathgen import load_path
+from .controllers import (pure_pursuit, vector_pursuit, pure_pursuit_revisited, regulated_speed, regulated_speed_batch,
+                          stanley_steer, stanley_control, stanley_control_spline, stanley_control_batch)
+from .fleet import PathSet, fleet_pursuit, robot_clearance
@@ -0,0 +1,154 @@
+import numpy as np
+
+from .path import Path, is_closed
+
+# 전역 검색 시 한 번에 만드는 (로봇 x waypoint) 거리 행렬의 최대 원소 수
+CHUNK_ELEMS = 1 << 22
+
+
+def _first_outside(d2, r2, start_col):
+    cols = np.arange(d2.shape[1])
+    mask = (d2 > r2) & (cols >= start_col[:, None])
+    found = mask.any(axis=1)
+    return np.argmax(mask, axis=1), found
+
+
+# N대 로봇의 pure pursuit를 한 번에 계산
+# positions (N,2), yaws (N,) -> deltas (N,), targets (N,2), nearest (N,)
+# nearest가 주어지면 그 인덱스부터 window개 waypoint만 검색 (PathTracker의 batch 버전)
+# window는 lookahead 거리를 덮을 만큼 커야 함
+def pure_pursuit_batch(positions, yaws, path, lookahead, wheelbase,
+                       nearest=None, window=None, closed=None):
+    pts = path.points if isinstance(path, Path) else np.asarray(path, dtype=float)
+    pos = np.asarray(positions, dtype=float).reshape(-1, 2)
+    yaws = np.asarray(yaws, dtype=float).reshape(-1)
+    n_robots, m = len(pos), len(pts)
+    Ld = np.broadcast_to(np.asarray(lookahead, dtype=float), (n_robots,))
+    r2 = (Ld * Ld)[:, None]
+    targets = np.empty((n_robots, 2))
+    new_nearest = np.empty(n_robots, dtype=np.int64)
+
+    if nearest is None:
+        # 전역 검색 (원래 pure_pursuit와 동일한 결과), 메모리 제한을 위해 로봇을 나눠서 처리
+        step = max(1, CHUNK_ELEMS // max(m, 1))
+        for a in range(0, n_robots, step):
+            b = min(a + step, n_robots)
+            d = pts[None, :, :] - pos[a:b, None, :]
+            d2 = np.einsum('ijk,ijk->ij', d, d)
+            near = np.argmin(d2, axis=1)
+            first, found = _first_outside(d2, r2[a:b], near)
+            new_nearest[a:b] = near
+            targets[a:b] = np.where(found[:, None], pts[first], pts[-1])
+    else:
+        if closed is None:
+            closed = path.closed if isinstance(path, Path) else is_closed(pts)
+        w = min(int(window) if window is not None else 64, m)
+        idx = np.asarray(nearest, dtype=np.int64)[:, None] + np.arange(w)
+        if closed:
+            idx %= m
+            valid = np.ones(idx.shape, dtype=bool)
+        else:
+            valid = idx < m
+            idx = np.minimum(idx, m - 1)
+        d = pts[idx] - pos[:, None, :]
+        d2 = np.einsum('ijk,ijk->ij', d, d)
+        d2_near = np.where(valid, d2, np.inf)
+        near_col = np.argmin(d2_near, axis=1)
+        first, found = _first_outside(np.where(valid, d2, -np.inf), r2, near_col)
+        rows = np.arange(n_robots)
+        new_nearest[:] = idx[rows, near_col]
+        # window 안에 Ld 밖의 점이 없으면 window 끝점 (열린 경로에서는 마지막 waypoint)
+        targets[:] = np.where(found[:, None], pts[idx[rows, first]], pts[idx[:, -1]])
+
+    # 조향각 계산
+    dx = targets[:, 0] - pos[:, 0]
+    dy = targets[:, 1] - pos[:, 1]
+    alpha = np.arctan2(dy, dx) - yaws
+    alpha = np.arctan2(np.sin(alpha), np.cos(alpha))
+    deltas = np.arctan2(2 * wheelbase * np.sin(alpha) / Ld, 1)
+    return deltas, targets, new_nearest
+
+
+# N대 로봇 bicycle 모델 업데이트 (positions, yaws를 in-place로 갱신)
+def update_robots_batch(positions, yaws, deltas, speed, wheelbase, dt=1.0):
+    yaws += np.tan(deltas) * speed / wheelbase * dt
+    positions[:, 0] += speed * np.cos(yaws) * dt
+    positions[:, 1] += speed * np.sin(yaws) * dt
+    return positions, yaws
+
+
+# 로봇별 전역 최근접 waypoint 인덱스 (메모리 제한을 위해 로봇을 나눠서 처리)
+def _nearest_global(pts, pos):
+    near = np.empty(len(pos), dtype=np.int64)
+    step = max(1, CHUNK_ELEMS // max(len(pts), 1))
+    for a in range(0, len(pos), step):
+        d = pts[None, :, :] - pos[a:a + step, None, :]
+        near[a:a + step] = np.argmin(np.einsum('ijk,ijk->ij', d, d), axis=1)
+    return near
+
+
+# N대 로봇의 부호 있는 cross-track error (PathTracker.cross_track_error의 batch 버전)
+# nearest가 주어지면 그 인덱스부터 window개 waypoint에서 최근접을 찾고 (None: 전역 검색),
+# 최근접 waypoint 앞뒤 세그먼트 중 가까운 쪽까지 거리. 세그먼트 방향 기준 왼쪽(cross product > 0)이 +
+# PathTracker.nearest와 같은 규칙: window 끝에서 최소가 나오면 window를 앞으로 옮겨 계속 검색,
+# 최근접 waypoint가 relocalize_dist보다 멀면 그 로봇만 전역 검색 (None이면 사용 안 함)
+# positions (N,2) -> cte (N,), nearest (N,)
+def cross_track_error_batch(positions, path, nearest=None, window=64, closed=None, relocalize_dist=None):
+    pts = path.points if isinstance(path, Path) else np.asarray(path, dtype=float)
+    pos = np.asarray(positions, dtype=float).reshape(-1, 2)
+    if closed is None:
+        closed = path.closed if isinstance(path, Path) else is_closed(pts)
+    n_robots, m = len(pos), len(pts)
+
+    if nearest is None:
+        near = _nearest_global(pts, pos)
+    else:
+        w = max(2, min(int(window), m))
+        near = np.array(nearest, dtype=np.int64)
+        near_d2 = np.empty(n_robots)
+        active = np.arange(n_robots)
+        visited = 0
+        while len(active):
+            idx = near[active, None] + np.arange(w)
+            if closed:
+                idx %= m
+                valid = np.ones(idx.shape, dtype=bool)
+            else:
+                valid = idx < m
+                idx = np.minimum(idx, m - 1)
+            d = pts[idx] - pos[active, None, :]
+            d2 = np.where(valid, np.einsum('ijk,ijk->ij', d, d), np.inf)
+            j = np.argmin(d2, axis=1)
+            rows = np.arange(len(active))
+            near[active] = idx[rows, j]
+            near_d2[active] = d2[rows, j]
+            visited += w
+            if visited >= m:
+                break
+            # window 끝에서 최소 (open 경로에서 경로 끝에 닿은 window는 제외) -> 앞으로 이동
+            active = active[(j == w - 1) & valid[:, -1]]
+        if relocalize_dist is not None:
+            far = np.flatnonzero(near_d2 > relocalize_dist ** 2)
+            if len(far):
+                near[far] = _nearest_global(pts, pos[far])
+
+    best = np.full(n_robots, np.inf)
+    cte = np.full(n_robots, np.nan)
+    for a in (near - 1, near):
+        valid = np.ones(n_robots, dtype=bool) if closed else (a >= 0) & (a < m - 1)
+        a = a % m
+        p0, p1 = pts[a], pts[(a + 1) % m]
+        e = p1 - p0
+        f = pos - p0
+        l2 = np.einsum('ij,ij->i', e, e)
+        t = np.clip(np.einsum('ij,ij->i', f, e) / np.where(l2 > 0, l2, 1.0), 0.0, 1.0)
+        dist = np.hypot(*(f - t[:, None] * e).T)
+        better = valid & (dist < best)
+        side = e[:, 0] * f[:, 1] - e[:, 1] * f[:, 0]
+        cte = np.where(better, np.where(side >= 0, dist, -dist), cte)
+        best = np.where(better, dist, best)
+    # 세그먼트가 없는 경우 (waypoint 하나): 최근접 점까지 거리
+    lone = np.isnan(cte)
+    if lone.any():
+        cte[lone] = np.hypot(*(pos[lone] - pts[near[lone]]).T)
+    return cte, near
@@ -0,0 +1,219 @@
+import math
+
+import numpy as np
+
+from .geometry import circle_polyline_intersection, circle_segments
+
+# 튜토리얼 스크립트들의 경로 추종 제어 법칙 (pure pursuit 계열, Stanley)
+# 파라미터(wheelbase, gain, ...)는 모두 인자로 받음: 스크립트는 자기 상수를 넘기는 wrapper만 가짐
+
+
+def normalize_angle(angle):
+    return math.atan2(math.sin(angle), math.cos(angle))
+
+
+# 최근접 점 이후 lookahead 밖의 첫 waypoint (없으면 경로 끝점)
+def lookahead_point(robot_pos, path, lookahead, tracker=None):
+    target = path[-1]
+    if tracker is not None:
+        # 이전 최근접 인덱스 주변만 검색 (closed 경로는 wrap-around)
+        nearest_index = tracker.nearest(robot_pos)
+        i = tracker.first_outside(robot_pos, lookahead, nearest_index)
+        if i is not None:
+            target = path[i]
+    else:
+        dists = [np.linalg.norm(np.array(robot_pos) - np.array(p)) for p in path]
+        nearest_index = np.argmin(dists)
+
+        for i in range(nearest_index, len(path)):
+            if np.linalg.norm(np.array(robot_pos) - np.array(path[i])) > lookahead:
+                target = path[i]
+                break
+    return target
+
+
+def pure_pursuit(robot_pos, robot_yaw, path, lookahead, wheelbase, tracker=None):
+    target = lookahead_point(robot_pos, path, lookahead, tracker)
+    dx = target[0] - robot_pos[0]
+    dy = target[1] - robot_pos[1]
+    angle_to_target = math.atan2(dy, dx)
+    alpha = angle_to_target - robot_yaw
+    alpha = math.atan2(math.sin(alpha), math.cos(alpha))
+
+    delta = math.atan2(2 * wheelbase * math.sin(alpha) / lookahead, 1)
+    return delta, target
+
+
+def vector_pursuit(robot_pos, robot_yaw, path, lookahead, wheelbase, tracker=None):
+    target = lookahead_point(robot_pos, path, lookahead, tracker)
+
+    # 로봇 방향 벡터와 목표점 벡터 사이 각도
+    heading_vec = np.array([math.cos(robot_yaw), math.sin(robot_yaw)])
+    target_vec = np.array([target[0] - robot_pos[0], target[1] - robot_pos[1]])
+    angle = math.atan2(np.cross(heading_vec, target_vec),
+                       np.dot(heading_vec, target_vec))
+
+    delta = math.atan2(2 * wheelbase * math.sin(angle) / lookahead, 1)
+    return delta, target
+
+
+# 선분 p0->p1과 원(center, radius)의 교점 (없으면 None, 교점 선택 규칙은 geometry.circle_segments)
+def segment_circle_intersection(center, radius, p0, p1):
+    point = circle_segments(center, radius, np.asarray(p0, dtype=float), np.asarray(p1, dtype=float))
+    return None if np.isnan(point[0]) else point
+
+
+# 검색 원 밖의 첫 waypoint i에 대해, 구간(p_{i-1}~p_i)과 원의 교점을 목표로 하는 pure pursuit
+# (revisited / regulated pure pursuit 공통, lookahead는 호출하는 쪽에서 속도로 정함)
+def pure_pursuit_revisited(robot_pos, robot_yaw, path, lookahead, wheelbase, tracker=None):
+    Ld = lookahead
+    if tracker is not None:
+        # 이전 최근접 인덱스 주변만 검색 (closed 경로는 wrap-around)
+        nearest_index = tracker.nearest(robot_pos)
+        start = nearest_index if tracker.closed else max(1, nearest_index)
+        # 검색 원 밖의 첫 waypoint i와 구간(p_{i-1}~p_i)의 교점을 구간 단위로 한 번에 계산
+        i, intersection = circle_polyline_intersection(robot_pos, Ld, tracker.points, start, tracker.closed)
+    else:
+        dists = [np.linalg.norm(np.array(robot_pos) - np.array(p)) for p in path]
+        nearest_index = int(np.argmin(dists))
+        i = None
+        for j in range(max(1, nearest_index), len(path)):
+            if np.linalg.norm(np.array(robot_pos) - np.array(path[j])) > Ld:
+                i = j
+                break
+        if i is not None:
+            # circle-line intersection: 원 중심=로봇 위치, 반지름=Ld, 선분=p0->p1
+            intersection = segment_circle_intersection(robot_pos, Ld, path[i - 1], path[i])
+
+    target = np.array(path[-1], dtype=float)
+    if i is not None:
+        p1 = np.array(path[i], dtype=float)
+        p0 = np.array(path[i - 1], dtype=float)
+        if intersection is not None:
+            target = intersection
+        else:
+            # 교점이 없으면 보간 실패 -> 로봇 중심에서 p_i 방향으로 Ld 이동한 점으로 근사
+            # (길이는 sqrt(x*x + y*y)로: np.linalg.norm은 BLAS dot이라 kernels와 마지막 bit가 다를 수 있음)
+            seg = p1 - p0
+            n = math.sqrt(seg[0] * seg[0] + seg[1] * seg[1])
+            if n > 1e-6:
+                to_p1 = p1 - np.array(robot_pos, dtype=float)
+                m = math.sqrt(to_p1[0] * to_p1[0] + to_p1[1] * to_p1[1])
+                if m > 1e-6:
+                    target = np.array(robot_pos, dtype=float) + to_p1 / m * Ld
+                else:
+                    target = p1
+            else:
+                target = p1
+
+    dx = target[0] - robot_pos[0]
+    dy = target[1] - robot_pos[1]
+    angle_to_target = math.atan2(dy, dx)
+    alpha = angle_to_target - robot_yaw
+    alpha = math.atan2(math.sin(alpha), math.cos(alpha))
+    delta = math.atan2(2.0 * wheelbase * math.sin(alpha) / Ld, 1.0)
+    return delta, (float(target[0]), float(target[1]))
+
+
+# 곡률(회전반경)과 장애물 근접도로 속도 제한 (regulated pure pursuit)
+# obstacle_map이 있으면 거리장 조회, 없으면 원형 장애물 목록을 직접 검사
+def regulated_speed(v_max, delta, robot_pos, obstacles, obs_radius, wheelbase, tmax, prox_dist, v_min,
+                    gain_obst=1.0, robot_size=0.0, obstacle_map=None):
+    if abs(math.tan(delta)) < 1e-5:
+        radius = 1e6
+    else:
+        radius = abs(wheelbase / math.tan(delta))
+    vt_curve = min(tmax, abs(v_max * radius / tmax)) # max속도 or regulated
+    if obstacle_map is not None:
+        min_dist = obstacle_map.distance_at(robot_pos[0], robot_pos[1]) - robot_size
+    else:
+        min_dist = float('inf')
+        for center in obstacles:
+            dist = np.linalg.norm(np.array(robot_pos) - np.array(center)) - obs_radius - robot_size
+            if dist < min_dist:
+                min_dist = dist
+    dist_to_obst = max(min_dist, 0.0)
+    if dist_to_obst < prox_dist:
+        factor = (dist_to_obst / prox_dist) * gain_obst
+        vt_curve = max(v_min, vt_curve * factor)
+    else:
+        vt_curve = max(v_min, vt_curve)
+    return vt_curve
+
+
+# regulated_speed의 배열 버전: clearance (N,)는 가장 가까운 장애물(다른 로봇 등)까지 여유 거리 (없으면 inf)
+# deltas=None이면 곡률 제한 없이 근접 감속만 (v_max에서 시작)
+def regulated_speed_batch(v_max, deltas, clearance, wheelbase, tmax, prox_dist, v_min, gain_obst=1.0):
+    clearance = np.asarray(clearance, dtype=float)
+    if deltas is None:
+        vt_curve = np.broadcast_to(np.asarray(v_max, dtype=float), clearance.shape)
+    else:
+        tan = np.abs(np.tan(deltas))
+        radius = np.where(tan < 1e-5, 1e6, wheelbase / np.maximum(tan, 1e-5))
+        vt_curve = np.minimum(tmax, np.abs(v_max * radius / tmax))
+    dist_to_obst = np.maximum(clearance, 0.0)
+    factor = np.where(dist_to_obst < prox_dist, dist_to_obst / prox_dist * gain_obst, 1.0)
+    return np.maximum(v_min, vt_curve * factor)
+
+
+# 앞바퀴 축과 기준점/기준 heading으로 Stanley 조향각 계산
+def stanley_steer(front_x, front_y, yaw, v, ref_x, ref_y, ref_yaw, k, max_steering):
+    dx = ref_x - front_x
+    dy = ref_y - front_y
+    perp_vec = [np.cos(ref_yaw + np.pi/2), np.sin(ref_yaw + np.pi/2)]
+    cte = np.dot([dx, dy], perp_vec)
+
+    psi = normalize_angle(ref_yaw - yaw)
+    cte_term = math.atan2(k*cte, max(v, 1e-3))
+
+    steer = psi + cte_term
+    return np.clip(steer, -max_steering, max_steering)
+
+
+# waypoint 기준 Stanley: index(GridIndex)가 있고 project면 최근접 세그먼트 위 투영, 아니면 최근접 waypoint
+def stanley_control(x, y, yaw, v, ref_xs, ref_ys, ref_yaws, wheelbase, k, max_steering, index=None, project=True):
+    front_x = x + wheelbase * np.cos(yaw)
+    front_y = y + wheelbase * np.sin(yaw)
+
+    if index is not None and project:
+        # yaw는 세그먼트 양 끝 사이 보간
+        i, t, (ref_x, ref_y), _ = index.project((front_x, front_y))
+        j = (i + 1) % len(ref_yaws)
+        ref_yaw = ref_yaws[i] + t * normalize_angle(ref_yaws[j] - ref_yaws[i])
+    else:
+        if index is not None:
+            min_index = index.nearest((front_x, front_y))[0]
+        else:
+            dists = np.hypot(front_x - ref_xs, front_y - ref_ys)
+            min_index = int(np.argmin(dists))
+
+        ref_x = ref_xs[min_index]
+        ref_y = ref_ys[min_index]
+        ref_yaw = ref_yaws[min_index]
+
+    steer = stanley_steer(front_x, front_y, yaw, v, ref_x, ref_y, ref_yaw, k, max_steering)
+    return steer, ref_x, ref_y
+
+
+# spline 기준 경로: 앞바퀴 축을 곡선 위로 투영 (s: 이전 제어 주기의 투영 위치, warm start)
+# heading은 spline 접선에서 바로 계산하므로 waypoint 간격과 무관
+def stanley_control_spline(x, y, yaw, v, spline, wheelbase, k, max_steering, s=None):
+    front_x = x + wheelbase * math.cos(yaw)
+    front_y = y + wheelbase * math.sin(yaw)
+    s, ref_x, ref_y, _ = spline.project((front_x, front_y), s)
+    ref_yaw = spline.heading(s)
+    steer = stanley_steer(front_x, front_y, yaw, v, ref_x, ref_y, ref_yaw, k, max_steering)
+    return steer, ref_x, ref_y, s
+
+
+# stanley_control_spline의 배열 버전: 모든 차량의 앞바퀴 축을 한 번에 spline 위로 투영
+def stanley_control_batch(x, y, yaw, v, spline, wheelbase, k, max_steering, s=None):
+    front = np.column_stack((x + wheelbase * np.cos(yaw), y + wheelbase * np.sin(yaw)))
+    s, ref, _ = spline.project_batch(front, s)
+    _, d1, _ = spline.evaluate_batch(s)
+    ref_yaw = np.arctan2(d1[:, 1], d1[:, 0])
+    d = ref - front
+    cte = -d[:, 0] * np.sin(ref_yaw) + d[:, 1] * np.cos(ref_yaw)
+    psi = np.arctan2(np.sin(ref_yaw - yaw), np.cos(ref_yaw - yaw))
+    steer = psi + np.arctan2(k*cte, np.maximum(v, 1e-3))
+    return np.clip(steer, -max_steering, max_steering), ref, s
@@ -0,0 +1,126 @@
+import numpy as np
+
+from .path import as_path
+from .batch import CHUNK_ELEMS
+from .geometry import circle_segments
+from .spatial import SpatialHash
+
+# 수백~수천 대 로봇 fleet 시뮬레이션용 batch 함수 (경로가 로봇마다 다를 수 있음)
+# 경로들은 PathSet 하나에 이어 붙여 두고 로봇은 path id로 참조 (공유 경로면 여러 로봇이 같은 id)
+
+
+# 여러 경로를 점 배열 하나로 이어 붙임: 경로 k의 점은 points[offsets[k] : offsets[k] + sizes[k]]
+class PathSet:
+    def __init__(self, paths):
+        self.paths = [as_path(p) for p in paths]
+        self.sizes = np.array([len(p.points) for p in self.paths], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(self.sizes)[:-1])).astype(np.int64)
+        self.closed = np.array([p.closed for p in self.paths], dtype=bool)
+        self.points = np.concatenate([p.points for p in self.paths])
+        self.xs = np.ascontiguousarray(self.points[:, 0])
+        self.ys = np.ascontiguousarray(self.points[:, 1])
+        self.heading = np.concatenate([p.heading for p in self.paths])
+
+    def __len__(self):
+        return len(self.paths)
+
+    # 경로 path_ids (N,)의 로컬 인덱스 start (N,)부터 w개 waypoint: (전역 인덱스, 로컬 인덱스, 유효 여부) (N,w)
+    # closed 경로는 wrap, open 경로는 끝점에서 멈춤 (끝점 반복, valid=False)
+    def window(self, path_ids, start, w):
+        size = self.sizes[path_ids][:, None]
+        closed = self.closed[path_ids][:, None]
+        local = np.asarray(start, dtype=np.int64)[:, None] + np.arange(w)
+        valid = closed | (local < size)
+        if self.closed.all():
+            local %= size
+        else:
+            local = np.where(closed, local % size, np.minimum(local, size - 1))
+        return self.offsets[path_ids][:, None] + local, local, valid
+
+    # 경로별 전역 검색으로 최근접 로컬 인덱스 (N,) (첫 스텝용, 메모리 제한을 위해 로봇을 나눠서 처리)
+    def nearest(self, positions, path_ids):
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        path_ids = np.asarray(path_ids, dtype=np.int64)
+        near = np.empty(len(positions), dtype=np.int64)
+        for k in np.unique(path_ids):
+            rows = np.flatnonzero(path_ids == k)
+            pts = self.paths[k].points
+            step = max(1, CHUNK_ELEMS // max(len(pts), 1))
+            for a in range(0, len(rows), step):
+                d = pts[None, :, :] - positions[rows[a:a + step], None, :]
+                near[rows[a:a + step]] = np.argmin(np.einsum('ijk,ijk->ij', d, d), axis=1)
+        return near
+
+    # 경로 위 로컬 인덱스의 위치 (N,2)와 경로 방향 (N,)
+    def pose_at(self, path_ids, index):
+        g = self.offsets[path_ids] + index
+        return self.points[g].copy(), self.heading[g]
+
+
+# N대 로봇 pure pursuit: 각자 경로의 nearest (이전 최근접 로컬 인덱스)부터 window개 waypoint만 검색
+# intersect=False: lookahead 밖 첫 waypoint가 목표 (pure_pursuit_batch와 같음)
+# intersect=True: 그 waypoint와 직전 waypoint 구간과 lookahead 원의 교점 (pure_pursuit_revisited와 같음)
+# window는 lookahead 거리를 덮을 만큼 커야 함.  -> deltas (N,), targets (N,2), nearest (N,)
+def fleet_pursuit(positions, yaws, paths, path_ids, nearest, lookahead, wheelbase, window=32, intersect=False):
+    pos = np.asarray(positions, dtype=float).reshape(-1, 2)
+    n_robots = len(pos)
+    Ld = np.broadcast_to(np.asarray(lookahead, dtype=float), (n_robots,))
+    rows = np.arange(n_robots)
+    idx, local, valid = paths.window(path_ids, nearest, window)
+    dx = paths.xs[idx] - pos[:, 0:1]
+    dy = paths.ys[idx] - pos[:, 1:2]
+    d2 = dx * dx + dy * dy
+    near_col = np.argmin(np.where(valid, d2, np.inf), axis=1)
+    new_nearest = local[rows, near_col]
+
+    start_col = near_col
+    if intersect:
+        # open 경로는 직전 waypoint가 있도록 두 번째 점부터 (pure_pursuit_revisited의 max(1, nearest))
+        start_col = near_col + ((new_nearest == 0) & ~paths.closed[path_ids])
+    mask = valid & (d2 > (Ld * Ld)[:, None]) & (np.arange(idx.shape[1]) >= start_col[:, None])
+    found = mask.any(axis=1)
+    first = idx[rows, np.argmax(mask, axis=1)]
+    # window 안에 Ld 밖의 점이 없으면 window 끝점 (열린 경로에서는 마지막 waypoint)
+    targets = np.where(found[:, None], paths.points[first], paths.points[idx[:, -1]])
+
+    if intersect:
+        p1 = paths.points[first]
+        offset = paths.offsets[path_ids]
+        prev = first - offset - 1
+        prev = np.where(prev < 0, prev + paths.sizes[path_ids], prev) + offset
+        p0 = paths.points[prev]
+        hit = circle_segments(pos, Ld, p0, p1)
+        # 교점이 없으면 로봇 중심에서 p_i 방향으로 Ld 이동한 점으로 근사
+        to_p1 = p1 - pos
+        m = np.hypot(to_p1[:, 0], to_p1[:, 1])
+        seg = np.hypot(*(p1 - p0).T)
+        ok = (seg > 1e-6) & (m > 1e-6)
+        approx = np.where(ok[:, None], pos + to_p1 / np.where(ok, m, 1.0)[:, None] * Ld[:, None], p1)
+        hit = np.where(np.isnan(hit[:, :1]), approx, hit)
+        targets = np.where(found[:, None], hit, targets)
+
+    alpha = np.arctan2(targets[:, 1] - pos[:, 1], targets[:, 0] - pos[:, 0]) - yaws
+    alpha = np.arctan2(np.sin(alpha), np.cos(alpha))
+    deltas = np.arctan2(2 * wheelbase * np.sin(alpha) / Ld, 1)
+    return deltas, targets, new_nearest
+
+
+# 로봇끼리 근접도: 진행 방향 앞쪽 (heading 기준 ±fov/2) 이웃까지의 여유 거리 (중심 거리 - 2*robot_radius)
+# sensing_range (중심 거리) 안에 앞쪽 이웃이 없으면 inf
+# 서로 상대가 앞에 있는 쌍 (교차로에서 마주침)은 인덱스가 큰 쪽만 양보 (둘 다 멈추는 deadlock 방지)
+# spatial_hash: 재사용할 SpatialHash (cell_size >= sensing_range), None이면 새로 만듦
+# -> clearance (N,), 겹친 쌍 수 (중심 거리 < 2*robot_radius)
+def robot_clearance(positions, yaws, robot_radius, sensing_range, fov, spatial_hash=None):
+    pos = np.asarray(positions, dtype=float).reshape(-1, 2)
+    grid = spatial_hash if spatial_hash is not None else SpatialHash(sensing_range)
+    i, j, d = grid.build(pos).pairs(sensing_range)
+    u = (pos[j] - pos[i]) / np.maximum(d, 1e-9)[:, None]
+    cos_half = np.cos(0.5 * fov)
+    ahead_ij = np.cos(yaws[i]) * u[:, 0] + np.sin(yaws[i]) * u[:, 1] >= cos_half    # j가 i 앞
+    ahead_ji = -(np.cos(yaws[j]) * u[:, 0] + np.sin(yaws[j]) * u[:, 1]) >= cos_half  # i가 j 앞
+    gap = d - 2 * robot_radius
+    clearance = np.full(len(pos), np.inf)
+    yield_i = ahead_ij & ~ahead_ji   # pairs는 i < j
+    np.minimum.at(clearance, i[yield_i], gap[yield_i])
+    np.minimum.at(clearance, j[ahead_ji], gap[ahead_ji])
+    return clearance, int(np.count_nonzero(gap < 0))
@@ -0,0 +1,114 @@
+import numpy as np
+
+from .path import Path
+
+
+# 원(center, radius)과 선분들 p0[k]->p1[k]의 교점을 한 번에 계산
+# |p0 + t*d - center|^2 = radius^2
+# (d·d) t^2 + 2(d·f) t + (f·f - r^2) = 0
+# 선분 진행 방향 쪽 근 t2가 0<=t2<=1이면 그 교점, 아니면 t1 (둘 다 범위 밖이면 NaN)
+# 두 교점은 모두 원 위에 있어서 중심까지 거리로 고르면 반올림 오차에 따라 갈리므로 항상 같은 규칙으로 고정
+def circle_segments(center, radius, p0, p1):
+    center = np.asarray(center, dtype=float)
+    radius = np.asarray(radius, dtype=float)
+    d = p1 - p0
+    f = p0 - center
+    a = np.einsum('...j,...j->...', d, d)
+    b = 2.0 * np.einsum('...j,...j->...', d, f)
+    c = np.einsum('...j,...j->...', f, f) - radius * radius
+    disc = b * b - 4 * a * c
+    ok = (a != 0.0) & (disc >= 0)
+    sqrt_disc = np.sqrt(np.where(ok, disc, 0.0))
+    a2 = np.where(ok, 2 * a, 1.0)
+    t1 = (-b - sqrt_disc) / a2
+    t2 = (-b + sqrt_disc) / a2
+    pt1 = p0 + t1[..., None] * d
+    pt2 = p0 + t2[..., None] * d
+    ok1 = ok & (t1 >= 0.0) & (t1 <= 1.0)
+    ok2 = ok & (t2 >= 0.0) & (t2 <= 1.0)
+    out = np.where(ok2[..., None], pt2, pt1)
+    return np.where((ok1 | ok2)[..., None], out, np.nan)
+
+
+# start부터 앞으로 진행하며 원 밖에 있는 첫 waypoint i를 찾고, 구간 (p_{i-1}, p_i)과 원의 교점을 반환
+# 반환: (i, 교점)  i가 없으면 (None, None), 교점이 없으면 (i, None)
+# closed 경로는 끝에서 처음으로 wrap (i=0이면 p_{i-1}은 마지막 waypoint)
+def circle_polyline_intersection(center, radius, points, start=1, closed=False, chunk=64):
+    pts = points.points if isinstance(points, Path) else points
+    n = len(pts)
+    center = np.asarray(center, dtype=float)
+    r2 = radius * radius
+    total = n if closed else n - start
+    checked = 0
+    while checked < total:
+        m = min(chunk, total - checked)
+        i = np.arange(start + checked, start + checked + m)
+        if closed:
+            i %= n
+        p1 = pts[i]
+        f = p1 - center
+        hit = np.flatnonzero(np.einsum('ij,ij->i', f, f) > r2)
+        if len(hit):
+            k = int(i[hit[0]])
+            point = circle_segments(center, radius, pts[k - 1], pts[k])
+            return k, (None if np.isnan(point[0]) else point)
+        checked += m
+        chunk *= 2
+    return None, None
+
+
+# 여러 로봇에 대한 batch 버전: centers (N,2), radii (N,), start (N,)에서 window개 waypoint 검색
+# 반환: 인덱스 (N,) (없으면 -1), 교점 (N,2) (없으면 NaN)
+def circle_polyline_intersection_batch(centers, radii, points, start, window=64, closed=False):
+    pts = points.points if isinstance(points, Path) else np.asarray(points, dtype=float)
+    n = len(pts)
+    centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(centers),))
+    w = min(int(window), n)
+    idx = np.asarray(start, dtype=np.int64).reshape(-1, 1) + np.arange(w)
+    if closed:
+        idx %= n
+        valid = np.ones(idx.shape, dtype=bool)
+    else:
+        valid = idx < n
+        idx = np.minimum(idx, n - 1)
+    f = pts[idx] - centers[:, None, :]
+    outside = valid & (np.einsum('ijk,ijk->ij', f, f) > (radii * radii)[:, None])
+    found = outside.any(axis=1)
+    rows = np.arange(len(centers))
+    i = idx[rows, np.argmax(outside, axis=1)]
+    points_out = circle_segments(centers, radii, pts[i - 1], pts[i])
+    points_out[~found] = np.nan
+    return np.where(found, i, -1), points_out
+
+
+# 여러 점 queries (M,2)를 polyline 위로 한 번에 투영 (메모리 제한을 위해 점을 나눠서 처리)
+# 반환: 세그먼트 인덱스 (M,), 세그먼트 위 비율 t (M,), 거리 (M,)
+# closed 경로는 마지막 -> 처음 세그먼트(인덱스 N-1)를 포함
+def project_points(queries, points, closed=None, chunk_elems=1 << 22):
+    path = points if isinstance(points, Path) else Path(points, closed=closed)
+    closed = path.closed if closed is None else bool(closed)
+    p0 = path.points[:-1]
+    d = path.seg_delta
+    if closed:
+        p0 = path.points
+        d = np.concatenate((d, path.points[:1] - path.points[-1:]))
+    len2 = np.einsum('ij,ij->i', d, d)
+    inv = np.where(len2 > 0.0, 1.0 / np.where(len2 > 0.0, len2, 1.0), 0.0)
+
+    q = np.asarray(queries, dtype=float).reshape(-1, 2)
+    seg = np.empty(len(q), dtype=np.int64)
+    t_out = np.empty(len(q))
+    dist = np.empty(len(q))
+    step = max(1, chunk_elems // max(len(d), 1))
+    for a in range(0, len(q), step):
+        f = q[a:a + step, None, :] - p0[None, :, :]
+        t = np.clip(np.einsum('ijk,jk->ij', f, d) * inv, 0.0, 1.0)
+        e = f - t[..., None] * d
+        d2 = np.einsum('ijk,ijk->ij', e, e)
+        k = np.argmin(d2, axis=1)
+        rows = np.arange(len(k))
+        seg[a:a + step] = k
+        t_out[a:a + step] = t[rows, k]
+        dist[a:a + step] = np.sqrt(d2[rows, k])
+    return seg, t_out, dist
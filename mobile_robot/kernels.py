@@ -0,0 +1,267 @@
+import math
+
+import numpy as np
+
+# 한 대 로봇의 closed-loop rollout (센서 -> 제어기 -> 기구학 -> 기록)을 한 번의 호출로 도는 kernel
+# numba가 설치되어 있으면 njit으로 컴파일, 없으면 HAVE_NUMBA=False (스크립트는 기존 NumPy 경로를 사용)
+# kernel 코드는 numba가 컴파일할 수 있는 스칼라 연산/배열만 사용 (PathTracker, ArcLengthSpline 로직을 그대로 옮김)
+# 제어/센서 주기와 센서 노이즈는 호출하는 쪽에서 MultiRateScheduler.schedule, PoseSensor.noise_samples로 미리 만들어 넘김
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+
+def _jit(fn):
+    return numba.njit(cache=True)(fn) if HAVE_NUMBA else fn
+
+
+# PathTracker.nearest: 이전 인덱스부터 window개씩 앞으로 검색 (index < 0: 전역 검색)
+@_jit
+def _nearest(points, closed, window, index, px, py):
+    n = len(points)
+    if index < 0:
+        best, best_d = 0, np.inf
+        for i in range(n):
+            dx, dy = points[i, 0] - px, points[i, 1] - py
+            d = dx * dx + dy * dy
+            if d < best_d:
+                best, best_d = i, d
+        return best
+    start = index
+    visited = 0
+    while True:
+        m = window if closed else min(start + window, n) - start
+        best, best_d = 0, np.inf
+        for j in range(m):
+            i = (start + j) % n if closed else start + j
+            dx, dy = points[i, 0] - px, points[i, 1] - py
+            d = dx * dx + dy * dy
+            if d < best_d:
+                best, best_d = j, d
+        visited += m
+        index = (start + best) % n if closed else start + best
+        # window 끝에서 최소가 나오면 앞으로 이동해서 계속 검색
+        if best < m - 1 or m < window or visited >= n:
+            return index
+        start = index
+
+
+# geometry.circle_segments (선분 하나): (교점 있음, x, y)
+@_jit
+def _circle_segment(cx, cy, radius, x0, y0, x1, y1):
+    dx, dy = x1 - x0, y1 - y0
+    fx, fy = x0 - cx, y0 - cy
+    a = dx * dx + dy * dy
+    b = 2.0 * (dx * fx + dy * fy)
+    c = fx * fx + fy * fy - radius * radius
+    disc = b * b - 4 * a * c
+    if a == 0.0 or disc < 0:
+        return False, 0.0, 0.0
+    sqrt_disc = math.sqrt(disc)
+    t1 = (-b - sqrt_disc) / (2 * a)
+    t2 = (-b + sqrt_disc) / (2 * a)
+    # 같은 규칙: 진행 방향 쪽 t2가 선분 위면 t2, 아니면 t1
+    if 0.0 <= t2 <= 1.0:
+        return True, x0 + t2 * dx, y0 + t2 * dy
+    return 0.0 <= t1 <= 1.0, x0 + t1 * dx, y0 + t1 * dy
+
+
+# controllers.pure_pursuit_revisited (tracker 사용) -> (delta, target x, target y, 새 최근접 인덱스)
+@_jit
+def _pure_pursuit_revisited(points, closed, window, index, px, py, yaw, lookahead, wheelbase):
+    n = len(points)
+    index = _nearest(points, closed, window, index, px, py)
+    start = index if closed else max(1, index)
+    total = n if closed else n - start
+    r2 = lookahead * lookahead
+    tx, ty = points[n - 1, 0], points[n - 1, 1]
+    for j in range(total):
+        i = (start + j) % n if closed else start + j
+        fx, fy = points[i, 0] - px, points[i, 1] - py
+        if fx * fx + fy * fy > r2:
+            p0x, p0y = points[(i - 1) % n, 0], points[(i - 1) % n, 1]
+            p1x, p1y = points[i, 0], points[i, 1]
+            ok, ix, iy = _circle_segment(px, py, lookahead, p0x, p0y, p1x, p1y)
+            if ok:
+                tx, ty = ix, iy
+            elif math.sqrt((p1x - p0x) ** 2 + (p1y - p0y) ** 2) > 1e-6:
+                # 교점이 없으면 로봇 중심에서 p_i 방향으로 Ld 이동한 점
+                m = math.sqrt((p1x - px) ** 2 + (p1y - py) ** 2)
+                if m > 1e-6:
+                    tx, ty = px + (p1x - px) / m * lookahead, py + (p1y - py) / m * lookahead
+                else:
+                    tx, ty = p1x, p1y
+            else:
+                tx, ty = p1x, p1y
+            break
+    alpha = math.atan2(ty - py, tx - px) - yaw
+    alpha = math.atan2(math.sin(alpha), math.cos(alpha))
+    delta = math.atan2(2.0 * wheelbase * math.sin(alpha) / lookahead, 1.0)
+    return delta, tx, ty, index
+
+
+# pygame_pure_pursuit_revisited.simulate와 같은 rollout
+# 속도는 매 제어 주기 v_min + (v_max - v_min) * max(0, 1 - |delta|), lookahead는 max(min_lookahead, gain_x * 속도)
+@_jit
+def rollout_pure_pursuit_revisited(points, closed, window, x, y, yaw, speed, sensor_due, control_due, noise,
+                                   wheelbase, gain_x, min_lookahead, v_min, v_max):
+    steps = len(control_due)
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    deltas = np.empty(steps)
+    speeds = np.empty(steps)
+    targets = np.empty((steps, 2))
+    index = -1
+    measured = 0
+    mx, my, myaw = x, y, yaw
+    delta, tx, ty = 0.0, 0.0, 0.0
+    for n in range(steps):
+        if sensor_due[n]:
+            mx, my, myaw = x + noise[measured, 0], y + noise[measured, 1], yaw + noise[measured, 2]
+            measured += 1
+        if control_due[n]:
+            lookahead = max(min_lookahead, speed * gain_x)
+            delta, tx, ty, index = _pure_pursuit_revisited(points, closed, window, index, mx, my, myaw,
+                                                           lookahead, wheelbase)
+            speed = v_min + (v_max - v_min) * max(0.0, 1.0 - abs(delta))
+        yaw += math.tan(delta) * speed / wheelbase
+        x += speed * math.cos(yaw)
+        y += speed * math.sin(yaw)
+        trajectory[n, 0], trajectory[n, 1] = x, y
+        yaws[n] = yaw
+        deltas[n] = delta
+        speeds[n] = speed
+        targets[n, 0], targets[n, 1] = tx, ty
+    return trajectory, yaws, deltas, speeds, targets
+
+
+# ArcLengthSpline.evaluate (coeffs: 구간별 (ax, ay, bx, by, cx, cy, dx, dy))
+@_jit
+def _spline_evaluate(knots, coeffs, length, closed, s):
+    s = s % length if closed else min(max(s, 0.0), length)
+    i = min(np.searchsorted(knots, s, side="right") - 1, len(coeffs) - 1)
+    u = s - knots[i]
+    c = coeffs[i]
+    return (c[0] + u * (c[2] + u * (c[4] + u * c[6])),
+            c[1] + u * (c[3] + u * (c[5] + u * c[7])),
+            c[2] + u * (2 * c[4] + 3 * u * c[6]),
+            c[3] + u * (2 * c[5] + 3 * u * c[7]),
+            2 * c[4] + 6 * u * c[6],
+            2 * c[5] + 6 * u * c[7])
+
+
+@_jit
+def _spline_f(knots, coeffs, length, closed, s, qx, qy):
+    x, y, dx, dy, ddx, ddy = _spline_evaluate(knots, coeffs, length, closed, s)
+    ex, ey = x - qx, y - qy
+    return ex * dx + ey * dy, dx * dx + dy * dy + ex * ddx + ey * ddy
+
+
+@_jit
+def _spline_clamp(length, closed, s):
+    return s if closed else min(max(s, 0.0), length)
+
+
+# ArcLengthSpline._solve (None 대신 NaN)
+@_jit
+def _spline_solve(knots, coeffs, length, closed, s, w, qx, qy, tol, max_iter, expand, force):
+    lo, hi = _spline_clamp(length, closed, s - w), _spline_clamp(length, closed, s + w)
+    f_lo = _spline_f(knots, coeffs, length, closed, lo, qx, qy)[0]
+    f_hi = _spline_f(knots, coeffs, length, closed, hi, qx, qy)[0]
+    for attempt in range(expand + 1):
+        if f_lo > 0 and not closed and lo == 0.0:
+            return 0.0
+        if f_hi < 0 and not closed and hi == length:
+            return length
+        if f_lo <= 0 <= f_hi or attempt == expand:
+            break
+        if f_lo > 0:
+            hi, f_hi = lo, f_lo
+            lo = _spline_clamp(length, closed, lo - w)
+            f_lo = _spline_f(knots, coeffs, length, closed, lo, qx, qy)[0]
+        else:
+            lo, f_lo = hi, f_hi
+            hi = _spline_clamp(length, closed, hi + w)
+            f_hi = _spline_f(knots, coeffs, length, closed, hi, qx, qy)[0]
+        w *= 2
+    if not (f_lo <= 0 <= f_hi or force):
+        return np.nan
+    s = min(max(s, lo), hi)
+    for _ in range(max_iter):
+        f, fp = _spline_f(knots, coeffs, length, closed, s, qx, qy)
+        if f > 0:
+            hi = s
+        else:
+            lo = s
+        if fp > 0:
+            step = f / fp
+            if abs(step) < tol:
+                return s - step
+            if lo < s - step < hi:
+                s -= step
+                continue
+        s = 0.5 * (lo + hi)
+        if hi - lo < tol:
+            return s
+    return s
+
+
+# ArcLengthSpline.project (s0가 NaN이면 전역 초기값) -> (s, x, y)
+@_jit
+def _spline_project(knots, coeffs, length, closed, w, grid_s, grid_p, qx, qy, s0, tol, max_iter):
+    s = np.nan
+    if not math.isnan(s0):
+        s = _spline_solve(knots, coeffs, length, closed, s0, w, qx, qy, tol, max_iter, 4, False)
+    if math.isnan(s):
+        best, best_d = 0, np.inf
+        for i in range(len(grid_s)):
+            dx, dy = grid_p[i, 0] - qx, grid_p[i, 1] - qy
+            d = dx * dx + dy * dy
+            if d < best_d:
+                best, best_d = i, d
+        s = _spline_solve(knots, coeffs, length, closed, grid_s[best], w, qx, qy, tol, max_iter, 4, True)
+    s = s % length if closed else min(max(s, 0.0), length)
+    x, y = _spline_evaluate(knots, coeffs, length, closed, s)[:2]
+    return s, x, y
+
+
+# pygame_stanley.simulate (spline 기준 경로)와 같은 rollout, 차량 모델은 VehicleModel (yaw는 [0, 2pi))
+@_jit
+def rollout_stanley_spline(knots, coeffs, length, closed, max_segment, grid_s, grid_p, x, y, yaw, v,
+                           sensor_due, control_due, noise, wheelbase, k, max_steering, dt):
+    steps = len(control_due)
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    steers = np.empty(steps)
+    refs = np.empty((steps, 2))
+    measured = 0
+    mx, my, myaw = x, y, yaw
+    s = np.nan
+    steer, rx, ry = 0.0, 0.0, 0.0
+    for n in range(steps):
+        if sensor_due[n]:
+            mx, my, myaw = x + noise[measured, 0], y + noise[measured, 1], yaw + noise[measured, 2]
+            measured += 1
+        if control_due[n]:
+            front_x = mx + wheelbase * math.cos(myaw)
+            front_y = my + wheelbase * math.sin(myaw)
+            s, rx, ry = _spline_project(knots, coeffs, length, closed, 2.0 * max_segment, grid_s, grid_p,
+                                        front_x, front_y, s, 1e-9, 50)
+            _, _, dx, dy, _, _ = _spline_evaluate(knots, coeffs, length, closed, s)
+            ref_yaw = math.atan2(dy, dx)
+            cte = (rx - front_x) * math.cos(ref_yaw + math.pi / 2) + (ry - front_y) * math.sin(ref_yaw + math.pi / 2)
+            psi = ref_yaw - myaw
+            psi = math.atan2(math.sin(psi), math.cos(psi))
+            steer = min(max(psi + math.atan2(k * cte, max(v, 1e-3)), -max_steering), max_steering)
+        yaw += v / wheelbase * math.tan(steer) * dt
+        yaw = yaw % (2.0 * math.pi)
+        x += v * math.cos(yaw) * dt
+        y += v * math.sin(yaw) * dt
+        trajectory[n, 0], trajectory[n, 1] = x, y
+        yaws[n] = yaw
+        steers[n] = steer
+        refs[n, 0], refs[n, 1] = rx, ry
+    return trajectory, yaws, steers, refs
@@ -0,0 +1,159 @@
+import math
+
+import numpy as np
+
+
+# sin(h)/h (h -> 0 에서 1)
+def _sinc(h):
+    return math.sin(h) / h if abs(h) > 1e-9 else 1.0 - h * h / 6.0
+
+
+# 유니사이클 정확한 원호 적분 (dt 동안 v, omega가 일정하다고 가정)
+# x' = x + v*dt * sinc(w*dt/2) * cos(theta + w*dt/2)   (omega -> 0 이면 직선)
+def unicycle_step(x, y, theta, v, omega, dt):
+    h = 0.5 * omega * dt
+    ds = v * dt * _sinc(h)
+    mid = theta + h
+    x += ds * math.cos(mid)
+    y += ds * math.sin(mid)
+    theta += omega * dt
+    theta = (theta + math.pi) % (2 * math.pi) - math.pi
+    return x, y, theta
+
+
+# 뒷바퀴 기준 bicycle 모델 오일러 적분 (yaw를 먼저 갱신한 뒤 새 heading으로 전진)
+# dt=1이면 speed는 스텝당 이동 거리
+def bicycle_step(x, y, yaw, delta, speed, wheelbase, dt=1.0):
+    yaw += math.tan(delta) * speed / wheelbase * dt
+    x += speed * math.cos(yaw) * dt
+    y += speed * math.sin(yaw) * dt
+    return x, y, yaw
+
+
+# 여러 입력 시퀀스를 한 번에 적분: v, omega (B,T), pose0 (B,3) 또는 (3,) -> poses (B,T,3)
+# 각 스텝의 입력이 구간 동안 일정하면 dt 크기와 무관하게 정확함
+def unicycle_rollout(v, omega, dt, pose0=(0.0, 0.0, 0.0)):
+    v = np.atleast_2d(np.asarray(v, dtype=float))
+    omega = np.atleast_2d(np.asarray(omega, dtype=float))
+    v, omega = np.broadcast_arrays(v, omega)
+    pose0 = np.broadcast_to(np.asarray(pose0, dtype=float), (v.shape[0], 3))
+
+    dtheta = omega * dt
+    theta = pose0[:, 2:3] + np.cumsum(dtheta, axis=1)
+    h = 0.5 * dtheta
+    mid = theta - h     # 각 구간 시작 각도 + w*dt/2
+    ds = v * dt * np.sinc(h / np.pi)
+
+    poses = np.empty(v.shape + (3,))
+    poses[..., 0] = pose0[:, 0:1] + np.cumsum(ds * np.cos(mid), axis=1)
+    poses[..., 1] = pose0[:, 1:2] + np.cumsum(ds * np.sin(mid), axis=1)
+    poses[..., 2] = (theta + np.pi) % (2 * np.pi) - np.pi
+    return poses
+
+
+# 차동 구동 바퀴 각속도 (오른쪽, 왼쪽) -> (v, omega)
+def diff_drive_twist(phi_r_dot, phi_l_dot, r, a):
+    v = 0.5 * r * (phi_r_dot + phi_l_dot)
+    omega = r / (2 * a) * (phi_r_dot - phi_l_dot)
+    return v, omega
+
+
+# 바퀴 각속도 시퀀스 (B,T,2) -> poses (B,T,3)
+def diff_drive_rollout(wheel_speeds, r, a, dt, pose0=(0.0, 0.0, 0.0)):
+    wheel_speeds = np.asarray(wheel_speeds, dtype=float)
+    if wheel_speeds.ndim == 2:
+        wheel_speeds = wheel_speeds[None]
+    v, omega = diff_drive_twist(wheel_speeds[..., 0], wheel_speeds[..., 1], r, a)
+    return unicycle_rollout(v, omega, dt, pose0)
+
+
+# N개 모듈 swerve 기구학 (모듈 위치 (M,2)는 로봇 중심 기준 body frame)
+# 모듈 i 속도 = (vx - omega*py_i, vy + omega*px_i) -> IK 행렬 A (2M,3)을 한 번만 만들어 둠
+class SwerveKinematics:
+    def __init__(self, module_positions, max_speed=1.0):
+        self.positions = np.asarray(module_positions, dtype=float).reshape(-1, 2)
+        self.n_modules = len(self.positions)
+        self.max_speed = max_speed
+        A = np.zeros((2 * self.n_modules, 3))
+        A[0::2, 0] = 1.0
+        A[0::2, 2] = -self.positions[:, 1]
+        A[1::2, 1] = 1.0
+        A[1::2, 2] = self.positions[:, 0]
+        self.ik_matrix = A
+        self.fk_matrix = np.linalg.pinv(A)   # 최소제곱 forward kinematics (3,2M)
+
+    # commands (N,3) 또는 (3,) -> 모듈 속도 벡터 (N,M,2)
+    def module_velocities(self, commands):
+        commands = np.asarray(commands, dtype=float).reshape(-1, 3)
+        return (commands @ self.ik_matrix.T).reshape(-1, self.n_modules, 2)
+
+    # commands (N,3) -> angles, speeds (N,M)
+    # desaturate: 가장 빠른 모듈이 max_speed를 넘으면 그 명령의 모든 모듈 속도를 같은 비율로 줄임
+    def inverse(self, commands, desaturate=True):
+        v = self.module_velocities(commands)
+        speeds = np.hypot(v[..., 0], v[..., 1])
+        angles = np.arctan2(v[..., 1], v[..., 0])
+        if desaturate and self.max_speed is not None:
+            vmax = speeds.max(axis=1, keepdims=True)
+            speeds = np.where(vmax > self.max_speed, speeds / np.maximum(vmax, 1e-12) * self.max_speed, speeds)
+        return angles, speeds
+
+    # 모듈 angles, speeds (N,M) -> body twist (N,3) (vx, vy, omega), 최소제곱 해
+    def forward(self, angles, speeds):
+        angles = np.asarray(angles, dtype=float).reshape(-1, self.n_modules)
+        speeds = np.asarray(speeds, dtype=float).reshape(-1, self.n_modules)
+        v = np.empty(angles.shape + (2,))
+        v[..., 0] = speeds * np.cos(angles)
+        v[..., 1] = speeds * np.sin(angles)
+        return v.reshape(len(v), -1) @ self.fk_matrix.T
+
+
+# body frame 속도 (N,3) 시퀀스를 오일러 적분 (스텝마다 pose += R(theta) v * scale * dt 를 반복한 것과 같음)
+# 반환: 각 스텝 적분 후 pose (N,3)
+def integrate_body_twist(twists, dt, pose0=(0.0, 0.0, 0.0), scale=1.0):
+    twists = np.asarray(twists, dtype=float).reshape(-1, 3)
+    x0, y0, theta0 = pose0
+    vx, vy, omega = twists.T
+    theta = np.cumsum(np.concatenate(([theta0], omega * dt)))
+    c, s = np.cos(theta[:-1]), np.sin(theta[:-1])
+    poses = np.empty((len(twists), 3))
+    poses[:, 0] = np.cumsum(np.concatenate(([x0], (vx * c - vy * s) * scale * dt)))[1:]
+    poses[:, 1] = np.cumsum(np.concatenate(([y0], (vx * s + vy * c) * scale * dt)))[1:]
+    poses[:, 2] = theta[1:]
+    return poses
+
+
+# 바퀴 구성 행렬 H (M,3)로 표현되는 holonomic 로봇 (메카넘, 옴니): wheel speeds = H @ (vx, vy, omega)
+# forward kinematics는 H의 pseudo-inverse (최소제곱 해)
+class HolonomicKinematics:
+    def __init__(self, wheel_matrix):
+        self.wheel_matrix = np.asarray(wheel_matrix, dtype=float).reshape(-1, 3)
+        self.n_wheels = len(self.wheel_matrix)
+        self.fk_matrix = np.linalg.pinv(self.wheel_matrix)
+
+    # 메카넘 4륜 (fl, fr, rl, rr), k = 반길이 + 반폭
+    @classmethod
+    def mecanum(cls, half_length, half_width):
+        k = half_length + half_width
+        return cls([[1.0, -1.0, -k],
+                    [1.0, 1.0, k],
+                    [1.0, 1.0, -k],
+                    [1.0, -1.0, k]])
+
+    # N륜 옴니: 바퀴 i의 구동 방향 angles[i], 중심에서 반경 radius
+    @classmethod
+    def omni(cls, angles, radius):
+        angles = np.asarray(angles, dtype=float)
+        return cls(np.column_stack((np.cos(angles), np.sin(angles), np.full(len(angles), float(radius)))))
+
+    @classmethod
+    def omni3(cls, radius):
+        return cls.omni([0.0, 2 * np.pi / 3, 4 * np.pi / 3], radius)
+
+    # body twist (N,3) -> wheel speeds (N,M)
+    def inverse(self, twists):
+        return np.asarray(twists, dtype=float).reshape(-1, 3) @ self.wheel_matrix.T
+
+    # wheel speeds (N,M) -> body twist (N,3)
+    def forward(self, wheel_speeds):
+        return np.asarray(wheel_speeds, dtype=float).reshape(-1, self.n_wheels) @ self.fk_matrix.T
@@ -0,0 +1,32 @@
+import sys
+import types
+import importlib
+
+
+# 처음 속성에 접근할 때 실제로 import되는 모듈 대리 객체
+# pygame/matplotlib 같은 front-end 의존성을 창을 띄울 때까지 미룸 (설치되어 있지 않으면 그때 ImportError)
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+            # 이후 속성 접근은 __getattr__을 거치지 않도록 실제 모듈의 속성을 복사
+            self.__dict__.update({k: v for k, v in vars(self._module).items() if k not in ("__name__", "__spec__")})
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+# 이미 import된 모듈은 그대로, 아니면 LazyModule
+def lazy_import(name):
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
@@ -0,0 +1,107 @@
+import math
+import time
+
+import numpy as np
+
+
+# 고정 간격 물리 스텝을 렌더링 주기와 분리하는 accumulator
+# 매 프레임 advance(경과 시간)이 이번 프레임에 진행할 물리 스텝 수를 돌려줌
+#   time_scale > 1이면 실시간보다 빠르게 (프레임당 여러 스텝), 남은 시간은 다음 프레임으로 이월
+#   alpha: 마지막 두 물리 상태 사이의 보간 비율 (0~1, 렌더링용)
+# 한 프레임이 max_frame_time보다 길면 (창 드래그, 디버거 정지 등) 그만큼만 따라잡음
+class FixedTimestep:
+    def __init__(self, dt, time_scale=1.0, max_frame_time=0.25):
+        self.dt = float(dt)
+        self.time_scale = float(time_scale)
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.steps = 0      # 지금까지 진행한 물리 스텝 수
+        self.dropped = 0.0  # max_frame_time 때문에 버린 시간 [s]
+
+    @property
+    def time(self):
+        return self.steps * self.dt
+
+    def advance(self, frame_time):
+        if self.max_frame_time is not None and frame_time > self.max_frame_time:
+            self.dropped += frame_time - self.max_frame_time
+            frame_time = self.max_frame_time
+        self.accumulator += frame_time * self.time_scale
+        n = int(self.accumulator / self.dt)
+        self.accumulator -= n * self.dt
+        self.steps += n
+        return n
+
+    @property
+    def alpha(self):
+        return min(max(self.accumulator / self.dt, 0.0), 1.0)
+
+
+# 두 pose (x, y, theta) 사이 보간 (각도는 짧은 쪽으로)
+def interpolate_pose(prev, cur, alpha):
+    dtheta = (cur[2] - prev[2] + math.pi) % (2 * math.pi) - math.pi
+    return (prev[0] + (cur[0] - prev[0]) * alpha,
+            prev[1] + (cur[1] - prev[1]) * alpha,
+            prev[2] + dtheta * alpha)
+
+
+# 제어기/센서 같은 단계를 plant 적분 rate(base_rate)와 다른 rate로 실행
+# 매 plant 스텝마다 due(name)으로 이번 스텝에 그 단계를 실행할지 확인하고, 실행하지 않는 스텝에서는
+# 마지막 출력을 그대로 사용 (zero-order hold).  rate=None이면 매 스텝 실행
+class MultiRateScheduler:
+    def __init__(self, base_rate, rates=None):
+        self.base_rate = float(base_rate)
+        self.rates = {}
+        self.counts = {}
+        self.ticks = 0
+        self._t0 = time.perf_counter()
+        for name, rate in (rates or {}).items():
+            self.add(name, rate)
+
+    def add(self, name, rate=None):
+        if rate is not None and not 0 < rate <= self.base_rate:
+            raise ValueError(f"{name}: rate {rate} Hz must be in (0, {self.base_rate:g}] (plant rate)")
+        self.rates[name] = None if rate is None else float(rate)
+        self.counts[name] = 0
+
+    # 현재 스텝에서 실행할 차례인지 (rate/base_rate 비율의 정수부가 바뀌는 스텝에서 실행)
+    def due(self, name):
+        rate = self.rates[name]
+        k = self.ticks
+        if rate is None or k == 0 or int(k * rate / self.base_rate) != int((k - 1) * rate / self.base_rate):
+            self.counts[name] += 1
+            return True
+        return False
+
+    def tick(self):
+        self.ticks += 1
+
+    # 현재 tick부터 steps 스텝 동안 name 단계가 실행될 스텝 (bool 배열, due를 매 스텝 부른 것과 같음)
+    # 상태(ticks, counts)는 바꾸지 않음: 루프 전체를 한 번에 도는 kernel에 미리 넘길 때 사용
+    def schedule(self, name, steps):
+        rate = self.rates[name]
+        if rate is None:
+            return np.ones(steps, dtype=bool)
+        k = self.ticks + np.arange(steps)
+        due = (k * rate / self.base_rate).astype(np.int64) != ((k - 1) * rate / self.base_rate).astype(np.int64)
+        return due | (k == 0)
+
+    @property
+    def time(self):
+        return self.ticks / self.base_rate
+
+    # 시뮬레이션 시간 기준 단계별 실제 rate [Hz] (plant 포함)
+    def achieved_rates(self):
+        t = self.time
+        rates = {"plant": self.ticks / t if t > 0 else 0.0}
+        rates.update({name: count / t if t > 0 else 0.0 for name, count in self.counts.items()})
+        return rates
+
+    def report(self):
+        wall = time.perf_counter() - self._t0
+        print(f"{'stage':<10}{'target Hz':>11}{'sim Hz':>10}{'wall Hz':>10}{'calls':>9}")
+        targets = {"plant": self.base_rate, **self.rates}
+        counts = {"plant": self.ticks, **self.counts}
+        for name, rate in self.achieved_rates().items():
+            target = targets[name] if targets[name] is not None else self.base_rate
+            print(f"{name:<10}{target:11.2f}{rate:10.2f}{counts[name] / wall:10.1f}{counts[name]:9d}")
@@ -0,0 +1,56 @@
+import numpy as np
+
+from .geometry import project_points
+from .path import as_path
+
+
+# 궤적 (T,2)을 경로 위로 투영해서 호장 진행량을 계산
+# closed 경로는 한 바퀴를 넘어가도 이어지도록 unwrap
+def path_progress(trajectory, path, seg=None, t=None):
+    path = as_path(path)
+    if seg is None:
+        seg, t, _ = project_points(trajectory, path)
+    seg_length = path.seg_length
+    if path.closed:
+        seg_length = np.append(seg_length, np.hypot(*(path.points[0] - path.points[-1])))
+    arc = np.concatenate(([0.0], np.cumsum(seg_length)))
+    s = arc[seg] + t * seg_length[seg]
+    if path.closed and len(s) > 1:
+        total = arc[-1]
+        ds = np.diff(s)
+        ds = (ds + 0.5 * total) % total - 0.5 * total
+        s = s[0] + np.concatenate(([0.0], np.cumsum(ds)))
+    return s
+
+
+# 경로 추종 성능 지표 (완주한 경우 완주 시점까지의 구간으로 계산)
+# rms_cte / max_deviation: 경로(세그먼트)까지 거리의 RMS / 최대값
+# completion_time: 열린 경로는 끝점 근처 도달, closed 경로는 한 바퀴 진행한 시점 (도달 못하면 NaN)
+# steer_rms / steer_rate: 조향각 RMS, 단위 시간당 조향각 변화량 평균 (steering effort)
+def tracking_metrics(trajectory, path, steer=None, dt=1.0, goal_tol=None):
+    path = as_path(path)
+    trajectory = np.asarray(trajectory, dtype=float).reshape(-1, 2)
+    seg, t, dist = project_points(trajectory, path)
+    s = path_progress(trajectory, path, seg, t)
+    if path.closed:
+        # 한 바퀴 = 닫는 세그먼트 (마지막 점 -> 첫 점)까지 포함한 둘레 (path_progress와 같은 기준)
+        lap = path.length + float(np.hypot(*(path.points[0] - path.points[-1])))
+        done = np.flatnonzero(s - s[0] >= lap)
+    else:
+        if goal_tol is None:
+            goal_tol = 2.0 * float(np.median(path.seg_length)) if len(path.seg_length) else 0.0
+        goal = np.hypot(*(trajectory - path.points[-1]).T)
+        done = np.flatnonzero(goal <= goal_tol)
+    end = int(done[0]) + 1 if len(done) else len(trajectory)
+    dist, s = dist[:end], s[:end]
+    metrics = {
+        "rms_cte": float(np.sqrt(np.mean(dist * dist))) if end else np.nan,
+        "max_deviation": float(dist.max()) if end else np.nan,
+        "completion_time": float(end * dt) if len(done) else np.nan,
+        "progress": float(s[-1] - s[0]) if end else 0.0,
+    }
+    if steer is not None:
+        steer = np.asarray(steer, dtype=float)[:end]
+        metrics["steer_rms"] = float(np.sqrt(np.mean(steer * steer))) if len(steer) else np.nan
+        metrics["steer_rate"] = float(np.mean(np.abs(np.diff(steer))) / dt) if len(steer) > 1 else 0.0
+    return metrics
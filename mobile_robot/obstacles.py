@@ -0,0 +1,135 @@
+import math
+
+import numpy as np
+
+
+# 원 장애물의 signed distance (안쪽은 음수)
+def _circle_sdf(px, py, obstacle):
+    (cx, cy), radius = obstacle["center"], obstacle["radius"]
+    return np.hypot(px - cx, py - cy) - radius
+
+
+# 다각형 장애물의 signed distance: 변까지 최소 거리, even-odd 규칙으로 안쪽이면 음수
+def _polygon_sdf(px, py, obstacle):
+    v = obstacle["vertices"]
+    d2 = np.full(px.shape, np.inf)
+    inside = np.zeros(px.shape, dtype=bool)
+    for (x0, y0), (x1, y1) in zip(v, np.roll(v, -1, axis=0)):
+        ex, ey = x1 - x0, y1 - y0
+        l2 = ex * ex + ey * ey
+        fx, fy = px - x0, py - y0
+        t = np.clip((fx * ex + fy * ey) / l2, 0.0, 1.0) if l2 > 0 else 0.0
+        dx, dy = fx - t * ex, fy - t * ey
+        np.minimum(d2, dx * dx + dy * dy, out=d2)
+        cross = (y0 > py) != (y1 > py)
+        if ey != 0:
+            x_at = x0 + (py - y0) * ex / ey
+            inside ^= cross & (px < x_at)
+    d = np.sqrt(d2)
+    return np.where(inside, -d, d)
+
+
+_SDF = {"circle": _circle_sdf, "polygon": _polygon_sdf}
+
+
+# 원/다각형 장애물을 격자 위의 signed distance field로 한 번 래스터화하고
+# 거리 질의는 bilinear 보간으로 O(1) (장애물 개수와 무관)
+# max_dist보다 먼 거리는 max_dist로 잘라서 저장하므로 장애물 추가/삭제 시 주변 영역만 다시 계산
+class ObstacleMap:
+    def __init__(self, size, resolution=2.0, origin=(0.0, 0.0), max_dist=100.0):
+        self.resolution = float(resolution)
+        self.origin = np.asarray(origin, dtype=float)
+        self._ox, self._oy = float(self.origin[0]), float(self.origin[1])
+        self.max_dist = float(max_dist)
+        self.nx = int(math.ceil(size[0] / self.resolution)) + 1
+        self.ny = int(math.ceil(size[1] / self.resolution)) + 1
+        self.field = np.full((self.ny, self.nx), self.max_dist)
+        self.obstacles = {}
+        self._next_id = 0
+
+    @classmethod
+    def from_circles(cls, centers, radius, size, **kwargs):
+        obstacle_map = cls(size, **kwargs)
+        radii = np.broadcast_to(np.asarray(radius, dtype=float), (len(centers),))
+        for center, r in zip(centers, radii):
+            obstacle_map.add_circle(center, r)
+        return obstacle_map
+
+    # 장애물 bbox를 max_dist만큼 넓힌 영역의 격자 인덱스 범위
+    def _region(self, lo, hi):
+        pad = self.max_dist
+        i0 = max(int(math.floor((lo[0] - pad - self._ox) / self.resolution)), 0)
+        j0 = max(int(math.floor((lo[1] - pad - self._oy) / self.resolution)), 0)
+        i1 = min(int(math.ceil((hi[0] + pad - self._ox) / self.resolution)) + 1, self.nx)
+        j1 = min(int(math.ceil((hi[1] + pad - self._oy) / self.resolution)) + 1, self.ny)
+        return i0, i1, j0, j1
+
+    def _apply(self, obstacle, region):
+        i0, i1, j0, j1 = region
+        if i0 >= i1 or j0 >= j1:
+            return
+        px = self._ox + np.arange(i0, i1) * self.resolution
+        py = self._oy + np.arange(j0, j1) * self.resolution
+        px, py = np.meshgrid(px, py)
+        sdf = _SDF[obstacle["kind"]](px, py, obstacle)
+        block = self.field[j0:j1, i0:i1]
+        np.minimum(block, sdf, out=block)
+
+    def _add(self, obstacle, lo, hi):
+        obstacle["lo"], obstacle["hi"] = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+        obstacle_id = self._next_id
+        self._next_id += 1
+        self.obstacles[obstacle_id] = obstacle
+        self._apply(obstacle, self._region(obstacle["lo"], obstacle["hi"]))
+        return obstacle_id
+
+    def add_circle(self, center, radius):
+        center = (float(center[0]), float(center[1]))
+        radius = float(radius)
+        obstacle = {"kind": "circle", "center": center, "radius": radius}
+        return self._add(obstacle, (center[0] - radius, center[1] - radius),
+                         (center[0] + radius, center[1] + radius))
+
+    def add_polygon(self, vertices):
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        obstacle = {"kind": "polygon", "vertices": vertices}
+        return self._add(obstacle, vertices.min(axis=0), vertices.max(axis=0))
+
+    # 삭제한 장애물의 영향 영역만 초기화하고, 그 영역에 걸친 나머지 장애물을 다시 래스터화
+    def remove(self, obstacle_id):
+        obstacle = self.obstacles.pop(obstacle_id)
+        i0, i1, j0, j1 = self._region(obstacle["lo"], obstacle["hi"])
+        self.field[j0:j1, i0:i1] = self.max_dist
+        for other in self.obstacles.values():
+            a0, a1, b0, b1 = self._region(other["lo"], other["hi"])
+            region = (max(a0, i0), min(a1, i1), max(b0, j0), min(b1, j1))
+            self._apply(other, region)
+
+    def clear(self):
+        self.obstacles.clear()
+        self.field.fill(self.max_dist)
+
+    # 한 점의 장애물까지 거리 (bilinear 보간, 격자 밖은 경계값)
+    def distance_at(self, x, y):
+        gx = min(max((x - self._ox) / self.resolution, 0.0), self.nx - 1.0)
+        gy = min(max((y - self._oy) / self.resolution, 0.0), self.ny - 1.0)
+        i = min(int(gx), self.nx - 2)
+        j = min(int(gy), self.ny - 2)
+        tx, ty = gx - i, gy - j
+        f = self.field
+        top = f[j, i] + (f[j, i + 1] - f[j, i]) * tx
+        bottom = f[j + 1, i] + (f[j + 1, i + 1] - f[j + 1, i]) * tx
+        return float(top + (bottom - top) * ty)
+
+    # 여러 점 (M,2)에 대한 batch 질의 -> (M,)
+    def distance(self, points):
+        p = np.asarray(points, dtype=float).reshape(-1, 2)
+        gx = np.clip((p[:, 0] - self._ox) / self.resolution, 0.0, self.nx - 1.0)
+        gy = np.clip((p[:, 1] - self._oy) / self.resolution, 0.0, self.ny - 1.0)
+        i = np.minimum(gx.astype(np.int64), self.nx - 2)
+        j = np.minimum(gy.astype(np.int64), self.ny - 2)
+        tx, ty = gx - i, gy - j
+        f = self.field
+        top = f[j, i] + (f[j, i + 1] - f[j, i]) * tx
+        bottom = f[j + 1, i] + (f[j + 1, i + 1] - f[j + 1, i]) * tx
+        return top + (bottom - top) * ty
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+# 경로가 닫힌 루프인지 판단 (시작점과 끝점이 waypoint 간격 정도로 가까우면 closed)
+def is_closed(points):
+    if len(points) < 3:
+        return False
+    seg = np.hypot(*np.diff(points, axis=0).T)
+    gap = np.hypot(*(points[-1] - points[0]))
+    return gap <= 2.0 * max(np.median(seg), 1e-9)
+
+
+# 경로 점을 한 번만 배열로 바꾸고 세그먼트 기하량을 미리 계산해 두는 경로 객체
+# points (N,2), seg_delta/seg_length/seg_heading (N-1,): 세그먼트 i = points[i] -> points[i+1]
+# arc_length (N,): 누적 호장,  heading/curvature (N,): waypoint 별 방향각과 곡률
+class Path:
+    def __init__(self, points, closed=None, heading=None):
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+        self.closed = is_closed(self.points) if closed is None else bool(closed)
+        self.xs = self.points[:, 0]
+        self.ys = self.points[:, 1]
+
+        self.seg_delta = np.ascontiguousarray(np.diff(self.points, axis=0))
+        self.seg_length = np.hypot(self.seg_delta[:, 0], self.seg_delta[:, 1])
+        self.seg_heading = np.arctan2(self.seg_delta[:, 1], self.seg_delta[:, 0])
+        self.arc_length = np.concatenate(([0.0], np.cumsum(self.seg_length)))
+        self.length = float(self.arc_length[-1])
+
+        # 미분은 호장 기준 (closed 경로는 양 끝을 이어서 계산)
+        if self.closed and len(self.points) > 3:
+            # 2차 미분까지 중심차분이 되도록 양쪽에 2개씩 덧붙임 (끝점이 시작점과 겹치는 경우 포함)
+            dup = np.hypot(*(self.points[-1] - self.points[0])) < 1e-9
+            tail = self.points[-3:-1] if dup else self.points[-2:]
+            head = self.points[1:3] if dup else self.points[:2]
+            pad = np.concatenate((tail, self.points, head))
+            s = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(pad, axis=0).T))))
+            s -= s[2]
+            core = slice(2, -2)
+        else:
+            pad = self.points
+            s = self.arc_length
+            core = slice(None)
+        # 길이 0인 세그먼트(중복점)가 있어도 미분이 정의되도록 호장을 단조 증가로 보정
+        s = s + np.arange(len(s)) * 1e-12
+        if len(pad) > 1:
+            dx = np.gradient(pad[:, 0], s)
+            dy = np.gradient(pad[:, 1], s)
+            ddx = np.gradient(dx, s)
+            ddy = np.gradient(dy, s)
+        else:
+            dx = dy = ddx = ddy = np.zeros(len(pad))
+        dx, dy, ddx, ddy = dx[core], dy[core], ddx[core], ddy[core]
+        if heading is None:
+            self.heading = np.arctan2(dy, dx)
+        else:
+            self.heading = np.ascontiguousarray(heading, dtype=np.float64)
+        denom = np.power(dx * dx + dy * dy, 1.5)
+        self.curvature = np.where(denom > 1e-12, (dx * ddy - dy * ddx) / np.where(denom > 1e-12, denom, 1.0), 0.0)
+
+    @classmethod
+    def from_ref(cls, ref_xs, ref_ys, ref_yaws=None, closed=None):
+        return cls(np.column_stack((ref_xs, ref_ys)), closed=closed, heading=ref_yaws)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, i):
+        return self.points[i]
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.points if dtype is None else self.points.astype(dtype)
+
+
+def as_path(path):
+    return path if isinstance(path, Path) else Path(path)
@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+import inspect
+
+import numpy as np
+
+# 튜토리얼 스크립트들이 쓰는 경로 생성기 (모두 (N,2) float64 배열, 무작위 경로는 seed로 재현)
+# load_path(name, **params)는 생성 결과를 파라미터별로 디스크에 .npy로 저장해 두고 재사용
+# HOME을 알 수 없으면 (expanduser가 "~"를 그대로 반환) 캐시 사용 안 함
+_HOME = os.path.expanduser("~")
+CACHE_DIR = os.environ.get("MOBILE_ROBOT_PATH_CACHE",
+                           None if _HOME == "~" else os.path.join(_HOME, ".cache", "mobile_robot", "paths"))
+VERSION = 1   # 생성기 결과가 바뀌면 올려서 이전 캐시를 무효화
+
+
+# 직사각형 테두리 (x0,y0)에서 시계 방향 (화면 좌표), 간격 step
+def rectangle(x0=100, y0=100, x1=900, y1=500, step=1):
+    top = np.arange(x0, x1, step, dtype=float)
+    right = np.arange(y0, y1, step, dtype=float)
+    bottom = np.arange(x1, x0, -step, dtype=float)
+    left = np.arange(y1, y0, -step, dtype=float)
+    xs = np.concatenate((top, np.full_like(right, x1), bottom, np.full_like(left, x0)))
+    ys = np.concatenate((np.full_like(top, y0), right, np.full_like(bottom, y1), left))
+    return np.column_stack((xs, ys))
+
+
+# 8자 (Gerono lemniscate)
+def figure_eight(cx=500, cy=350, ax=300, ay=150, n=800):
+    t = np.linspace(0, 2 * np.pi, n)
+    return np.column_stack((cx + ax * np.sin(t), cy + ay * np.sin(t) * np.cos(t)))
+
+
+# x 방향으로 step씩 가면서 y를 [-dy, dy] 정수만큼 무작위로 바꾸는 zigzag ([y_min, y_max]로 제한)
+def zigzag(seed=0, x0=100, y0=350, x_max=900, step=20, dy=50, y_min=100, y_max=600):
+    k = int(np.ceil((x_max - x0) / step))
+    xs = x0 + step * np.arange(1, k + 1, dtype=float)
+    jumps = np.random.default_rng(seed).integers(-dy, dy + 1, k).astype(float)
+    # 매 스텝 clip하는 random walk: 경계에서 잘린 양이 이후 모든 점에 영향을 주므로 (누적합 뒤 clip과 다름)
+    # 앞 점부터 차례로 계산 (점 수는 (x_max - x0) / step 정도라 Python 루프로 충분)
+    ys = np.empty(k)
+    y = float(y0)
+    for i, d in enumerate(jumps.tolist()):
+        y = min(y_max, max(y_min, y + d))
+        ys[i] = y
+    return np.column_stack((xs, ys))
+
+
+# y = offset + amplitude * sin(2 pi (x - x0) / wavelength),  x in [x0, x1]
+def sine(x0=0.0, x1=500.0, n=500, offset=0.0, amplitude=1.0, wavelength=2 * np.pi):
+    xs = np.linspace(x0, x1, n)
+    return np.column_stack((xs, offset + amplitude * np.sin((xs - x0) / wavelength * 2 * np.pi)))
+
+
+def line(x0=0.0, x1=500.0, n=500, y=0.0):
+    xs = np.linspace(x0, x1, n)
+    return np.column_stack((xs, np.full_like(xs, y)))
+
+
+# 반시계 방향 원 (endpoint=True면 마지막 점이 시작점과 겹침)
+def circle(cx=0.0, cy=0.0, radius=1.0, n=500, endpoint=True):
+    t = np.linspace(0, 2 * np.pi, n, endpoint=endpoint)
+    return np.column_stack((cx + radius * np.cos(t), cy + radius * np.sin(t)))
+
+
+GENERATORS = {
+    "rectangle": rectangle,
+    "figure_eight": figure_eight,
+    "zigzag": zigzag,
+    "sine": sine,
+    "line": line,
+    "circle": circle,
+}
+
+
+# 생성기 이름 + 기본값까지 채운 파라미터로 캐시 key (정수/실수 표기 차이는 같은 key)
+def path_key(name, **params):
+    bound = inspect.signature(GENERATORS[name]).bind(**params)
+    bound.apply_defaults()
+    norm = {k: float(v) if isinstance(v, (int, float, np.number)) and not isinstance(v, bool) else v
+            for k, v in bound.arguments.items()}
+    text = json.dumps({"name": name, "version": VERSION, "params": norm}, sort_keys=True)
+    return f"{name}-{hashlib.sha1(text.encode()).hexdigest()[:16]}"
+
+
+# 캐시된 경로를 읽고, 없으면 생성해서 저장 (cache_dir=None: 캐시 사용 안 함, 쓰기 실패는 무시)
+# 여러 프로세스가 동시에 만들어도 임시 파일 + rename으로 완성된 파일만 보임
+def load_path(name, cache_dir=CACHE_DIR, **params):
+    if name not in GENERATORS:
+        raise ValueError(f"unknown path generator {name!r} (one of {', '.join(GENERATORS)})")
+    if cache_dir is None:
+        return GENERATORS[name](**params)
+    filename = os.path.join(cache_dir, path_key(name, **params) + ".npy")
+    try:
+        return np.load(filename)
+    except (OSError, ValueError, EOFError):
+        pass
+    points = np.ascontiguousarray(GENERATORS[name](**params), dtype=np.float64)
+    # 캐시에 쓸 수 없어도 (읽기 전용 HOME, CI 컨테이너 등) 만든 경로는 그대로 반환
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp, "wb") as f:
+            np.save(f, points)
+        os.replace(tmp, filename)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return points
@@ -0,0 +1,102 @@
+import csv
+import json
+import time
+from bisect import bisect_right
+
+import numpy as np
+
+# 메인 루프의 기본 단계 (wait: clock.tick에서 FPS를 맞추려고 쉬는 시간)
+PHASES = ("events", "control", "update", "background", "trajectory", "overlay", "flip", "wait")
+
+
+# 프레임마다 단계별 시간을 재는 profiler
+# mark(phase)는 직전 mark 이후 경과 시간을 그 단계에 더함 (같은 단계를 여러 번 mark해도 됨)
+# 최근 window 프레임은 ring buffer에 보관해서 rolling percentile 계산,
+# 전체 프레임은 log 간격 histogram에 누적 (10us ~ 10s, 10 bins/decade)
+class FrameProfiler:
+    def __init__(self, phases=PHASES, window=600, enabled=True, bins_per_decade=10):
+        self.phases = tuple(phases)
+        self.enabled = enabled
+        self.window = window
+        self._index = {name: i for i, name in enumerate(self.phases)}
+        n = len(self.phases) + 1   # 마지막 열은 프레임 전체 시간
+        self.recent = np.zeros((window, n))
+        self.edges = np.logspace(-5, 1, 6 * bins_per_decade + 1)
+        self._edges = self.edges.tolist()
+        self.counts = np.zeros((n, len(self.edges) + 1), dtype=np.int64)
+        self.frames = 0
+        self._row = [0.0] * n
+        self._t_frame = None
+        self._t_prev = None
+
+    def start_frame(self):
+        if not self.enabled:
+            return
+        self._t_frame = self._t_prev = time.perf_counter()
+
+    def mark(self, phase):
+        if not self.enabled or self._t_prev is None:
+            return
+        now = time.perf_counter()
+        self._row[self._index[phase]] += now - self._t_prev
+        self._t_prev = now
+
+    def end_frame(self):
+        if not self.enabled or self._t_frame is None:
+            return
+        row = self._row
+        row[-1] = time.perf_counter() - self._t_frame
+        self.recent[self.frames % self.window] = row
+        edges, counts = self._edges, self.counts
+        for i, value in enumerate(row):
+            counts[i, bisect_right(edges, value)] += 1
+        self.frames += 1
+        self._row = [0.0] * len(row)
+        self._t_frame = self._t_prev = None
+
+    def columns(self):
+        return self.phases + ("frame",)
+
+    # 최근 window 프레임의 percentile [s]: {단계: [q별 값]}
+    def percentiles(self, q=(50, 95, 99)):
+        n = min(self.frames, self.window)
+        if n == 0:
+            return {name: [0.0] * len(q) for name in self.columns()}
+        values = np.percentile(self.recent[:n], q, axis=0)
+        return {name: values[:, i].tolist() for i, name in enumerate(self.columns())}
+
+    # histogram 저장: .csv는 (단계, bin 하한, bin 상한, count) 행, .json은 percentile 요약 포함
+    def dump(self, filename):
+        lower = np.concatenate(([0.0], self.edges))
+        upper = np.concatenate((self.edges, [np.inf]))
+        if filename.endswith(".csv"):
+            with open(filename, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["phase", "lower_s", "upper_s", "count"])
+                for i, name in enumerate(self.columns()):
+                    for k in np.flatnonzero(self.counts[i]):
+                        writer.writerow([name, lower[k], upper[k], int(self.counts[i, k])])
+        else:
+            data = {
+                "frames": self.frames,
+                "bin_edges_s": self.edges.tolist(),
+                "percentiles_s": {"q": [50, 95, 99], **self.percentiles((50, 95, 99))},
+                "counts": {name: self.counts[i].tolist() for i, name in enumerate(self.columns())},
+            }
+            with open(filename, "w") as f:
+                json.dump(data, f, indent=1)
+
+    def summary(self, q=(50, 95, 99)):
+        lines = [f"{'phase':<11}" + "".join(f"{'p%d' % v:>9}" for v in q) + "  [ms]"]
+        for name, values in self.percentiles(q).items():
+            lines.append(f"{name:<11}" + "".join(f"{v * 1e3:9.3f}" for v in values))
+        return "\n".join(lines)
+
+    # 종료 시 요약 출력 + histogram 저장 (filename이 None이면 출력만)
+    def report(self, filename=None):
+        if not self.enabled or self.frames == 0:
+            return
+        print(f"{self.frames} frames")
+        print(self.summary())
+        if filename:
+            self.dump(filename)
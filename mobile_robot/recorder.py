@@ -0,0 +1,201 @@
+import json
+import mmap
+import struct
+
+import numpy as np
+
+# 파일 구조
+#   [magic 8B][count uint64][header 길이 uint32][reserved 4B][header JSON][padding -> 64B 정렬]
+#   [static 배열들 (경로 등, 64B 정렬)][records: structured dtype 배열, chunk 단위로 늘어남]
+# header JSON: fields (이름, dtype, shape), chunk, meta, static 배열 위치, records 위치
+# (위치는 header 끝(=64B 정렬된 base) 기준 상대 offset이라 header 길이와 무관)
+MAGIC = b"MRTRAJ01"
+_PREFIX = struct.Struct("<8sQI4x")
+ALIGN = 64
+SYNC_ROWS = 1024   # TrajectoryRecorder 기본 header count 갱신 간격 (행)
+
+# 경로 추종 스크립트들이 공통으로 기록하는 스텝별 상태
+PURSUIT_FIELDS = [("x", "f8"), ("y", "f8"), ("yaw", "f8"), ("steer", "f8"), ("speed", "f8"),
+                  ("target_x", "f8"), ("target_y", "f8"), ("cte", "f8")]
+
+
+def _align(n, a=ALIGN):
+    return (n + a - 1) // a * a
+
+
+def _dtype_from_fields(fields):
+    return np.dtype([(f[0], f[1]) if len(f) == 2 else (f[0], f[1], tuple(np.atleast_1d(f[2])))
+                     for f in fields])
+
+
+def _fields_from_dtype(dtype):
+    out = []
+    for name in dtype.names:
+        sub = dtype.fields[name][0]
+        if sub.subdtype is not None:
+            base, shape = sub.subdtype
+            out.append([name, base.str, list(shape)])
+        else:
+            out.append([name, sub.str, []])
+    return out
+
+
+# 스텝별 상태를 memory-mapped 파일에 순서대로 기록 (RAM 사용량은 chunk 크기와 무관하게 일정)
+# fields: [("x", "f8"), ("yaw", "f8"), ("wheel_angle", "f8", 4), ...]
+# static: 한 번만 저장할 배열 (예: 기준 경로),  meta: JSON으로 저장할 부가 정보
+# sync_rows: 이 행 수마다 header의 count를 갱신 (close 전에 프로세스가 죽어도 그때까지의 기록은 읽을 수 있음)
+class TrajectoryRecorder:
+    def __init__(self, filename, fields, chunk=65536, meta=None, static=None, sync_rows=SYNC_ROWS):
+        self.filename = filename
+        self.dtype = _dtype_from_fields(fields)
+        self.chunk = int(chunk)
+        self.sync_rows = max(1, int(sync_rows))
+        static = {name: np.ascontiguousarray(a) for name, a in (static or {}).items()}
+
+        static_info = {}
+        offset = 0
+        for name, a in static.items():
+            static_info[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+            offset = _align(offset + a.nbytes)
+        self.header = {
+            "fields": _fields_from_dtype(self.dtype),
+            "itemsize": self.dtype.itemsize,
+            "chunk": self.chunk,
+            "meta": meta or {},
+            "static": static_info,
+            "records_offset": offset,
+        }
+        text = json.dumps(self.header).encode()
+        self.base = _align(_PREFIX.size + len(text))
+        self.data_offset = self.base + offset
+
+        with open(filename, "wb") as f:
+            f.write(_PREFIX.pack(MAGIC, 0, len(text)))
+            f.write(text)
+            for name, a in static.items():
+                f.seek(self.base + static_info[name]["offset"])
+                f.write(a.tobytes())
+            f.truncate(self.data_offset + self.chunk * self.dtype.itemsize)
+        self.capacity = self.chunk
+        self.count = 0
+        self._synced = 0
+        self._map()
+
+    # records 영역을 직접 연 mmap 위에 배열로 올림 (mmap offset은 allocation granularity 단위)
+    def _map(self):
+        start = self.data_offset - self.data_offset % mmap.ALLOCATIONGRANULARITY
+        with open(self.filename, "r+b") as f:
+            self._mm = mmap.mmap(f.fileno(), self.data_offset - start + self.capacity * self.dtype.itemsize,
+                                 offset=start)
+        self.data = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self._mm,
+                               offset=self.data_offset - start)
+
+    # 배열 참조를 먼저 놓아야 mmap을 닫을 수 있음
+    def _unmap(self):
+        self.data = None
+        self._mm.close()
+        self._mm = None
+
+    # 파일을 chunk만큼 늘리고 다시 map
+    def _grow(self):
+        self.flush()
+        self._unmap()
+        self.capacity += self.chunk
+        with open(self.filename, "r+b") as f:
+            f.truncate(self.data_offset + self.capacity * self.dtype.itemsize)
+        self._map()
+
+    # 필드 순서대로 값 하나씩 (subarray 필드는 배열/튜플)
+    def append(self, *values):
+        if self.count == self.capacity:
+            self._grow()
+        self.data[self.count] = values
+        self.count += 1
+        if self.count - self._synced >= self.sync_rows:
+            self._write_count()
+
+    # 여러 스텝을 한 번에: 필드 순서대로 스텝 축이 있는 배열 (k, ...) 또는 모든 스텝에 같은 값
+    def extend(self, *columns):
+        k = None
+        for name, col in zip(self.dtype.names, columns):
+            if np.ndim(col) > len(self.dtype[name].shape):
+                k = len(col)
+                break
+        if k is None:
+            self.append(*columns)
+            return
+        while self.count + k > self.capacity:
+            self._grow()
+        block = self.data[self.count:self.count + k]
+        for name, col in zip(self.dtype.names, columns):
+            block[name] = col
+        self.count += k
+        if self.count - self._synced >= self.sync_rows:
+            self._write_count()
+
+    # header의 count만 갱신 (records는 MAP_SHARED mmap이라 프로세스가 죽어도 파일에 남음)
+    def _write_count(self):
+        with open(self.filename, "r+b") as f:
+            f.seek(len(MAGIC))
+            f.write(struct.pack("<Q", self.count))
+        self._synced = self.count
+
+    def flush(self):
+        if self.data is None:
+            return
+        self._mm.flush()
+        self._write_count()
+
+    # 기록 종료: 남는 chunk 공간을 잘라내고 count 저장
+    def close(self):
+        if self.data is None:
+            return
+        self.flush()
+        self._unmap()
+        with open(self.filename, "r+b") as f:
+            f.truncate(self.data_offset + self.count * self.dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# 기록 파일 읽기 (복사 없이 memmap): rec.data (count,) structured 배열, rec["x"], rec.static["path"]
+class Recording:
+    def __init__(self, filename, mode="r"):
+        with open(filename, "rb") as f:
+            magic, count, length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{filename}: not a trajectory recording")
+            self.header = json.loads(f.read(length))
+        self.filename = filename
+        self.count = count
+        self.meta = self.header["meta"]
+        self.dtype = _dtype_from_fields(self.header["fields"])
+        base = _align(_PREFIX.size + length)
+        self.static = {
+            name: np.memmap(filename, dtype=np.dtype(info["dtype"]), mode=mode,
+                            offset=base + info["offset"], shape=tuple(info["shape"]))
+            for name, info in self.header["static"].items()
+        }
+        if count:
+            self.data = np.memmap(filename, dtype=self.dtype, mode=mode,
+                                  offset=base + self.header["records_offset"], shape=(count,))
+        else:
+            self.data = np.zeros(0, dtype=self.dtype)
+
+    @property
+    def fields(self):
+        return self.dtype.names
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+
+def load_recording(filename, mode="r"):
+    return Recording(filename, mode)
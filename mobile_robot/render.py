@@ -0,0 +1,124 @@
+
+from .lazy import lazy_import
+
+# 그리기 함수를 처음 부를 때 import (mobile_robot.render를 import만 하는 headless 코드는 pygame 불필요)
+pygame = lazy_import("pygame")
+
+# 격자 그리기
+def draw_grid(surf, color, grid_size=50):
+    width, height = surf.get_size()
+    for x in range(0, width, grid_size):
+        pygame.draw.line(surf, color, (x, 0), (x, height), 1)
+    for y in range(0, height, grid_size):
+        pygame.draw.line(surf, color, (0, y), (width, y), 1)
+
+
+# 격자/경로/장애물 같은 정적 레이어를 off-screen surface에 한 번만 그려두고 매 프레임 blit
+# view가 바뀌면 (예: 스케일, 중심 좌표) 다시 그림
+class StaticLayer:
+    def __init__(self, size, draw_fn, fill=(255, 255, 255)):
+        self.size = size
+        self.draw_fn = draw_fn
+        self.fill = fill
+        self.surface = None
+        self.view = None
+
+    def invalidate(self):
+        self.surface = None
+
+    def render(self, view=None):
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size).convert()
+        self.surface.fill(self.fill)
+        self.draw_fn(self.surface)
+        self.view = view
+
+    def draw(self, screen, view=None):
+        if self.surface is None or view != self.view:
+            self.render(view)
+        screen.blit(self.surface, (0, 0))
+
+
+# 로봇 궤적을 persistent surface에 누적해서 그림 (매 tick 새 세그먼트 하나만 그림)
+# view가 바뀌면 reset(points)으로 보관 중인 궤적을 다시 그림
+class TrailLayer:
+    COLORKEY = (255, 0, 255)
+
+    def __init__(self, size, color, width=2):
+        self.size = size
+        self.color = color
+        self.width = width
+        self.surface = None
+        self.prev = None
+
+    def _ensure(self):
+        if self.surface is None:
+            self.surface = pygame.Surface(self.size).convert()
+            self.surface.set_colorkey(self.COLORKEY)
+            self.surface.fill(self.COLORKEY)
+
+    def add(self, point):
+        self._ensure()
+        if self.prev is not None:
+            pygame.draw.line(self.surface, self.color, self.prev, point, self.width)
+        self.prev = point
+
+    # 여러 점을 한 번에 이어서 그림 (재생 viewer에서 빨리 감기 등)
+    def extend(self, points):
+        self._ensure()
+        points = [tuple(p) for p in points]
+        if self.prev is not None:
+            points.insert(0, self.prev)
+        if len(points) > 1:
+            pygame.draw.lines(self.surface, self.color, False, points, self.width)
+        if points:
+            self.prev = points[-1]
+
+    def reset(self, points=()):
+        self._ensure()
+        self.surface.fill(self.COLORKEY)
+        self.prev = None
+        points = [tuple(p) for p in points]
+        if len(points) > 1:
+            pygame.draw.lines(self.surface, self.color, False, points, self.width)
+        if points:
+            self.prev = points[-1]
+
+    def draw(self, screen):
+        self._ensure()
+        screen.blit(self.surface, (0, 0))
+
+
+# FrameProfiler의 rolling percentile을 화면 구석에 표시 (every 프레임마다 한 번만 텍스트를 다시 그림)
+class ProfilerOverlay:
+    def __init__(self, profiler, pos=(10, 10), every=30, color=(255, 255, 0), bg=(0, 0, 0, 160)):
+        self.profiler = profiler
+        self.pos = pos
+        self.every = every
+        self.color = color
+        self.bg = bg
+        self.font = None
+        self.surface = None
+        self.count = 0
+
+    def render(self):
+        if self.font is None:
+            self.font = pygame.font.SysFont("monospace", 14)
+        lines = self.profiler.summary((50, 95)).splitlines()
+        texts = [self.font.render(line, True, self.color) for line in lines]
+        w = max(t.get_width() for t in texts) + 8
+        h = sum(t.get_height() for t in texts) + 8
+        self.surface = pygame.Surface((w, h), pygame.SRCALPHA)
+        self.surface.fill(self.bg)
+        y = 4
+        for t in texts:
+            self.surface.blit(t, (4, y))
+            y += t.get_height()
+
+    def draw(self, screen):
+        if not self.profiler.enabled:
+            return
+        if self.surface is None or self.count % self.every == 0:
+            self.render()
+        self.count += 1
+        screen.blit(self.surface, self.pos)
@@ -0,0 +1,21 @@
+import numpy as np
+
+
+# pose 측정 모델: 참값에 가우시안 노이즈 (위치 표준편차, yaw 표준편차)를 더함
+# 노이즈가 0이면 참값을 그대로 돌려줌 (난수 사용 안 함)
+class PoseSensor:
+    def __init__(self, noise=(0.0, 0.0), seed=0):
+        self.pos_std, self.yaw_std = float(noise[0]), float(noise[1])
+        self.rng = np.random.default_rng(seed)
+
+    def measure(self, x, y, yaw):
+        if self.pos_std == 0.0 and self.yaw_std == 0.0:
+            return x, y, yaw
+        nx, ny, nyaw = self.rng.normal(0.0, 1.0, 3)
+        return x + nx * self.pos_std, y + ny * self.pos_std, yaw + nyaw * self.yaw_std
+
+    # measure를 n번 부를 때 더해질 노이즈 (n,3): (x, y, yaw), 같은 난수열을 한 번에 뽑음
+    def noise_samples(self, n):
+        if self.pos_std == 0.0 and self.yaw_std == 0.0:
+            return np.zeros((n, 3))
+        return self.rng.normal(0.0, 1.0, (n, 3)) * np.array([self.pos_std, self.pos_std, self.yaw_std])
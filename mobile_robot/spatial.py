@@ -0,0 +1,224 @@
+import math
+
+import numpy as np
+
+from .path import as_path
+
+# 정수 cell 좌표 범위를 CSR(정렬 + 시작 인덱스) 형태로 저장
+def _build_cells(ix0, iy0, ix1, iy1, nx, ny):
+    cnt_x = ix1 - ix0 + 1
+    counts = cnt_x * (iy1 - iy0 + 1)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = ix0[owner] + local % cnt_x[owner]
+    cy = iy0[owner] + local // cnt_x[owner]
+    cell = cy * nx + cx
+    order = np.argsort(cell, kind='stable')
+    starts = np.searchsorted(cell[order], np.arange(nx * ny + 1))
+    return owner[order], starts
+
+
+# 경로 waypoint/세그먼트에 대한 uniform grid 공간 인덱스
+# nearest / k_nearest: 최근접 waypoint,  project: 최근접 세그먼트 위로의 투영점
+class GridIndex:
+    def __init__(self, path, cell_size=None, closed=None):
+        self.path = as_path(path)
+        self.points = self.path.points
+        self.n = len(self.points)
+        self.closed = self.path.closed if closed is None else bool(closed)
+        # Path에 계산된 세그먼트를 재사용 (closed면 마지막 -> 처음 세그먼트 추가)
+        self.seg_vec = self.path.seg_delta
+        self.seg_len2 = np.einsum('ij,ij->i', self.seg_vec, self.seg_vec)
+        if self.closed:
+            last = self.points[:1] - self.points[-1:]
+            self.seg_vec = np.concatenate((self.seg_vec, last))
+            self.seg_len2 = np.concatenate((self.seg_len2, np.einsum('ij,ij->i', last, last)))
+        self.seg_start = np.arange(len(self.seg_vec))
+        self.seg_end = (self.seg_start + 1) % self.n
+        p0 = self.points[self.seg_start]
+        p1 = self.points[self.seg_end]
+
+        lo = self.points.min(axis=0)
+        hi = self.points.max(axis=0)
+        if cell_size is None:
+            # waypoint 간격의 몇 배, 또는 cell당 waypoint 1개 정도가 되는 크기 중 큰 값
+            seg = np.sqrt(self.seg_len2) if len(self.seg_len2) else np.zeros(1)
+            area = float(np.prod(np.maximum(hi - lo, 1e-9)))
+            cell_size = max(4.0 * float(np.median(seg)), math.sqrt(area / max(self.n, 1)), 1e-9)
+        # cell 수가 waypoint 수에 비해 너무 많으면 cell 크기를 키움
+        while True:
+            nx = int((hi[0] - lo[0]) // cell_size) + 1
+            ny = int((hi[1] - lo[1]) // cell_size) + 1
+            if nx * ny <= max(4 * self.n, 1024):
+                break
+            cell_size *= 2.0
+        self.cell_size = float(cell_size)
+        self.origin = lo
+        self._ox, self._oy = float(lo[0]), float(lo[1])
+        self.nx, self.ny = nx, ny
+
+        ip = self._cell_of(self.points)
+        self.point_ids, self.point_starts = _build_cells(ip[:, 0], ip[:, 1], ip[:, 0], ip[:, 1], nx, ny)
+        c0 = self._cell_of(np.minimum(p0, p1))
+        c1 = self._cell_of(np.maximum(p0, p1))
+        self.seg_ids, self.seg_starts = _build_cells(c0[:, 0], c0[:, 1], c1[:, 0], c1[:, 1], nx, ny)
+
+    def _cell_of(self, pts):
+        c = np.floor((pts - self.origin) / self.cell_size).astype(np.int64)
+        c[..., 0] = np.clip(c[..., 0], 0, self.nx - 1)
+        c[..., 1] = np.clip(c[..., 1], 0, self.ny - 1)
+        return c
+
+    # (cx, cy)를 중심으로 한 반경 r 링의 후보 id 모음
+    def _ring(self, ids, starts, cx, cy, r):
+        out = []
+        x0, x1 = max(cx - r, 0), min(cx + r, self.nx - 1)
+        for y in range(max(cy - r, 0), min(cy + r, self.ny - 1) + 1):
+            row = y * self.nx
+            if y == cy - r or y == cy + r:
+                a, b = starts[row + x0], starts[row + x1 + 1]
+                if b > a:
+                    out.append(ids[a:b])
+            else:
+                for x in (cx - r, cx + r):
+                    if 0 <= x < self.nx:
+                        a, b = starts[row + x], starts[row + x + 1]
+                        if b > a:
+                            out.append(ids[a:b])
+        return out
+
+    # 검색한 정사각형 영역 밖까지의 최소 거리 (이보다 가까운 후보는 모두 찾은 것)
+    def _margin(self, qx, qy, cx, cy, r):
+        cs = self.cell_size
+        m = math.inf
+        if cx - r > 0:
+            m = min(m, qx - self._ox - (cx - r) * cs)
+        if cy - r > 0:
+            m = min(m, qy - self._oy - (cy - r) * cs)
+        if cx + r < self.nx - 1:
+            m = min(m, self._ox + (cx + r + 1) * cs - qx)
+        if cy + r < self.ny - 1:
+            m = min(m, self._oy + (cy + r + 1) * cs - qy)
+        return m
+
+    def _search(self, q, ids, starts, dist2_fn, k, unique=False):
+        q = np.asarray(q, dtype=float)
+        qx, qy = float(q[0]), float(q[1])
+        cx = min(max(int((qx - self._ox) // self.cell_size), 0), self.nx - 1)
+        cy = min(max(int((qy - self._oy) // self.cell_size), 0), self.ny - 1)
+        all_ids = np.empty(0, dtype=np.int64)
+        all_d2 = np.empty(0)
+        r = 0
+        while True:
+            cand = self._ring(ids, starts, cx, cy, r)
+            if cand:
+                c = np.concatenate(cand)
+                all_ids = np.concatenate((all_ids, c))
+                all_d2 = np.concatenate((all_d2, dist2_fn(c, q)))
+            # 세그먼트는 여러 cell에 등록되므로 중복 제거
+            if unique and cand:
+                all_ids, u = np.unique(all_ids, return_index=True)
+                all_d2 = all_d2[u]
+            margin = self._margin(qx, qy, cx, cy, r)
+            if len(all_ids) >= k or math.isinf(margin):
+                order = np.argsort(all_d2)[:k]
+                if math.isinf(margin) or (margin > 0 and all_d2[order[-1]] <= margin * margin):
+                    return all_ids[order], all_d2[order]
+            r += 1
+
+    def _point_dist2(self, c, q):
+        d = self.points[c] - q
+        return np.einsum('ij,ij->i', d, d)
+
+    def _seg_param(self, c, q):
+        f = q - self.points[self.seg_start[c]]
+        v = self.seg_vec[c]
+        l2 = self.seg_len2[c]
+        t = np.where(l2 > 0.0, np.einsum('ij,ij->i', f, v) / np.where(l2 > 0.0, l2, 1.0), 0.0)
+        return np.clip(t, 0.0, 1.0)
+
+    def _seg_dist2(self, c, q):
+        t = self._seg_param(c, q)
+        d = self.points[self.seg_start[c]] + t[:, None] * self.seg_vec[c] - q
+        return np.einsum('ij,ij->i', d, d)
+
+    # 최근접 waypoint (index, 거리)
+    def nearest(self, q):
+        ids, d2 = self._search(q, self.point_ids, self.point_starts, self._point_dist2, 1)
+        return int(ids[0]), math.sqrt(d2[0])
+
+    # 가까운 순서로 k개의 waypoint (indices, 거리 배열)
+    def k_nearest(self, q, k):
+        k = min(int(k), self.n)
+        ids, d2 = self._search(q, self.point_ids, self.point_starts, self._point_dist2, k)
+        return ids, np.sqrt(d2)
+
+    # 최근접 세그먼트 위로 투영: (세그먼트 i, 구간 비율 t, 투영점, 거리)
+    # 세그먼트 i는 points[i] -> points[i+1] (closed면 마지막 세그먼트는 points[n-1] -> points[0])
+    def project(self, q):
+        ids, d2 = self._search(q, self.seg_ids, self.seg_starts, self._seg_dist2, 1, unique=True)
+        i = int(ids[0])
+        t = float(self._seg_param(ids[:1], np.asarray(q, dtype=float))[0])
+        point = self.points[self.seg_start[i]] + t * self.seg_vec[i]
+        return i, t, point, math.sqrt(d2[0])
+
+    # 최근접 세그먼트까지의 signed 거리 (부호는 PathTracker.cross_track_error와 같은 규칙)
+    def cross_track_error(self, q):
+        i, _, point, dist = self.project(q)
+        vx, vy = self.seg_vec[i]
+        cross = vx * (q[1] - point[1]) - vy * (q[0] - point[0])
+        return dist if cross >= 0 else -dist
+
+
+# 움직이는 점(로봇)들의 uniform spatial hash: 매 스텝 build(positions)로 다시 만듦 (정렬 기반 CSR, O(N log N))
+# cell 좌표를 table_size개 bucket으로 hash하므로 월드 크기 제한이 없음
+# pairs(radius): 거리 radius 이하인 점 쌍을 3x3 이웃 cell만 검사해서 찾음 (radius <= cell_size)
+class SpatialHash:
+    def __init__(self, cell_size, table_size=None):
+        self.cell_size = float(cell_size)
+        self.table_size = table_size
+        self.positions = np.empty((0, 2))
+
+    # 정수 cell 좌표 -> bucket (table 크기는 2의 거듭제곱)
+    def _hash(self, cx, cy):
+        return ((cx * 73856093) ^ (cy * 19349663)) & (self.size - 1)
+
+    def build(self, positions):
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        n = len(self.positions)
+        self.size = 1 << max(int(self.table_size or 2 * n) - 1, 1).bit_length()
+        self.cells = np.floor(self.positions / self.cell_size).astype(np.int64)
+        # cell 좌표를 int64 하나로 (cx * 2^32 + cy): 이웃 cell은 key에 offset을 더하기만 하면 됨
+        self.cell_keys = (self.cells[:, 0] << 32) + self.cells[:, 1]
+        keys = self._hash(self.cells[:, 0], self.cells[:, 1])
+        self.order = np.argsort(keys, kind='stable')
+        self.starts = np.searchsorted(keys[self.order], np.arange(self.size + 1))
+        return self
+
+    # 거리 radius 이하인 쌍 (i < j)과 거리: (i, j, d)
+    # 자기 cell과 앞쪽 절반 이웃 4개만 검사 (각 cell 쌍을 한 번씩만 봄)
+    def pairs(self, radius):
+        if radius > self.cell_size:
+            raise ValueError(f"radius {radius} must be <= cell_size {self.cell_size}")
+        dx = np.array([0, 1, 1, 1, 0])
+        dy = np.array([0, -1, 0, 1, 1])
+        cx = (self.cells[:, 0:1] + dx).ravel()
+        cy = (self.cells[:, 1:2] + dy).ravel()
+        cell_key = (self.cell_keys[:, None] + ((dx << 32) + dy)).ravel()
+        keys = self._hash(cx, cy)
+        lo = self.starts[keys]
+        counts = self.starts[keys + 1] - lo
+        # (query cell, bucket 안 순번) 쌍을 한 번에 펼침
+        first = np.cumsum(counts) - counts
+        slot = np.repeat(lo - first, counts) + np.arange(counts.sum())
+        owner = np.repeat(np.arange(len(keys)), counts)
+        i = owner // len(dx)
+        j = self.order[slot]
+        # hash 충돌로 같은 bucket에 들어온 다른 cell의 점은 제외, 같은 cell 안에서는 i < j만
+        keep = self.cell_keys[j] == cell_key[owner]
+        keep &= (owner % len(dx) != 0) | (i < j)
+        i, j = i[keep], j[keep]
+        d = np.hypot(*(self.positions[j] - self.positions[i]).T)
+        near = d <= radius
+        i, j = i[near], j[near]
+        return np.minimum(i, j), np.maximum(i, j), d[near]
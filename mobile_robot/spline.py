@@ -0,0 +1,351 @@
+import math
+from bisect import bisect_right
+
+import numpy as np
+
+from .path import is_closed
+
+# 5점 Gauss-Legendre (구간 길이 적분용)
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(5)
+
+
+def _pad(v, fill):
+    edge = np.full((1,) + v.shape[1:], fill)
+    return np.concatenate((edge, v, edge))
+
+
+# 삼중대각 시스템 (a: 아래, b: 대각, c: 위) x = d,  d는 (n,) 또는 (n,k)
+# cyclic reduction: 짝수 번째 식으로 홀수 번째 미지수를 소거한 절반 크기 시스템을 풀고 홀수 번째는 역대입
+# (Thomas 알고리즘과 달리 Python 반복이 log2(n)번이라 waypoint 수십만 개에도 빠름)
+def _solve_tridiagonal(a, b, c, d):
+    b = np.asarray(b, dtype=float)
+    d = np.asarray(d, dtype=float)
+    n = len(b)
+    col = (slice(None),) + (None,) * (d.ndim - 1)
+    if n == 1:
+        return d / b[col]
+    a = np.array(a, dtype=float)
+    c = np.array(c, dtype=float)
+    a[0] = c[-1] = 0.0
+    A, B, C, D = _pad(a, 0.0), _pad(b, 1.0), _pad(c, 0.0), _pad(d, 0.0)
+    e = np.arange(1, n + 1, 2)   # 짝수 번째 식의 padded 위치
+    alpha = -A[e] / B[e - 1]
+    gamma = -C[e] / B[e + 1]
+    x = np.empty_like(d)
+    x[0::2] = _solve_tridiagonal(alpha * A[e - 1], B[e] + alpha * C[e - 1] + gamma * A[e + 1], gamma * C[e + 1],
+                                 D[e] + alpha[col] * D[e - 1] + gamma[col] * D[e + 1])
+    X = _pad(x, 0.0)
+    o = np.arange(1, n, 2)
+    x[o] = (d[o] - a[o][col] * X[o] - c[o][col] * X[o + 2]) / b[o][col]
+    return x
+
+
+# 순환 삼중대각 (a[0]은 마지막 열, c[-1]은 첫 열 계수): Sherman-Morrison
+def _solve_cyclic(a, b, c, d):
+    n = len(b)
+    gamma = -b[0]
+    bb = np.array(b, dtype=float)
+    bb[0] -= gamma
+    bb[-1] -= a[0] * c[-1] / gamma
+    u = np.zeros(n)
+    u[0], u[-1] = gamma, c[-1]
+    xz = _solve_tridiagonal(a, bb, c, np.column_stack((d, u)))
+    x, z = xz[:, :-1], xz[:, -1]
+    factor = (x[0] + a[0] * x[-1] / gamma) / (1.0 + z[0] + a[0] * z[-1] / gamma)
+    x = x - np.multiply.outer(z, factor)
+    return x if np.ndim(d) > 1 else x[:, 0]
+
+
+# knot s (n+1,), 값 values (n+1,k)인 cubic spline의 knot별 2차 미분
+# natural (양 끝 2차 미분 0) 또는 periodic (closed 경로, values[-1] == values[0])
+def _second_derivatives(s, values, closed):
+    h = np.diff(s)
+    slope = np.diff(values, axis=0) / h[:, None]
+    if closed:
+        hp = np.roll(h, 1)   # 이전 구간 길이
+        rhs = 6.0 * (slope - np.roll(slope, 1, axis=0))
+        m = _solve_cyclic(hp, 2.0 * (hp + h), h, rhs)
+        return np.vstack((m, m[:1]))
+    n = len(s)
+    m = np.zeros_like(values)
+    if n > 2:
+        rhs = 6.0 * (slope[1:] - slope[:-1])
+        m[1:-1] = _solve_tridiagonal(h[:-1], 2.0 * (h[:-1] + h[1:]), h[1:], rhs)
+    return m
+
+
+# waypoint를 지나는 arc length 매개변수 cubic spline 기준 경로
+# 구간 i (s_i <= s < s_{i+1})에서 P(s) = c0 + c1 u + c2 u^2 + c3 u^3,  u = s - s_i
+# chord 길이로 한 번 맞춘 뒤 구간별 실제 길이(Gauss-Legendre 적분)로 knot를 다시 잡아 |P'(s)| ~ 1
+# 투영은 이전 s 주변 bracket 안에서 safeguarded Newton (warm start면 보통 2~3회 반복)
+class ArcLengthSpline:
+    def __init__(self, points, closed=None, refine=2):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.closed = is_closed(points) if closed is None else bool(closed)
+        if self.closed and np.allclose(points[0], points[-1]):
+            points = points[:-1]
+        # 중복 waypoint 제거 (구간 길이 0이면 knot가 겹침)
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+        points = points[keep]
+        if len(points) < 2:
+            raise ValueError("spline needs at least 2 distinct points")
+        self.points = points
+        values = np.vstack((points, points[:1])) if self.closed else points
+        s = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(values, axis=0).T))))
+        for _ in range(refine + 1):
+            self._fit(s, values)
+            s = np.concatenate(([0.0], np.cumsum(self._segment_lengths())))
+        self._fit(s, values)
+        # 스칼라 evaluate용 (Python float 리스트가 NumPy 원소 접근보다 빠름)
+        self._knots = self.knots.tolist()
+        self._coeffs = self.coeffs.reshape(-1, 8).tolist()
+        self.length = float(self.knots[-1])
+        self.max_segment = float(np.diff(self.knots).max())
+
+    def _fit(self, s, values):
+        m = _second_derivatives(s, values, self.closed)
+        h = np.diff(s)[:, None]
+        self.knots = s
+        c0 = values[:-1]
+        c1 = (values[1:] - values[:-1]) / h - h * (2.0 * m[:-1] + m[1:]) / 6.0
+        c2 = m[:-1] / 2.0
+        c3 = (m[1:] - m[:-1]) / (6.0 * h)
+        self.coeffs = np.stack((c0, c1, c2, c3), axis=1)   # (구간, 4, 2)
+        self._columns = [np.ascontiguousarray(c) for c in (c0, c1, c2, c3)]   # 배열 evaluate용 (구간, 2) x 4
+
+    def _segment_lengths(self):
+        h = np.diff(self.knots)
+        u = 0.5 * h[:, None] * (_GL_NODES + 1.0)
+        c = self.coeffs
+        dx = c[:, 1, 0, None] + 2 * c[:, 2, 0, None] * u + 3 * c[:, 3, 0, None] * u * u
+        dy = c[:, 1, 1, None] + 2 * c[:, 2, 1, None] * u + 3 * c[:, 3, 1, None] * u * u
+        return 0.5 * h * (np.hypot(dx, dy) @ _GL_WEIGHTS)
+
+    def _clamp(self, s):
+        return s if self.closed else min(max(s, 0.0), self.length)
+
+    def _wrap(self, s):
+        return s % self.length if self.closed else self._clamp(s)
+
+    # s에서 (x, y, x', y', x'', y'') (스칼라)
+    def evaluate(self, s):
+        s = self._wrap(s)
+        i = min(bisect_right(self._knots, s) - 1, len(self._coeffs) - 1)
+        u = s - self._knots[i]
+        ax, ay, bx, by, cx, cy, dx, dy = self._coeffs[i]
+        return (ax + u * (bx + u * (cx + u * dx)),
+                ay + u * (by + u * (cy + u * dy)),
+                bx + u * (2 * cx + 3 * u * dx),
+                by + u * (2 * cy + 3 * u * dy),
+                2 * cx + 6 * u * dx,
+                2 * cy + 6 * u * dy)
+
+    def position(self, s):
+        x, y = self.evaluate(s)[:2]
+        return x, y
+
+    def heading(self, s):
+        _, _, dx, dy, _, _ = self.evaluate(s)
+        return math.atan2(dy, dx)
+
+    def curvature(self, s):
+        _, _, dx, dy, ddx, ddy = self.evaluate(s)
+        return (dx * ddy - dy * ddx) / (dx * dx + dy * dy) ** 1.5
+
+    # s 배열 -> (구간 인덱스 (N,), 구간 안 위치 u (N,1))
+    def _segments(self, s):
+        s = np.asarray(s, dtype=float)
+        s = s % self.length if self.closed else np.clip(s, 0.0, self.length)
+        i = np.searchsorted(self.knots, s, side="right") - 1
+        np.clip(i, 0, len(self.coeffs) - 1, out=i)
+        return i, (s - np.take(self.knots, i))[:, None]
+
+    # s 배열 -> (N,2) 점 (그리기, 초기 전역 검색용)
+    def sample(self, s):
+        i, u = self._segments(s)
+        c0, c1, c2, c3 = (np.take(c, i, axis=0) for c in self._columns)
+        return c0 + u * (c1 + u * (c2 + u * c3))
+
+    # evaluate의 배열 버전: s (N,) -> 점, 1차 미분, 2차 미분 (각 (N,2))
+    def evaluate_batch(self, s):
+        i, u = self._segments(s)
+        c0, c1, c2, c3 = (np.take(c, i, axis=0) for c in self._columns)
+        return (c0 + u * (c1 + u * (c2 + u * c3)),
+                c1 + u * (2 * c2 + 3 * u * c3),
+                2 * c2 + 6 * u * c3)
+
+    # 전역 초기값 검색용 격자: 구간마다 per_segment개씩 샘플한 (s, 점) (한 번 만들고 재사용)
+    def grid(self, per_segment=8):
+        if not hasattr(self, "_grid_s"):
+            n = len(self.coeffs) * per_segment
+            self._grid_s = np.linspace(0.0, self.length, n + 1)
+            self._grid_p = self.sample(self._grid_s)
+        return self._grid_s, self._grid_p
+
+    # 전역 초기값: 구간마다 몇 개씩 샘플한 점 중 최근접 (q (N,2) -> (N,), 메모리 제한을 위해 나눠서)
+    def _initial_guess_batch(self, q, chunk_elems=1 << 22):
+        self.grid()
+        out = np.empty(len(q))
+        step = max(1, chunk_elems // len(self._grid_s))
+        for a in range(0, len(q), step):
+            d = self._grid_p[None, :, :] - q[a:a + step, None, :]
+            out[a:a + step] = self._grid_s[np.argmin(np.einsum('ijk,ijk->ij', d, d), axis=1)]
+        return out
+
+    def _initial_guess(self, qx, qy):
+        return float(self._initial_guess_batch(np.array([[qx, qy]]))[0])
+
+    # 부호 있는 횡방향 오차 (진행 방향 왼쪽이 +)와 투영 s: (cte, s)
+    def cross_track_error(self, q, s0=None):
+        s, x, y, d = self.project(q, s0)
+        _, _, dx, dy, _, _ = self.evaluate(s)
+        side = dx * (q[1] - y) - dy * (q[0] - x)
+        return (d if side >= 0 else -d), s
+
+    # cross_track_error의 배열 버전: q (N,2), s0 (N,) 또는 None -> (cte (N,), s (N,))
+    def cross_track_error_batch(self, q, s0=None):
+        q = np.asarray(q, dtype=float).reshape(-1, 2)
+        s, p, d = self.project_batch(q, s0)
+        _, d1, _ = self.evaluate_batch(s)
+        e = q - p
+        side = d1[:, 0] * e[:, 1] - d1[:, 1] * e[:, 0]
+        return np.where(side >= 0, d, -d), s
+
+    # 거리 제곱/2의 s 미분 f = (P(s) - q) . P'(s) 와 그 미분 f'
+    def _distance_derivatives(self, s, qx, qy):
+        x, y, dx, dy, ddx, ddy = self.evaluate(s)
+        ex, ey = x - qx, y - qy
+        return ex * dx + ey * dy, dx * dx + dy * dy + ex * ddx + ey * ddy
+
+    # [s - w, s + w] 안에서 f(s) = 0 을 Newton으로 풀고, 스텝이 bracket을 벗어나면 bisection
+    # 양 끝의 f 부호로 최소가 bracket 밖이면 그쪽으로 w를 두 배씩 늘려가며 옮기고 (expand번까지),
+    # 그래도 못 찾으면 None (force=True면 그대로 진행).  open 경로의 끝점이 최근접이면 끝점
+    def _solve(self, s, w, qx, qy, tol, max_iter, expand=4, force=False):
+        lo, hi = self._clamp(s - w), self._clamp(s + w)
+        f_lo = self._distance_derivatives(lo, qx, qy)[0]
+        f_hi = self._distance_derivatives(hi, qx, qy)[0]
+        for attempt in range(expand + 1):
+            if f_lo > 0 and not self.closed and lo == 0.0:
+                return 0.0
+            if f_hi < 0 and not self.closed and hi == self.length:
+                return self.length
+            if f_lo <= 0 <= f_hi or attempt == expand:
+                break
+            if f_lo > 0:
+                hi, f_hi = lo, f_lo
+                lo = self._clamp(lo - w)
+                f_lo = self._distance_derivatives(lo, qx, qy)[0]
+            else:
+                lo, f_lo = hi, f_hi
+                hi = self._clamp(hi + w)
+                f_hi = self._distance_derivatives(hi, qx, qy)[0]
+            w *= 2
+        if not (f_lo <= 0 <= f_hi or force):
+            return None
+        s = min(max(s, lo), hi)
+        for _ in range(max_iter):
+            f, fp = self._distance_derivatives(s, qx, qy)
+            if f > 0:
+                hi = s
+            else:
+                lo = s
+            if fp > 0:
+                step = f / fp
+                if abs(step) < tol:
+                    return s - step
+                if lo < s - step < hi:
+                    s -= step
+                    continue
+            s = 0.5 * (lo + hi)
+            if hi - lo < tol:
+                return s
+        return s
+
+    # q를 곡선 위로 투영: (s, x, y, 거리)
+    # s0: 이전 투영 결과 (warm start). 최소가 s0 주변 window 밖이거나 s0가 None이면 전역 초기값에서 다시 풂
+    def project(self, q, s0=None, window=None, tol=1e-9, max_iter=50):
+        qx, qy = float(q[0]), float(q[1])
+        w = window if window is not None else 2.0 * self.max_segment
+        s = self._solve(float(s0), w, qx, qy, tol, max_iter) if s0 is not None else None
+        if s is None:
+            s = self._solve(self._initial_guess(qx, qy), w, qx, qy, tol, max_iter, force=True)
+        s = self._wrap(s)
+        x, y = self.position(s)
+        return s, x, y, math.hypot(x - qx, y - qy)
+
+    def _clamp_batch(self, s):
+        return s if self.closed else np.clip(s, 0.0, self.length)
+
+    def _distance_derivative_batch(self, s, q):
+        p, d1, _ = self.evaluate_batch(s)
+        return np.einsum('ij,ij->i', p - q, d1)
+
+    # 최소가 [lo, hi] 밖인 점 (양 끝의 f 부호로 판단)은 그쪽으로 bracket을 옮기고 폭을 두 배로 (_solve와 같은 방식)
+    def _expand_batch(self, q, lo, hi, w, expand=4):
+        w = np.full(len(q), float(w))
+        idx = np.arange(len(q))
+        for _ in range(expand):
+            f_lo = self._distance_derivative_batch(lo[idx], q[idx])
+            f_hi = self._distance_derivative_batch(hi[idx], q[idx])
+            left, right = f_lo > 0, f_hi < 0
+            if not self.closed:
+                left &= lo[idx] > 0.0
+                right &= hi[idx] < self.length
+            right &= ~left
+            if not (left.any() or right.any()):
+                break
+            l, r = idx[left], idx[right]
+            hi[l], lo[l] = lo[l], self._clamp_batch(lo[l] - w[l])
+            lo[r], hi[r] = hi[r], self._clamp_batch(hi[r] + w[r])
+            w[l] *= 2
+            w[r] *= 2
+            idx = idx[left | right]
+        return lo, hi
+
+    # project의 배열 버전 (여러 로봇을 한 번에): q (N,2), s0 (N,) 또는 None -> s, 점 (N,2), 거리 (N,)
+    # Newton/bisection을 배열 연산으로 반복 (수렴한 점은 빼고 남은 점만)
+    # 최소가 s0 주변 window 밖인 점만 전역 초기값 (격자 간격 bracket)에서 다시 풂
+    def project_batch(self, q, s0=None, window=None, tol=1e-6, max_iter=50):
+        q = np.asarray(q, dtype=float).reshape(-1, 2)
+        warm = s0 is not None
+        if warm:
+            s = np.array(s0, dtype=float)
+            w = window if window is not None else 2.0 * self.max_segment
+        else:
+            s = self._initial_guess_batch(q)
+            w = 2.0 * (self._grid_s[1] - self._grid_s[0])
+        lo, hi = self._clamp_batch(s - w), self._clamp_batch(s + w)
+        if warm:
+            lo, hi = self._expand_batch(q, lo, hi, w)
+            s = np.clip(s, lo, hi)
+        lo0, hi0 = lo.copy(), hi.copy()
+        active = np.arange(len(q))   # 아직 수렴하지 않은 점만 계산
+        for _ in range(max_iter):
+            sa = s[active]
+            p, d1, d2 = self.evaluate_batch(sa)
+            e = p - q[active]
+            f = np.einsum('ij,ij->i', e, d1)
+            fp = np.einsum('ij,ij->i', d1, d1) + np.einsum('ij,ij->i', e, d2)
+            la = np.where(f > 0, lo[active], sa)
+            ha = np.where(f > 0, sa, hi[active])
+            lo[active], hi[active] = la, ha
+            step = sa - f / np.where(fp > 0, fp, 1.0)
+            s_new = np.where((fp > 0) & (la <= step) & (step <= ha), step, 0.5 * (la + ha))
+            s[active] = s_new
+            active = active[np.abs(s_new - sa) >= tol]
+            if not len(active):
+                break
+        if warm:
+            # window 경계에 붙은 점 (open 경로의 끝점은 정상적인 최근접)
+            edge = 1e3 * tol
+            at_lo, at_hi = s - lo0 < edge, hi0 - s < edge
+            if not self.closed:
+                at_lo &= lo0 > 0.0
+                at_hi &= hi0 < self.length
+            stuck = at_lo | at_hi
+            if stuck.any():
+                s[stuck] = self.project_batch(q[stuck], None, tol=tol, max_iter=max_iter)[0]
+        s = s % self.length if self.closed else np.clip(s, 0.0, self.length)
+        p = self.sample(s)
+        return s, p, np.hypot(*(p - q).T)
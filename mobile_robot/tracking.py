@@ -0,0 +1,100 @@
+import numpy as np
+
+from .path import as_path
+
+
+# 최근접 waypoint 인덱스를 기억하고, 그 앞쪽 window 구간만 검색하는 tracker
+class PathTracker:
+    def __init__(self, path, window=64, closed=None, relocalize_dist=None, spatial_index=None):
+        self.path = as_path(path)
+        self.points = self.path.points
+        self.n = len(self.points)
+        self.window = max(2, min(int(window), self.n))
+        self.closed = self.path.closed if closed is None else bool(closed)
+        # 최근접점까지 거리가 이 값보다 크면 전역 검색으로 재위치 추정 (None이면 사용 안 함)
+        self.relocalize_dist = relocalize_dist
+        # 전역 검색에 사용할 공간 인덱스 (GridIndex 등, None이면 전체 스캔)
+        self.spatial_index = spatial_index
+        self.index = None
+
+    def reset(self):
+        self.index = None
+
+    # start부터 m개의 waypoint (closed 경로는 끝에서 처음으로 wrap)
+    def _span(self, start, m):
+        if self.closed:
+            idx = np.arange(start, start + m) % self.n
+            return idx, self.points[idx]
+        stop = min(start + m, self.n)
+        return np.arange(start, stop), self.points[start:stop]
+
+    # 전체 경로 검색 (처음 호출 또는 로봇 재위치 시)
+    def relocalize(self, pos):
+        if self.spatial_index is not None:
+            self.index = self.spatial_index.nearest(pos)[0]
+            return self.index
+        d = self.points - np.asarray(pos, dtype=float)
+        self.index = int(np.argmin(np.einsum('ij,ij->i', d, d)))
+        return self.index
+
+    def nearest(self, pos):
+        if self.index is None:
+            return self.relocalize(pos)
+        pos = np.asarray(pos, dtype=float)
+        start = self.index
+        visited = 0
+        while True:
+            idx, pts = self._span(start, self.window)
+            d = pts - pos
+            d2 = np.einsum('ij,ij->i', d, d)
+            j = int(np.argmin(d2))
+            visited += len(idx)
+            # window 끝에서 최소가 나오면 로봇이 window보다 빨리 진행한 것 -> 앞으로 이동해서 계속 검색
+            if j < len(idx) - 1 or len(idx) < self.window or visited >= self.n:
+                break
+            start = int(idx[j])
+        if self.relocalize_dist is not None and d2[j] > self.relocalize_dist ** 2:
+            return self.relocalize(pos)
+        self.index = int(idx[j])
+        return self.index
+
+    # start부터 앞으로 진행하며 pos에서 radius 밖에 있는 첫 waypoint 인덱스 (없으면 None)
+    def first_outside(self, pos, radius, start=None):
+        if start is None:
+            start = self.index if self.index is not None else 0
+        pos = np.asarray(pos, dtype=float)
+        r2 = radius * radius
+        total = self.n if self.closed else self.n - start
+        checked = 0
+        while checked < total:
+            idx, pts = self._span(start + checked, min(self.window, total - checked))
+            d = pts - pos
+            hit = np.flatnonzero(np.einsum('ij,ij->i', d, d) > r2)
+            if len(hit):
+                return int(idx[hit[0]])
+            checked += len(idx)
+        return None
+
+    # 최근접 waypoint 앞뒤 세그먼트까지의 signed cross-track error
+    # (부호는 세그먼트 방향 x (로봇 - 세그먼트 시작점) cross product, y-up 좌표계에서 왼쪽이 +)
+    def cross_track_error(self, pos):
+        self.nearest(pos)
+        qx, qy = float(pos[0]), float(pos[1])
+        best = None
+        for a in (self.index - 1, self.index):
+            if not self.closed and (a < 0 or a >= self.n - 1):
+                continue
+            a %= self.n
+            x0, y0 = self.points[a]
+            x1, y1 = self.points[(a + 1) % self.n]
+            ex, ey = x1 - x0, y1 - y0
+            fx, fy = qx - x0, qy - y0
+            l2 = ex * ex + ey * ey
+            t = min(max((fx * ex + fy * ey) / l2, 0.0), 1.0) if l2 > 0 else 0.0
+            d = float(np.hypot(fx - t * ex, fy - t * ey))
+            if best is None or d < abs(best):
+                best = d if ex * fy - ey * fx >= 0 else -d
+        if best is None:
+            x0, y0 = self.points[self.index]
+            best = float(np.hypot(qx - x0, qy - y0))
+        return best
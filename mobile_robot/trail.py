@@ -0,0 +1,49 @@
+import numpy as np
+
+
+# 궤적 저장용 버퍼
+# capacity=None: chunk 단위로 늘어나며 전부 보관,  capacity=N: 최근 N개만 보관하는 ring buffer
+class TrajectoryBuffer:
+    def __init__(self, capacity=None, dim=2, chunk=4096):
+        self.capacity = capacity
+        self.dim = dim
+        self.chunk = chunk
+        size = capacity if capacity is not None else chunk
+        self.data = np.empty((size, dim))
+        self.count = 0      # 현재 보관 중인 개수
+        self.total = 0      # 지금까지 추가된 개수
+        self.head = 0       # ring buffer에서 다음에 쓸 위치
+
+    def __len__(self):
+        return self.count
+
+    def append(self, *values):
+        if self.capacity is None:
+            if self.count == len(self.data):
+                grown = np.empty((len(self.data) + self.chunk, self.dim))
+                grown[:self.count] = self.data
+                self.data = grown
+            self.data[self.count] = values
+            self.count += 1
+        else:
+            self.data[self.head] = values
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+        self.total += 1
+
+    def last(self):
+        if self.count == 0:
+            return None
+        i = self.count - 1 if self.capacity is None else self.head - 1
+        return self.data[i]
+
+    # 오래된 것부터 순서대로 정렬된 배열
+    def array(self):
+        if self.capacity is None or self.count < self.capacity:
+            return self.data[:self.count]
+        return np.concatenate((self.data[self.head:], self.data[:self.head]))
+
+    def clear(self):
+        self.count = 0
+        self.total = 0
+        self.head = 0
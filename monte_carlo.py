@@ -0,0 +1,164 @@
+import time
+import importlib
+
+import numpy as np
+from mobile_robot import Path
+
+# parameters
+CONTROLLER = "stanley"   # CONTROLLERS 중 하나
+PATH = None              # None: 컨트롤러 기본 경로
+SAMPLES = 2000           # 초기 조건 샘플 수
+STEPS = None             # None: 컨트롤러 기본 스텝 수
+BATCH = 5000             # 한 번에 lockstep으로 시뮬레이션할 샘플 수 (메모리: steps x BATCH 배열 몇 개)
+SEED = 0                 # 초기 조건 / 센서 노이즈 seed (zigzag 경로 seed 포함)
+START_FRACTION = 0.2     # open 경로에서 시작 위치를 뽑는 구간 (경로 앞쪽 비율)
+OUTPUT = "monte_carlo.npz"   # 샘플별 초기 조건과 지표 (None: 저장 안 함)
+
+# 경로 생성 함수: module -> 경로 점 (N,2)  (stanley는 make_ref의 (xs, ys, yaws))
+def _road(name):
+    return lambda mod: mod.make_ref(road=name)
+
+def _pursuit_path(name):
+    return lambda mod: getattr(mod, name)(SEED) if name == "generate_zigzag" else getattr(mod, name)()
+
+# N개 샘플을 lockstep으로 시뮬레이션: (module, 경로, 초기 위치 (N,2), yaw (N,) [rad], 속도 (N,), 노이즈, steps, seed)
+# -> (부호 있는 cte (steps, N), 궤적 (steps, N, 2), 스텝 간격 [s])
+def _run_stanley(mod, ref, positions, yaws, speeds, noise, steps, seed):
+    ref_xs, ref_ys, _ = ref
+    vehicles = mod.VehicleBatch(positions[:, 0], positions[:, 1], np.degrees(yaws), speeds)
+    result = mod.simulate_batch(vehicles, ref_xs, ref_ys, steps, control_rate=mod.CONTROL_RATE,
+                                sensor_rate=mod.SENSOR_RATE, sensor_noise=noise, seed=seed)
+    return result["cte"], result["trajectory"], mod.dt
+
+def _run_pursuit(mod, path, positions, yaws, speeds, noise, steps, seed):
+    result = mod.simulate_batch(path, positions, yaws, steps, speeds=speeds, control_rate=mod.CONTROL_RATE,
+                                sensor_rate=mod.SENSOR_RATE, sensor_noise=noise, seed=seed)
+    return result["cte"], result["trajectory"], 1.0 / mod.STEP_RATE
+
+# 컨트롤러별 스크립트, 경로, 초기 조건 분포 (단위는 스크립트 좌표계: stanley [m], pure_pursuit [px])
+#   lateral: 경로에서 좌우 offset 최대값,  heading: 경로 방향 대비 yaw 오차 최대값 [rad]
+#   speed: 속도 범위 (균등 분포),  noise: 센서 노이즈 표준편차 (위치, yaw)
+#   tol: 수렴 판정 |cte| 한계 (끝까지 이 안에 머물면 수렴)
+CONTROLLERS = {
+    "stanley": {
+        "module": "pygame_stanley",
+        "run": _run_stanley,
+        "paths": {"circle": _road("circle"), "sin": _road("sin"), "linear": _road("linear")},
+        "steps": 600,
+        "lateral": 10.0,
+        "heading": np.radians(60),
+        "speed": (2.0, 10.0),
+        "noise": (0.2, np.radians(1.0)),
+        "tol": 0.5,
+    },
+    "pure_pursuit": {
+        "module": "pygame_pure_pursuit",
+        "run": _run_pursuit,
+        "paths": {"rectangle": _pursuit_path("generate_rectangle"), "8_shape": _pursuit_path("generate_8_shape"),
+                  "zigzag": _pursuit_path("generate_zigzag")},
+        "steps": 1500,
+        "lateral": 60.0,
+        "heading": np.radians(60),
+        "speed": (1.0, 4.0),
+        "noise": (2.0, np.radians(1.0)),
+        "tol": 10.0,
+    },
+}
+
+# 경로 위 임의 위치에서 좌우 offset, 방향 오차를 준 초기 pose (closed 경로는 전체, open 경로는 앞쪽 START_FRACTION)
+def sample_initial_poses(path, n, rng, lateral, heading):
+    span = path.length if path.closed else START_FRACTION * path.length
+    s = rng.uniform(0.0, span, n)
+    seg = np.clip(np.searchsorted(path.arc_length, s, side="right") - 1, 0, len(path.seg_length) - 1)
+    t = (s - path.arc_length[seg]) / np.where(path.seg_length[seg] > 0, path.seg_length[seg], 1.0)
+    base = path.points[seg] + t[:, None] * path.seg_delta[seg]
+    path_yaw = path.seg_heading[seg]
+    offset = rng.uniform(-lateral, lateral, n)
+    positions = base + offset[:, None] * np.column_stack((-np.sin(path_yaw), np.cos(path_yaw)))
+    yaw_error = rng.uniform(-heading, heading, n)
+    return positions, path_yaw + yaw_error, offset, yaw_error
+
+# 샘플별 지표: cte (steps, N) -> dict of (N,) 배열
+#   converged: 마지막 스텝까지 |cte| <= tol 유지,  converge_time: 그 구간이 시작된 시각 (수렴 못하면 NaN)
+#   settled_rms_cte: 수렴 후 구간의 RMS,  max_cte / final_cte: 전체 최대 / 마지막 |cte|
+# open 경로는 끝점(goal)에 도달한 뒤의 스텝은 도달 시점 값으로 고정 (경로 끝을 지나쳐서 커지는 오차 제외)
+def sample_metrics(cte, trajectory, path, dt, tol):
+    err = np.abs(cte)
+    steps = len(err)
+    if not path.closed:
+        goal_tol = max(tol, 2.0 * float(np.median(path.seg_length)))
+        at_goal = np.hypot(*(trajectory - path.points[-1]).transpose(2, 0, 1)) <= goal_tol
+        finish = np.where(at_goal.any(axis=0), np.argmax(at_goal, axis=0), steps - 1)
+        k = np.arange(steps)[:, None]
+        err = np.where(k > finish, err[finish, np.arange(err.shape[1])], err)
+    outside = err > tol
+    last_out = steps - 1 - np.argmax(outside[::-1], axis=0)
+    converge_step = np.where(outside.any(axis=0), last_out + 1, 0)
+    converged = converge_step < steps
+    settled = np.arange(steps)[:, None] >= converge_step
+    count = settled.sum(axis=0)
+    settled_rms = np.sqrt(np.where(settled, err * err, 0.0).sum(axis=0) / np.maximum(count, 1))
+    return {
+        "converged": converged,
+        "converge_time": np.where(converged, converge_step * dt, np.nan),
+        "settled_rms_cte": np.where(converged, settled_rms, np.nan),
+        "max_cte": err.max(axis=0),
+        "final_cte": err[-1],
+    }
+
+def run_monte_carlo(controller=CONTROLLER, path_name=PATH, samples=SAMPLES, steps=STEPS, seed=SEED,
+                    batch=BATCH, output=OUTPUT):
+    spec = CONTROLLERS[controller]
+    mod = importlib.import_module(spec["module"])
+    path_name = path_name or next(iter(spec["paths"]))
+    ref = spec["paths"][path_name](mod)
+    points = np.column_stack(ref[:2]) if isinstance(ref, tuple) else np.asarray(ref, dtype=float)
+    path = Path(points)
+    steps = steps or spec["steps"]
+
+    rng = np.random.default_rng(seed)
+    positions, yaws, offset, yaw_error = sample_initial_poses(path, samples, rng, spec["lateral"], spec["heading"])
+    speeds = rng.uniform(*spec["speed"], samples)
+
+    columns = {"x0": positions[:, 0], "y0": positions[:, 1], "yaw0": yaws, "offset": offset,
+               "yaw_error": yaw_error, "speed": speeds}
+    metrics = []
+    for a in range(0, samples, batch):
+        b = min(a + batch, samples)
+        cte, trajectory, dt = spec["run"](mod, ref, positions[a:b], yaws[a:b], speeds[a:b], spec["noise"], steps,
+                                          seed + 1 + a // batch)
+        metrics.append(sample_metrics(cte, trajectory, path, dt, spec["tol"]))
+    for key in metrics[0]:
+        columns[key] = np.concatenate([m[key] for m in metrics])
+    if output:
+        np.savez(output, **columns, controller=controller, path=path_name, steps=steps, tol=spec["tol"])
+    return columns
+
+def _percentiles(values, q=(5, 50, 95)):
+    values = values[np.isfinite(values)]
+    return [np.percentile(values, p) if len(values) else np.nan for p in q] + [values.max() if len(values) else np.nan]
+
+# 수렴률과 지표 분포 (p5/p50/p95/max), 초기 속도 / offset / 방향 오차 구간별 수렴률
+def report(columns, bins=4):
+    converged = columns["converged"]
+    print(f"converged: {100 * converged.mean():.1f}% of {len(converged)} samples")
+    print(f"{'':<18}{'p5':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+    for key in ("converge_time", "settled_rms_cte", "max_cte", "final_cte"):
+        print(f"{key:<18}" + "".join(f"{v:10.3f}" for v in _percentiles(columns[key])))
+    for key in ("speed", "offset", "yaw_error"):
+        values = np.abs(columns[key]) if key != "speed" else columns[key]
+        edges = np.linspace(values.min(), values.max(), bins + 1)
+        which = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, bins - 1)
+        rates = "  ".join(f"[{edges[i]:.2f}, {edges[i + 1]:.2f}): {100 * converged[which == i].mean():5.1f}%"
+                          for i in range(bins) if np.any(which == i))
+        print(f"convergence by {'|' + key + '|' if key != 'speed' else key}: {rates}")
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    columns = run_monte_carlo()
+    elapsed = time.perf_counter() - t0
+    spec = CONTROLLERS[CONTROLLER]
+    steps = STEPS or spec["steps"]
+    print(f"{CONTROLLER} on {PATH or next(iter(spec['paths']))}: {SAMPLES} samples x {steps} steps "
+          f"in {elapsed:.1f} s ({SAMPLES * steps / elapsed / 1e6:.2f} M sample-steps/s)")
+    report(columns)
@@ -0,0 +1,184 @@
+import os
+import csv
+import time
+import itertools
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from mobile_robot import Path, tracking_metrics
+
+# parameters
+CONTROLLER = "pure_pursuit"   # CONTROLLERS 중 하나
+GRID = None                   # None: 컨트롤러 기본 grid,  예) {"LOOKAHEAD": [20, 40, 60]}
+PATHS = None                  # None: 컨트롤러 기본 경로 전부
+STEPS = 2000
+SEED = 0                      # zigzag 경로 seed
+WORKERS = None                # None: 모든 코어 사용
+OUTPUT = "sweep_results.npz"  # .npz 또는 .csv
+
+# 경로 생성 함수: (module, seed) -> 경로
+def _rectangle(mod, seed):
+    return mod.generate_rectangle()
+
+def _8_shape(mod, seed):
+    return mod.generate_8_shape()
+
+def _zigzag(mod, seed):
+    return mod.generate_zigzag(seed)
+
+def _regulated_sine(mod, seed):
+    return mod.make_path()
+
+def _road(name):
+    return lambda mod, seed: mod.make_ref(road=name)
+
+# 시뮬레이션 실행 함수: (module, 경로, steps) -> (궤적, 조향각, 스텝 간격 [s], 평가용 Path)
+# 제어기/센서 rate와 측정 노이즈도 모듈 상수로 sweep 가능 (예: {"CONTROL_RATE": [60, 30, 10, 5]})
+def _rates(mod):
+    return {"control_rate": mod.CONTROL_RATE, "sensor_rate": mod.SENSOR_RATE, "sensor_noise": mod.SENSOR_NOISE}
+
+# 스텝 간격 [s]: 모델 dt가 있는 스크립트 (vector pursuit, stanley)는 dt, 나머지는 1 / STEP_RATE
+# (completion_time, steer_rate가 모든 컨트롤러에서 초 단위가 되도록)
+def _step_time(mod):
+    return getattr(mod, "dt", 1.0 / mod.STEP_RATE)
+
+def _run_pursuit(mod, path, steps):
+    result = mod.simulate(path, steps, lookahead=mod.LOOKAHEAD, **_rates(mod))
+    return result["trajectory"], result["delta"], _step_time(mod), Path(path)
+
+def _run_revisited(mod, path, steps):
+    result = mod.simulate(path, steps, **_rates(mod))
+    return result["trajectory"], result["delta"], _step_time(mod), Path(path)
+
+def _run_regulated(mod, path, steps):
+    result = mod.simulate(path, steps, max_speed=mod.T, **_rates(mod))
+    return result["trajectory"], result["delta"], _step_time(mod), Path(path)
+
+def _run_stanley(mod, ref, steps):
+    ref_xs, ref_ys, ref_yaws = ref
+    model = mod.VehicleModel(x=10.0, y=15.0, yaw=0, v=5.0)
+    result = mod.simulate(model, ref_xs, ref_ys, ref_yaws, steps, **_rates(mod))
+    return result["trajectory"], result["steer"], _step_time(mod), Path.from_ref(ref_xs, ref_ys, ref_yaws)
+
+# 컨트롤러별 스크립트, sweep 가능한 모듈 상수, 기본 grid, 경로
+CONTROLLERS = {
+    "pure_pursuit": {
+        "module": "pygame_pure_pursuit",
+        "run": _run_pursuit,
+        "grid": {"LOOKAHEAD": [10.0, 20.0, 30.0, 40.0, 60.0, 80.0]},
+        "paths": {"rectangle": _rectangle, "8_shape": _8_shape, "zigzag": _zigzag},
+    },
+    "vector_pursuit": {
+        "module": "pygame_vector_pursuit",
+        "run": _run_pursuit,
+        "grid": {"LOOKAHEAD": [10.0, 15.0, 25.0, 40.0]},
+        "paths": {"zigzag": _zigzag},
+    },
+    "pure_pursuit_revisited": {
+        "module": "pygame_pure_pursuit_revisited",
+        "run": _run_revisited,
+        "grid": {"GAIN_X": [1.0, 1.5, 2.5, 4.0], "MIN_LOOKAHEAD": [5.0, 10.0, 20.0]},
+        "paths": {"rectangle": _rectangle, "8_shape": _8_shape, "zigzag": _zigzag},
+    },
+    "regulated_pure_pursuit": {
+        "module": "pygame_regulated_pure_pursuit",
+        "run": _run_regulated,
+        "grid": {"GAIN_X": [1.0, 1.5, 2.5, 4.0], "MIN_LOOKAHEAD": [5.0, 10.0, 20.0]},
+        "paths": {"sine": _regulated_sine},
+    },
+    "stanley": {
+        "module": "pygame_stanley",
+        "run": _run_stanley,
+        "grid": {"k": [0.5, 1.0, 2.0, 4.0, 8.0]},
+        "paths": {"linear": _road("linear"), "sin": _road("sin"), "circle": _road("circle")},
+    },
+}
+
+# worker 프로세스 상태 (initializer에서 한 번만 설정)
+_worker = {}
+
+def _init_worker(controller, paths):
+    spec = CONTROLLERS[controller]
+    _worker["module"] = importlib.import_module(spec["module"])
+    _worker["run"] = spec["run"]
+    _worker["paths"] = paths
+
+# 파라미터 조합 하나 실행: 모듈 상수를 바꿔서 시뮬레이션하고 원래 값으로 복구
+def _run_one(task):
+    path_name, params, steps = task
+    mod = _worker["module"]
+    saved = {name: getattr(mod, name) for name in params}
+    t0 = time.perf_counter()
+    try:
+        for name, value in params.items():
+            setattr(mod, name, value)
+        trajectory, steer, dt, ref = _worker["run"](mod, _worker["paths"][path_name], steps)
+    finally:
+        for name, value in saved.items():
+            setattr(mod, name, value)
+    metrics = tracking_metrics(trajectory, ref, steer, dt)
+    metrics["wall_time"] = time.perf_counter() - t0
+    return metrics
+
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+# 결과를 열(column) 단위로 저장: .npz는 열마다 배열 하나, .csv는 헤더 + 행
+def save_columns(columns, filename):
+    if filename.endswith(".csv"):
+        names = list(columns)
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(zip(*(columns[n] for n in names)))
+    else:
+        np.savez(filename, **{name: np.asarray(values) for name, values in columns.items()})
+
+# 파라미터 grid x 경로 전체를 process pool로 실행하고 열 단위 결과를 반환 (output이 있으면 저장)
+def run_sweep(controller=CONTROLLER, grid=GRID, paths=PATHS, steps=STEPS, seed=SEED,
+              workers=WORKERS, output=OUTPUT):
+    spec = CONTROLLERS[controller]
+    mod = importlib.import_module(spec["module"])
+    grid = spec["grid"] if grid is None else grid
+    for name in grid:
+        if not hasattr(mod, name):
+            raise ValueError(f"{spec['module']} has no parameter {name!r}")
+    path_names = list(spec["paths"]) if paths is None else list(paths)
+    # 경로는 부모 프로세스에서 한 번 만들어서 worker에 전달 (zigzag도 모든 run에서 동일)
+    built = {name: spec["paths"][name](mod, seed) for name in path_names}
+
+    combos = expand_grid(grid)
+    tasks = [(name, params, steps) for name in path_names for params in combos]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(controller, built)) as pool:
+        results = list(pool.map(_run_one, tasks, chunksize=chunksize))
+
+    columns = {
+        "controller": [controller] * len(tasks),
+        "path": [task[0] for task in tasks],
+    }
+    for name in grid:
+        columns[name] = [float(task[1][name]) for task in tasks]
+    for key in results[0] if results else []:
+        columns[key] = [r.get(key, np.nan) for r in results]
+    if output:
+        save_columns(columns, output)
+    return columns
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    columns = run_sweep()
+    n = len(columns["path"])
+    print(f"{n} runs in {time.perf_counter() - t0:.1f} s -> {OUTPUT}")
+    # 경로별 RMS CTE 최소 조합
+    names = list(GRID or CONTROLLERS[CONTROLLER]["grid"])
+    rms = np.asarray(columns["rms_cte"])
+    for path_name in dict.fromkeys(columns["path"]):
+        rows = [i for i in range(n) if columns["path"][i] == path_name]
+        best = min(rows, key=lambda i: rms[i] if np.isfinite(rms[i]) else np.inf)
+        params = ", ".join(f"{k}={columns[k][best]:g}" for k in names)
+        print(f"{path_name:>10}: {params}  rms_cte={rms[best]:.3f}  max_dev={columns['max_deviation'][best]:.3f}")
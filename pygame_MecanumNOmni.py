@@ -1,6 +1,14 @@
-import pygame
 import math
 import sys
+import numpy as np
+from mobile_robot.kinematics import HolonomicKinematics, integrate_body_twist
+from mobile_robot.loop import FixedTimestep, interpolate_pose
+from mobile_robot.profiler import FrameProfiler
+from mobile_robot.recorder import TrajectoryRecorder
+from mobile_robot.render import ProfilerOverlay
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
 
 mode = "omni3"   # "mecanum" 또는 "omni3"
 
@@ -10,14 +18,24 @@ ROBOT_H = 120
 R = 70   # omni3 삼각형 반경
 WIDTH, HEIGHT = 1000, 700
 FPS = 60
+PHYSICS_DT = 0.001   # 물리 스텝 [s] (1 kHz, 렌더링 FPS와 무관)
+TIME_SCALE = 1.0     # 시뮬레이션 배속 (1: 실시간)
 SPEED = 2.0
 TURN_SPEED = 2.0
-
-# 초기 pose
-x, y = WIDTH // 2, HEIGHT // 2
-theta = 0.0
-
-# 메카넘 휠
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
+
+# 바퀴 구성 행렬은 한 번만 만들어 둠
+MECANUM = HolonomicKinematics.mecanum(ROBOT_H / 2, ROBOT_W / 2)
+OMNI3 = HolonomicKinematics.omni3(R)
+KINEMATICS = {"mecanum": MECANUM, "omni3": OMNI3}
+
+# 매 프레임 한 번 부르는 단일 명령은 닫힌 식으로 (행렬 곱은 simulate/odometry의 batch 계산에서만)
+# 메카넘 휠 (fl, fr, rl, rr)
 def mecanum_wheels(vx, vy, omega):
     L = ROBOT_H / 2
     W = ROBOT_W / 2
@@ -29,16 +47,35 @@ def mecanum_wheels(vx, vy, omega):
     rr = vx - vy + k * omega
     return [fl, fr, rl, rr]
 
-# 옴니 휠
+# 옴니 휠 (구동 방향 cos/sin은 OMNI3 행렬과 같은 값)
+OMNI3_DIRS = [(c, s) for c, s, _ in OMNI3.wheel_matrix.tolist()]
+
 def omni3_wheels(vx, vy, omega):
-    wheel_dirs = [0, 2 * math.pi / 3, 4 * math.pi / 3]
-    speeds = []
+    return [vx * c + vy * s + R * omega for c, s in OMNI3_DIRS]
 
-    for ang in wheel_dirs:
-        v = vx * math.cos(ang) + vy * math.sin(ang) + R * omega
-        speeds.append(v)
+def compute_wheels(vx, vy, omega, mode=mode):
+    if mode == "mecanum":
+        return mecanum_wheels(vx, vy, omega)
+    return omni3_wheels(vx, vy, omega)
 
-    return speeds
+# 로봇 pose update
+def update_pose(x, y, theta, vx, vy, omega, dt):
+    x += (vx * math.cos(theta) - vy * math.sin(theta)) * 100 * dt
+    y += (vx * math.sin(theta) + vy * math.cos(theta)) * 100 * dt
+    theta += omega * dt
+    return x, y, theta
+
+# headless 시뮬레이션: (vx, vy, omega) 명령 배열을 받아 pose와 바퀴 속도를 배열로 반환
+def simulate(commands, mode=mode, dt=1.0 / FPS, x=WIDTH // 2, y=HEIGHT // 2, theta=0.0):
+    commands = np.asarray(commands, dtype=float).reshape(-1, 3)
+    wheels = KINEMATICS[mode].inverse(commands)
+    poses = integrate_body_twist(commands, dt, (x, y, theta), scale=100)
+    return {"pose": poses, "wheel_speed": wheels}
+
+# 엔코더 바퀴 속도 로그 (N,M) -> forward kinematics (pseudo-inverse)로 odometry pose (N,3)
+def odometry(wheel_speeds, mode=mode, dt=1.0 / FPS, x=WIDTH // 2, y=HEIGHT // 2, theta=0.0):
+    twists = KINEMATICS[mode].forward(wheel_speeds)
+    return integrate_body_twist(twists, dt, (x, y, theta), scale=100)
 
 
 def draw_mecanum(screen, x, y, th, wheel_speeds):
@@ -97,46 +134,87 @@ def draw_omni3(screen, x, y, th, wheel_speeds):
         pygame.draw.line(screen,(50,255,255),(vx,vy),(vx+dx,vy+dy),3)
 
 # 메인 루프
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
-running = True
-while running:
-    dt = clock.tick(FPS) / 1000.0
-    screen.fill((25,25,25))
-
-    # 키보드 조작
-    keys = pygame.key.get_pressed()
-    vx = vy = omega = 0.0
-
-    if keys[pygame.K_w]: vx = SPEED
-    if keys[pygame.K_s]: vx = -SPEED
-    if keys[pygame.K_a]: vy = SPEED
-    if keys[pygame.K_d]: vy = -SPEED
-    if keys[pygame.K_q]: omega = -TURN_SPEED
-    if keys[pygame.K_e]: omega = TURN_SPEED
-
-    if mode == "mecanum":
-        wheels = mecanum_wheels(vx, vy, omega)
+def run_window():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    # 초기 pose
+    pose = prev_pose = (WIDTH // 2, HEIGHT // 2, 0.0)
+    stepper = FixedTimestep(PHYSICS_DT, TIME_SCALE)
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    m = KINEMATICS[mode].n_wheels
+    recorder = TrajectoryRecorder(RECORD, [("dt", "f8"), ("x", "f8"), ("y", "f8"), ("theta", "f8"),
+                                           ("vx", "f8"), ("vy", "f8"), ("omega", "f8"), ("wheels", "f8", m)],
+                                  meta={"script": "mecanum_omni", "mode": mode,
+                                        "size": [WIDTH, HEIGHT]}) if RECORD else None
+
+    running = True
+    while running:
+        profiler.start_frame()
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        screen.fill((25,25,25))
+        profiler.mark("background")
+
+        # 키보드 조작
+        keys = pygame.key.get_pressed()
+        vx = vy = omega = 0.0
+
+        if keys[pygame.K_w]: vx = SPEED
+        if keys[pygame.K_s]: vx = -SPEED
+        if keys[pygame.K_a]: vy = SPEED
+        if keys[pygame.K_d]: vy = -SPEED
+        if keys[pygame.K_q]: omega = -TURN_SPEED
+        if keys[pygame.K_e]: omega = TURN_SPEED
+        profiler.mark("events")
+
+        wheels = compute_wheels(vx, vy, omega)
+        profiler.mark("control")
+
+        # 밀린 물리 스텝들을 한 번에 적분 (프레임 동안 명령 유지)
+        n = stepper.advance(frame_time)
+        if n:
+            poses = integrate_body_twist(np.tile((vx, vy, omega), (n, 1)), PHYSICS_DT, pose, scale=100)
+            prev_pose = tuple(poses[-2]) if n > 1 else pose
+            pose = tuple(poses[-1])
+            if recorder:
+                recorder.extend(PHYSICS_DT, poses[:, 0], poses[:, 1], poses[:, 2], vx, vy, omega, wheels)
+        profiler.mark("update")
+
+        # 렌더링은 마지막 두 물리 상태 사이 보간
+        x, y, theta = interpolate_pose(prev_pose, pose, stepper.alpha)
+
+        if mode == "mecanum":
+            draw_mecanum(screen, x, y, theta, wheels)
+        else:
+            draw_omni3(screen, x, y, theta, wheels)
+
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        pygame.display.update()
+        profiler.mark("flip")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+
+if __name__ == "__main__":
+    if HEADLESS:
+        # 예시 명령: 옆으로 이동하면서 회전
+        commands = np.tile([0.0, SPEED, TURN_SPEED], (STEPS, 1))
+        result = simulate(commands)
+        print("steps:", len(result["pose"]), "final pose:", result["pose"][-1])
     else:
-        wheels = omni3_wheels(vx, vy, omega)
-
-    # 로봇 pose update
-    x += (vx * math.cos(theta) - vy * math.sin(theta)) * 100 * dt
-    y += (vx * math.sin(theta) + vy * math.cos(theta)) * 100 * dt
-    theta += omega * dt
-
-    if mode == "mecanum":
-        draw_mecanum(screen, x, y, theta, wheels)
-    else:
-        draw_omni3(screen, x, y, theta, wheels)
-
-    for e in pygame.event.get():
-        if e.type == pygame.QUIT:
-            running = False
-
-    pygame.display.update()
-
-pygame.quit()
-sys.exit()
+        run_window()
+    sys.exit()
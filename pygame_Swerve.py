@@ -1,7 +1,14 @@
-import pygame
 import numpy as np
 import math
 import sys
+from mobile_robot.kinematics import SwerveKinematics, integrate_body_twist
+from mobile_robot.loop import FixedTimestep, interpolate_pose
+from mobile_robot.profiler import FrameProfiler
+from mobile_robot.recorder import TrajectoryRecorder
+from mobile_robot.render import ProfilerOverlay
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
 
 # parameters
 L = 0.625  
@@ -11,49 +18,65 @@ TURN_SPEED = 1.5
 BODY_W = 120   
 BODY_H = 80    
 WIDTH, HEIGHT = 1000, 700
-
-# 초기 상태
-robot_x = WIDTH // 2
-robot_y = HEIGHT // 2
-robot_theta = 0.0
-
+FPS = 60
+PHYSICS_DT = 0.001   # 물리 스텝 [s] (1 kHz, 렌더링 FPS와 무관)
+TIME_SCALE = 1.0     # 시뮬레이션 배속 (1: 실시간, 10: 프레임당 10배 많은 물리 스텝)
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
+
+# 모듈 위치 (body frame, 앞+x / 오른쪽-y): 1 앞오른쪽, 2 앞왼쪽, 3 뒤왼쪽, 4 뒤오른쪽
+MODULE_POSITIONS = [(L / 2, -W / 2), (L / 2, W / 2), (-L / 2, W / 2), (-L / 2, -W / 2)]
+# 모듈 속도 최대 1로 normalize (논문에서 사용)
+SWERVE = SwerveKinematics(MODULE_POSITIONS, max_speed=1.0)
+
+# (vx, vy, omega) -> 모듈별 [angle, speed] 리스트 (M개)
+# 매 프레임 한 번 부르는 스칼라 명령은 직접 계산 (배열 연산 overhead 없이), ndarray 명령 (N,)은 SWERVE로 -> (N,M,2)
 def compute_swerve(vx, vy, omega):
-    LX = L / 2
-    WY = W / 2
-    # 속도 구성요소 
-    v1x = vx + omega * WY
-    v1y = vy + omega * LX
-
-    v2x = vx - omega * WY
-    v2y = vy + omega * LX
-
-    v3x = vx - omega * WY
-    v3y = vy - omega * LX
-
-    v4x = vx + omega * WY
-    v4y = vy - omega * LX
+    if isinstance(vx, np.ndarray) or isinstance(vy, np.ndarray) or isinstance(omega, np.ndarray):
+        angles, speeds = SWERVE.inverse(np.column_stack(np.broadcast_arrays(vx, vy, omega)))
+        return np.stack((angles, speeds), axis=-1)
+    results = []
+    for px, py in MODULE_POSITIONS:
+        mx = vx - omega * py
+        my = vy + omega * px
+        results.append([math.atan2(my, mx), math.sqrt(mx * mx + my * my)])
+    # normalize (논문에서 사용)
+    vmax = max(r[1] for r in results)
+    if vmax > SWERVE.max_speed:
+        for r in results:
+            r[1] = r[1] / vmax * SWERVE.max_speed
+    return results
 
-    wheels = [(v1x, v1y), (v2x, v2y), (v3x, v3y), (v4x, v4y)]
 
-    results = []
-    speeds = []
+# 로봇 pose update
+def update_pose(robot_x, robot_y, robot_theta, vx, vy, omega, dt):
+    robot_x += (vx * math.cos(robot_theta) - vy * math.sin(robot_theta)) * 80 * dt
+    robot_y += (vx * math.sin(robot_theta) + vy * math.cos(robot_theta)) * 80 * dt
+    robot_theta += omega * dt
+    return robot_x, robot_y, robot_theta
 
-    for vx_i, vy_i in wheels:
-        speed = math.sqrt(vx_i**2 + vy_i**2)
-        angle = math.atan2(vy_i, vx_i)
-        results.append([angle, speed])
-        speeds.append(speed)
+# body frame 속도 (N,3) 시퀀스를 한 번에 적분 (update_pose를 반복한 것과 같은 결과) -> pose (N,3)
+def integrate_pose(twists, dt, robot_x, robot_y, robot_theta):
+    return integrate_body_twist(twists, dt, (robot_x, robot_y, robot_theta), scale=80)
 
-    # normalize (논문에서 사용)
-    vmax = max(speeds)
-    if vmax > 1:
-        for r in results:
-            r[1] /= vmax
+# 모듈 angle/speed 로그 (N,M)로부터 최소제곱 forward kinematics로 odometry 계산
+def odometry(angles, speeds, dt=1.0 / FPS, robot_x=WIDTH // 2, robot_y=HEIGHT // 2, robot_theta=0.0):
+    return integrate_pose(SWERVE.forward(angles, speeds), dt, robot_x, robot_y, robot_theta)
 
-    return results
+# headless 시뮬레이션: (vx, vy, omega) 명령 배열을 받아 pose와 바퀴 상태를 배열로 반환
+def simulate(commands, dt=1.0 / FPS, robot_x=WIDTH // 2, robot_y=HEIGHT // 2, robot_theta=0.0):
+    commands = np.asarray(commands, dtype=float).reshape(-1, 3)
+    angles, speeds = SWERVE.inverse(commands)
+    wheels = np.stack((angles, speeds), axis=-1)
+    poses = integrate_pose(commands, dt, robot_x, robot_y, robot_theta)
+    return {"pose": poses, "wheel_states": wheels}
 
 
-def draw_robot(x, y, theta, wheel_states):
+def draw_robot(screen, x, y, theta, wheel_states):
     rect_surface = pygame.Surface((BODY_W, BODY_H), pygame.SRCALPHA)
     rect_surface.fill((70, 70, 70, 180)) 
 
@@ -87,47 +110,92 @@ def draw_robot(x, y, theta, wheel_states):
         pygame.draw.line(screen, (0, 200, 255), (wx, wy), (wx + dx, wy + dy), 4)
         pygame.draw.circle(screen, (255, 255, 255), (int(wx), int(wy)), 8)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Swerve Drive Simulator (Based on Paper)")
-clock = pygame.time.Clock()
-
-running = True
-while running:
-    dt = clock.tick(60) / 1000.0
-    screen.fill((25, 25, 25))
-
-    # 키보드 조작
-    keys = pygame.key.get_pressed()
-    vx = vy = omega = 0
-
-    if keys[pygame.K_w]:
-        vx = SPEED
-    if keys[pygame.K_s]:
-        vx = -SPEED
-    if keys[pygame.K_a]:
-        vy = -SPEED
-    if keys[pygame.K_d]:
-        vy = SPEED
-    if keys[pygame.K_q]:
-        omega = -TURN_SPEED
-    if keys[pygame.K_e]:
-        omega = TURN_SPEED
-
-    wheel_states = compute_swerve(vx, vy, omega)
-
-    # 로봇 pose update
-    robot_x += (vx * math.cos(robot_theta) - vy * math.sin(robot_theta)) * 80 * dt
-    robot_y += (vx * math.sin(robot_theta) + vy * math.cos(robot_theta)) * 80 * dt
-    robot_theta += omega * dt
-
-    draw_robot(robot_x, robot_y, robot_theta, wheel_states)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    pygame.display.update()
-
-pygame.quit()
-sys.exit()
+def run_window():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Swerve Drive Simulator (Based on Paper)")
+    clock = pygame.time.Clock()
+
+    # 초기 상태
+    pose = prev_pose = (WIDTH // 2, HEIGHT // 2, 0.0)
+    stepper = FixedTimestep(PHYSICS_DT, TIME_SCALE)
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    m = SWERVE.n_modules
+    recorder = TrajectoryRecorder(RECORD, [("dt", "f8"), ("x", "f8"), ("y", "f8"), ("theta", "f8"),
+                                           ("vx", "f8"), ("vy", "f8"), ("omega", "f8"),
+                                           ("wheel_angle", "f8", m), ("wheel_speed", "f8", m)],
+                                  meta={"script": "swerve", "size": [WIDTH, HEIGHT],
+                                        "module_positions": MODULE_POSITIONS}) if RECORD else None
+
+    running = True
+    while running:
+        profiler.start_frame()
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        screen.fill((25, 25, 25))
+        profiler.mark("background")
+
+        # 키보드 조작
+        keys = pygame.key.get_pressed()
+        vx = vy = omega = 0
+
+        if keys[pygame.K_w]:
+            vx = SPEED
+        if keys[pygame.K_s]:
+            vx = -SPEED
+        if keys[pygame.K_a]:
+            vy = -SPEED
+        if keys[pygame.K_d]:
+            vy = SPEED
+        if keys[pygame.K_q]:
+            omega = -TURN_SPEED
+        if keys[pygame.K_e]:
+            omega = TURN_SPEED
+        profiler.mark("events")
+
+        wheel_states = compute_swerve(vx, vy, omega)
+        profiler.mark("control")
+
+        # 이번 프레임에 밀린 물리 스텝들을 한 번에 적분 (명령은 프레임 동안 유지)
+        n = stepper.advance(frame_time)
+        if n:
+            poses = integrate_pose(np.tile((vx, vy, omega), (n, 1)), PHYSICS_DT, *pose)
+            prev_pose = tuple(poses[-2]) if n > 1 else pose
+            pose = tuple(poses[-1])
+            if recorder:
+                wheels = np.asarray(wheel_states)
+                recorder.extend(PHYSICS_DT, poses[:, 0], poses[:, 1], poses[:, 2], vx, vy, omega,
+                                wheels[:, 0], wheels[:, 1])
+        profiler.mark("update")
+
+        # 마지막 두 물리 상태 사이를 보간해서 그림
+        robot_x, robot_y, robot_theta = interpolate_pose(prev_pose, pose, stepper.alpha)
+        draw_robot(screen, robot_x, robot_y, robot_theta, wheel_states)
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        pygame.display.update()
+        profiler.mark("flip")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+
+if __name__ == "__main__":
+    if HEADLESS:
+        # 예시 명령: 전진하면서 회전
+        commands = np.tile([SPEED, 0.0, TURN_SPEED], (STEPS, 1))
+        result = simulate(commands)
+        print("steps:", len(result["pose"]), "final pose:", result["pose"][-1])
+    else:
+        run_window()
+    sys.exit()
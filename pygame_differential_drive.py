@@ -1,22 +1,29 @@
-import pygame
 import math
 import numpy as np
+from mobile_robot.kinematics import diff_drive_rollout, diff_drive_twist, unicycle_step
+from mobile_robot.loop import FixedTimestep, interpolate_pose
+from mobile_robot.profiler import FrameProfiler
+from mobile_robot.recorder import TrajectoryRecorder
+from mobile_robot.render import ProfilerOverlay, TrailLayer
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
 
 # Parameters
 r = 0.05    # wheel radius [m]
 a = 0.2     # half wheel spacing [m]
-dt = 0.02
+dt = 0.02   # 물리 스텝 [s] (렌더링 FPS와 무관, 예: 0.001 -> 1 kHz)
 scale = 200
 WIDTH, HEIGHT = 900, 700
-
-x, y, theta = 0.0, 0.0, 0.0
-path = []
-phi_r_dot = 0.0
-phi_l_dot = 0.0
-
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+FPS = 60          # 렌더링 FPS
+TIME_SCALE = 1.0  # 시뮬레이션 배속 (1: 실시간)
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+SCENARIO = 5
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
 
 # 좌표변환 
 def world_to_screen(wx, wy):
@@ -82,46 +89,103 @@ def select_scenario(num):
         phi_l_dot = -2.0 
         return phi_r_dot, phi_l_dot
 
-# 메인 루프
-running = True
-while running:
-    for e in pygame.event.get():
-        if e.type == pygame.QUIT:
-            running = False
-
-    # 시나리오 선택
-    phi_r_dot, phi_l_dot = select_scenario(5)
-
-
-    # 자코비안
-    J = np.array([
-        [(r/2)*math.cos(theta), (r/2)*math.cos(theta)],
-        [(r/2)*math.sin(theta), (r/2)*math.sin(theta)],
-        [(r/(2*a)),             -(r/(2*a))]
-    ])
-    
-    dq = np.array([phi_r_dot, phi_l_dot])
-    dx, dy, dtheta = J @ dq
-
-    x += dx*dt
-    y += dy*dt
-    theta += dtheta*dt
-
-    # theta 정규화
-    theta = (theta + math.pi) % (2*math.pi) - math.pi
+# pose 업데이트
+# 자코비안 J = [[r/2 cos, r/2 cos], [r/2 sin, r/2 sin], [r/(2a), -r/(2a)]] 를 (v, omega)로 풀어 쓰고
+# dt 동안 바퀴 속도가 일정하다고 보고 원호를 따라 정확하게 적분 (배열 생성 없음)
+def update_pose(x, y, theta, phi_r_dot, phi_l_dot, dt=dt):
+    v, omega = diff_drive_twist(phi_r_dot, phi_l_dot, r, a)
+    return unicycle_step(x, y, theta, v, omega, dt)
+
+# headless 시뮬레이션: pose 궤적과 바퀴 입력을 배열로 반환
+def simulate(scenario=SCENARIO, steps=STEPS, x=0.0, y=0.0, theta=0.0):
+    poses = np.empty((steps, 3))
+    wheels = np.empty((steps, 2))
+    for n in range(steps):
+        phi_r_dot, phi_l_dot = select_scenario(scenario)
+        x, y, theta = update_pose(x, y, theta, phi_r_dot, phi_l_dot)
+        poses[n] = x, y, theta
+        wheels[n] = phi_r_dot, phi_l_dot
+    return {"pose": poses, "wheel_speed": wheels}
+
+# 여러 시나리오를 한 번에 rollout: (len(scenarios), steps, 3) pose 배열
+def scenario_wheel_speeds(scenarios, steps=STEPS):
+    speeds = np.array([select_scenario(num) for num in scenarios], dtype=float)
+    return np.repeat(speeds[:, None, :], steps, axis=1)
+
+def rollout(wheel_speeds, pose0=(0.0, 0.0, 0.0), dt=dt):
+    return diff_drive_rollout(wheel_speeds, r, a, dt, pose0)
 
-    # 경로기록
-    path.append((x, y))
-
-    screen.fill((25,25,30))
-
-    if len(path) > 1:
-        pts = [world_to_screen(px,py) for px,py in path]
-        pygame.draw.lines(screen, (70,150,255), False, pts, 2)
-
-    draw_robot(screen, x, y, theta)
-
-    pygame.display.flip()
-    clock.tick(int(1/dt))
-
-pygame.quit()
+# 메인 루프
+def run_window(scenario=SCENARIO):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    x, y, theta = 0.0, 0.0, 0.0
+    trail = TrailLayer((WIDTH, HEIGHT), (70,150,255), 2)
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    recorder = TrajectoryRecorder(RECORD, [("x", "f8"), ("y", "f8"), ("theta", "f8"),
+                                           ("phi_r_dot", "f8"), ("phi_l_dot", "f8")],
+                                  meta={"script": "differential_drive", "size": [WIDTH, HEIGHT], "scale": scale,
+                                        "r": r, "a": a, "dt": dt, "scenario": scenario}) if RECORD else None
+
+    stepper = FixedTimestep(dt, TIME_SCALE)
+    prev = (x, y, theta)
+    frame_time = 0.0
+
+    running = True
+    while running:
+        profiler.start_frame()
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        # 지난 프레임 시간만큼 dt 간격으로 적분
+        for _ in range(stepper.advance(frame_time)):
+            prev = (x, y, theta)
+
+            # 시나리오 선택
+            phi_r_dot, phi_l_dot = select_scenario(scenario)
+            profiler.mark("control")
+
+            x, y, theta = update_pose(x, y, theta, phi_r_dot, phi_l_dot)
+            profiler.mark("update")
+
+            # 경로기록
+            trail.add(world_to_screen(x, y))
+            if recorder:
+                recorder.append(x, y, theta, phi_r_dot, phi_l_dot)
+            profiler.mark("trajectory")
+
+        screen.fill((25,25,30))
+        profiler.mark("background")
+
+        trail.draw(screen)
+        profiler.mark("trajectory")
+
+        # 마지막 두 스텝 사이를 보간해서 그림
+        draw_robot(screen, *interpolate_pose(prev, (x, y, theta), stepper.alpha))
+
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+
+if __name__ == "__main__":
+    if HEADLESS:
+        result = simulate()
+        print("steps:", len(result["pose"]), "final pose:", result["pose"][-1])
+    else:
+        run_window()
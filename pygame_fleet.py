@@ -0,0 +1,225 @@
+import time
+
+import numpy as np
+from mobile_robot import FrameProfiler, SpatialHash, update_robots_batch
+from mobile_robot.controllers import regulated_speed_batch
+from mobile_robot.fleet import PathSet, fleet_pursuit, robot_clearance
+from mobile_robot.loop import FixedTimestep
+from mobile_robot.render import ProfilerOverlay, StaticLayer, draw_grid
+from mobile_robot.pathgen import circle, load_path
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
+
+# parameters
+WIDTH, HEIGHT = 1000, 700
+CONTROLLER = "regulated"   # "regulated": 교점 목표 + 곡률/근접 감속,  "pure_pursuit": lookahead 밖 waypoint + 근접 감속
+SCENARIO = "loops"         # "loops": 겹친 사각형 루프 + 8자 (공유 경로),  "individual": 로봇마다 자기 원 경로
+FLEET_SIZE = 1000
+ROBOT_RADIUS = 3.0
+WHEELBASE = 6.0
+MAX_SPEED = 1.5      # [px/스텝]
+MIN_SPEED = 0.0      # 0: 앞 로봇에 막히면 정지
+LOOKAHEAD = 15.0     # pure_pursuit lookahead
+MIN_LOOKAHEAD = 10.0
+GAIN_X = 8.0         # regulated: lookahead = max(MIN_LOOKAHEAD, GAIN_X * 속도)
+T = MAX_SPEED        # regulated 곡률 제한 (regulated_speed의 tmax)
+GAIN_OBST = 1.0
+PROX_DIST = 20.0     # 앞 로봇과 여유 거리가 이보다 작으면 감속
+FOV = np.radians(90)   # 앞 로봇으로 보는 범위 (heading 기준 ±FOV/2)
+WINDOW = 16          # 로봇마다 최근접 인덱스부터 검색할 waypoint 수 (lookahead + 한 스텝 이동을 덮어야 함)
+LANES = 8            # loops: 사각형 루프 수
+LANE_GAP = 14        # loops: 사각형 루프 간격 [px]
+SEED = 0             # individual 경로 / 배치 seed
+FPS = 60           # 렌더링 FPS
+STEP_RATE = 60     # 시뮬레이션 스텝/초 (렌더링과 독립)
+TIME_SCALE = 1.0   # 시뮬레이션 배속
+HEADING_BINS = 32  # 로봇 sprite 방향 개수
+HUD_EVERY = 15     # HUD 텍스트를 다시 그리는 프레임 간격
+HEADLESS = False   # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000       # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+
+# 속도 비율 (speed / MAX_SPEED) 구간별 로봇 색: 정지 ~ 최고 속도
+SPEED_COLORS = [(220, 40, 40), (240, 150, 30), (230, 220, 40), (40, 200, 80)]
+# 프레임 단계 (update: 제어+근접도+이동, robots: sprite blits, overlay: HUD+profiler)
+PHASES = ("events", "update", "background", "robots", "overlay", "flip", "wait")
+
+
+# 경로와 로봇 배치: PathSet, path_ids (N,), 로컬 인덱스 (N,)
+# loops: 안쪽으로 LANE_GAP씩 줄어드는 사각형 LANES개와 그 위를 가로지르는 8자에 경로 길이 비율로 고르게 배치
+# individual: 화면 안 임의의 원 (반지름/방향도 임의), 로봇마다 하나씩
+def make_fleet(scenario=SCENARIO, n=FLEET_SIZE, seed=SEED):
+    rng = np.random.default_rng(seed)
+    if scenario == "loops":
+        paths = [load_path("rectangle", x0=100 + k * LANE_GAP, y0=100 + k * LANE_GAP,
+                           x1=900 - k * LANE_GAP, y1=600 - k * LANE_GAP, step=2) for k in range(LANES)]
+        paths.append(load_path("figure_eight", ax=380, ay=220, n=1200))
+        paths = PathSet(paths)
+        lengths = np.array([p.length for p in paths.paths])
+        counts = np.floor(n * lengths / lengths.sum()).astype(int)
+        counts[:n - counts.sum()] += 1
+        path_ids = np.repeat(np.arange(len(paths)), counts)
+        index = np.concatenate([np.arange(c) * size // max(c, 1) for c, size in zip(counts, paths.sizes)])
+    elif scenario == "individual":
+        radius = rng.uniform(40, 160, n)
+        cx = rng.uniform(radius, WIDTH - radius)
+        cy = rng.uniform(np.minimum(radius, HEIGHT / 2), np.maximum(HEIGHT - radius, HEIGHT / 2))
+        paths = []
+        for r, x, y, reverse in zip(radius, cx, cy, rng.random(n) < 0.5):
+            pts = circle(x, y, r, n=max(16, int(2 * np.pi * r / 4)), endpoint=False)
+            paths.append(pts[::-1] if reverse else pts)
+        paths = PathSet(paths)
+        path_ids = np.arange(n)
+        index = (rng.random(n) * paths.sizes).astype(np.int64)
+    else:
+        raise ValueError(f"unknown scenario {scenario!r}")
+    return paths, path_ids, index
+
+
+# fleet 상태 (로봇별 배열): 위치, yaw, 속도, 최근접 인덱스
+class FleetState:
+    def __init__(self, paths, path_ids, index):
+        self.paths = paths
+        self.path_ids = path_ids
+        self.positions, self.yaws = paths.pose_at(path_ids, index)
+        self.speeds = np.full(len(path_ids), MAX_SPEED)
+        self.deltas = np.zeros(len(path_ids))
+        self.nearest = np.asarray(index, dtype=np.int64)
+        self.grid = SpatialHash(PROX_DIST + 2 * ROBOT_RADIUS)
+        self.collisions = 0
+
+
+# 한 스텝: 조향각 -> 앞 로봇 근접도 (spatial hash) -> 감속 -> bicycle 모델 이동
+def step_fleet(state, controller=CONTROLLER):
+    regulated = controller == "regulated"
+    lookahead = np.maximum(MIN_LOOKAHEAD, GAIN_X * state.speeds) if regulated else LOOKAHEAD
+    state.deltas, _, state.nearest = fleet_pursuit(state.positions, state.yaws, state.paths, state.path_ids,
+                                                   state.nearest, lookahead, WHEELBASE, WINDOW, intersect=regulated)
+    clearance, state.collisions = robot_clearance(state.positions, state.yaws, ROBOT_RADIUS,
+                                                  PROX_DIST + 2 * ROBOT_RADIUS, FOV, state.grid)
+    state.speeds = regulated_speed_batch(MAX_SPEED, state.deltas if regulated else None, clearance, WHEELBASE,
+                                         T, PROX_DIST, MIN_SPEED, GAIN_OBST)
+    update_robots_batch(state.positions, state.yaws, state.deltas, state.speeds, WHEELBASE)
+
+
+# 혼잡도 지표: 평균 속도 비율, 정지한 로봇 비율 (속도 < 5% MAX_SPEED), 겹친 쌍 수
+def fleet_stats(state):
+    ratio = state.speeds / MAX_SPEED
+    return float(ratio.mean()), float(np.mean(ratio < 0.05)), state.collisions
+
+
+# headless 시뮬레이션: (steps, N, ...) 배열과 스텝별 혼잡도 지표
+def simulate(steps=STEPS, controller=CONTROLLER, scenario=SCENARIO, n=FLEET_SIZE, seed=SEED):
+    state = FleetState(*make_fleet(scenario, n, seed))
+    trajectory = np.empty((steps, n, 2))
+    yaws = np.empty((steps, n))
+    speeds = np.empty((steps, n))
+    stats = np.empty((steps, 3))
+    for k in range(steps):
+        step_fleet(state, controller)
+        trajectory[k] = state.positions
+        yaws[k] = state.yaws
+        speeds[k] = state.speeds
+        stats[k] = fleet_stats(state)
+    return {"trajectory": trajectory, "yaw": yaws, "speed": speeds, "mean_speed": stats[:, 0],
+            "stopped": stats[:, 1], "collisions": stats[:, 2]}
+
+
+# 정적 배경: 격자와 모든 경로 (StaticLayer로 한 번만 그림)
+def draw_background(surf, paths):
+    draw_grid(surf, (225, 225, 225))
+    for p in paths.paths:
+        pygame.draw.lines(surf, (170, 170, 190), p.closed, p.points, 1)
+
+
+# (속도 구간, 방향 구간)별 로봇 삼각형 sprite를 미리 그려 둠: sprites[color * HEADING_BINS + heading]
+def make_sprites(radius=ROBOT_RADIUS):
+    size = int(2 * radius + 3)
+    c = size / 2
+    sprites = np.empty(len(SPEED_COLORS) * HEADING_BINS, dtype=object)
+    for i, color in enumerate(SPEED_COLORS):
+        for k in range(HEADING_BINS):
+            a = 2 * np.pi * k / HEADING_BINS
+            pts = [(c + r * np.cos(a + da), c + r * np.sin(a + da)) for r, da in
+                   ((1.6 * radius, 0.0), (radius, 2.5), (radius, -2.5))]
+            surf = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.polygon(surf, color, pts)
+            sprites[i * HEADING_BINS + k] = surf.convert_alpha()
+    return sprites, c
+
+
+def run_window(controller=CONTROLLER, scenario=SCENARIO, n=FLEET_SIZE, seed=SEED):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("monospace", 14)
+
+    state = FleetState(*make_fleet(scenario, n, seed))
+    background = StaticLayer((WIDTH, HEIGHT), lambda surf: draw_background(surf, state.paths))
+    sprites, half = make_sprites()
+    profiler = FrameProfiler(PHASES, enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler, pos=(10, 40)) if PROFILE_OVERLAY else None
+    stepper = FixedTimestep(1.0 / STEP_RATE, TIME_SCALE)
+    prev = state.positions.copy()
+    hud = None
+    frame = 0
+    frame_time = 0.0
+
+    running = True
+    while running:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        # 지난 프레임 동안 쌓인 시간만큼 고정 간격 스텝 진행
+        for _ in range(stepper.advance(frame_time)):
+            prev = state.positions.copy()
+            step_fleet(state, controller)
+            profiler.mark("update")
+
+        background.draw(screen)
+        profiler.mark("background")
+
+        # 로봇 전체를 blits 한 번으로: 위치는 마지막 두 스텝 사이 보간, sprite는 속도/방향 구간으로 선택
+        pos = prev + (state.positions - prev) * stepper.alpha - half
+        color = np.minimum((state.speeds / MAX_SPEED * len(SPEED_COLORS)).astype(int), len(SPEED_COLORS) - 1)
+        heading = np.round(state.yaws / (2 * np.pi) * HEADING_BINS).astype(int) % HEADING_BINS
+        screen.blits(zip(sprites[color * HEADING_BINS + heading], pos.astype(int).tolist()), doreturn=False)
+        profiler.mark("robots")
+
+        if hud is None or frame % HUD_EVERY == 0:
+            mean_speed, stopped, collisions = fleet_stats(state)
+            hud = font.render(f"{n} robots  {controller}  speed {100 * mean_speed:5.1f}%  "
+                              f"stopped {100 * stopped:5.1f}%  overlaps {collisions:4d}  "
+                              f"fps {clock.get_fps():5.1f}", True, (0, 0, 0), (255, 255, 255))
+        screen.blit(hud, (10, 10))
+        frame += 1
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    pygame.quit()
+    profiler.report(PROFILE_DUMP)
+
+
+if __name__ == "__main__":
+    if HEADLESS:
+        t0 = time.perf_counter()
+        result = simulate()
+        elapsed = time.perf_counter() - t0
+        print(f"{FLEET_SIZE} robots x {STEPS} steps in {elapsed:.2f} s ({elapsed / STEPS * 1e3:.2f} ms/step)")
+        print(f"mean speed {100 * result['mean_speed'][-1]:.1f}%  stopped {100 * result['stopped'][-1]:.1f}%  "
+              f"overlapping pairs {int(result['collisions'][-1])}")
+    else:
+        run_window()
@@ -1,7 +1,16 @@
-import pygame
 import numpy as np
-import math
-import random
+from mobile_robot import (FrameProfiler, PathTracker, as_path, cross_track_error_batch, pure_pursuit_batch,
+                          update_robots_batch)
+from mobile_robot import controllers
+from mobile_robot.kinematics import bicycle_step
+from mobile_robot.loop import FixedTimestep, MultiRateScheduler, interpolate_pose
+from mobile_robot.sensor import PoseSensor
+from mobile_robot.render import ProfilerOverlay, StaticLayer, TrailLayer, draw_grid
+from mobile_robot.recorder import PURSUIT_FIELDS, TrajectoryRecorder
+from mobile_robot.pathgen import load_path
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
 
 # parameters
 WIDTH, HEIGHT = 1000, 700
@@ -9,106 +18,205 @@ ROBOT_SIZE = 15
 LOOKAHEAD = 40.0  # lookahead distance # 이것을 바꾸면서 시뮬레이션 진행
 SPEED = 2.0        
 WHEELBASE = 20     
-
-def pure_pursuit(robot_pos, robot_yaw, path, lookahead):
-    dists = [np.linalg.norm(np.array(robot_pos) - np.array(p)) for p in path]
-    nearest_index = np.argmin(dists)
-
-    Ld = lookahead
-    target = path[-1]
-    for i in range(nearest_index, len(path)):
-        if np.linalg.norm(np.array(robot_pos) - np.array(path[i])) > Ld:
-            target = path[i]
-            break
-
-    dx = target[0] - robot_pos[0]
-    dy = target[1] - robot_pos[1]
-    angle_to_target = math.atan2(dy, dx)
-    alpha = angle_to_target - robot_yaw
-    alpha = math.atan2(math.sin(alpha), math.cos(alpha))
-
-    delta = math.atan2(2 * WHEELBASE * math.sin(alpha) / Ld, 1)
-
-    return delta, target
+FPS = 60           # 렌더링 FPS
+STEP_RATE = 60     # 시뮬레이션 스텝/초 (제어+이동 한 스텝, 렌더링과 독립)
+TIME_SCALE = 1.0   # 시뮬레이션 배속 (1: 실시간, 렌더링 프레임당 여러 스텝도 가능)
+CONTROL_RATE = None        # 제어기 실행 rate [Hz] (None: 매 스텝), 사이 스텝은 마지막 조향각 유지
+SENSOR_RATE = None         # pose 측정 rate [Hz] (None: 매 스텝)
+SENSOR_NOISE = (0.0, 0.0)  # 측정 노이즈 표준편차 (위치 [px], yaw [rad])
+CTE_RELOCALIZE = 10.0      # simulate_batch cte: 최근접 waypoint가 이보다 멀면 전역 검색 [px] (교차 경로에서 다른 가지 오차의 상한)
+HEADLESS = False   # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000       # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+SEED = 0          # zigzag 경로 seed
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
+
+def pure_pursuit(robot_pos, robot_yaw, path, lookahead, tracker=None):
+    return controllers.pure_pursuit(robot_pos, robot_yaw, path, lookahead, WHEELBASE, tracker)
+
+# 로봇 움직임 업데이트
+def update_robot(x, y, yaw, delta, speed=SPEED):
+    return bicycle_step(x, y, yaw, delta, speed, WHEELBASE)
+
+# headless 시뮬레이션: 궤적과 제어 출력을 배열로 반환
+# control_rate/sensor_rate [Hz]는 STEP_RATE 기준 (None: 매 스텝)
+def simulate(path, steps=STEPS, robot_pos=(150.0, 150.0), robot_yaw=0.0, lookahead=LOOKAHEAD,
+             control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE, sensor_noise=SENSOR_NOISE, seed=0):
+    x, y = float(robot_pos[0]), float(robot_pos[1])
+    yaw = float(robot_yaw)
+    path = as_path(path)
+    tracker = PathTracker(path)
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": sensor_rate, "control": control_rate})
+    sensor = PoseSensor(sensor_noise, seed)
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    deltas = np.empty(steps)
+    targets = np.empty((steps, 2))
+    for n in range(steps):
+        if scheduler.due("sensor"):
+            mx, my, myaw = sensor.measure(x, y, yaw)
+        if scheduler.due("control"):
+            delta, target = pure_pursuit((mx, my), myaw, path, lookahead, tracker)
+        x, y, yaw = update_robot(x, y, yaw, delta)
+        scheduler.tick()
+        trajectory[n] = x, y
+        yaws[n] = yaw
+        deltas[n] = delta
+        targets[n] = target
+    return {"trajectory": trajectory, "yaw": yaws, "delta": deltas, "target": targets}
+
+# N대 로봇 headless 시뮬레이션: positions (N,2), yaws (N,) -> (steps, N, ...) 배열
+# speeds: 스칼라 또는 로봇별 (N,),  센서 노이즈는 로봇마다 다른 realization (같은 seed면 재현)
+# 제어/센서 주기는 모든 로봇이 같은 schedule, cte: 실제 위치 기준 부호 있는 cross-track error
+def simulate_batch(path, positions, yaws, steps=STEPS, lookahead=LOOKAHEAD, window=64, speeds=SPEED,
+                   control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE, sensor_noise=SENSOR_NOISE, seed=0,
+                   cte_relocalize=CTE_RELOCALIZE):
+    path = as_path(path)
+    positions = np.array(positions, dtype=float)
+    yaws = np.array(yaws, dtype=float)
+    n_robots = len(positions)
+    speeds = np.broadcast_to(np.asarray(speeds, dtype=float), (n_robots,))
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": sensor_rate, "control": control_rate})
+    pos_std, yaw_std = sensor_noise
+    rng = np.random.default_rng(seed)
+    trajectory = np.empty((steps, n_robots, 2))
+    yaw_hist = np.empty((steps, n_robots))
+    deltas = np.empty((steps, n_robots))
+    targets = np.empty((steps, n_robots, 2))
+    cte = np.empty((steps, n_robots))
+    nearest = cte_nearest = None  # 첫 스텝은 전역 검색, 이후에는 이전 최근접 인덱스 주변만 검색
+    for n in range(steps):
+        if scheduler.due("sensor"):
+            if pos_std or yaw_std:
+                m_pos = positions + rng.normal(0.0, pos_std, (n_robots, 2))
+                m_yaw = yaws + rng.normal(0.0, yaw_std, n_robots)
+            else:
+                m_pos, m_yaw = positions.copy(), yaws.copy()
+        if scheduler.due("control"):
+            delta, target, nearest = pure_pursuit_batch(m_pos, m_yaw, path, lookahead, WHEELBASE,
+                                                        nearest, window)
+        update_robots_batch(positions, yaws, delta, speeds, WHEELBASE)
+        scheduler.tick()
+        trajectory[n] = positions
+        yaw_hist[n] = yaws
+        deltas[n] = delta
+        targets[n] = target
+        cte[n], cte_nearest = cross_track_error_batch(positions, path, cte_nearest, window,
+                                                      relocalize_dist=cte_relocalize)
+    return {"trajectory": trajectory, "yaw": yaw_hist, "delta": deltas, "target": targets, "cte": cte}
 
 # 경로 만들기 
 def generate_rectangle():
-    path = []
-    for x in range(100, 900): path.append((x, 100))
-    for y in range(100, 500): path.append((900, y))
-    for x in range(900, 100, -1): path.append((x, 500))
-    for y in range(500, 100, -1): path.append((100, y))
-    return path
+    return load_path("rectangle")
 
 def generate_8_shape():
-    t = np.linspace(0, 2*np.pi, 800)
-    path = []
-    for i in t:
-        x = 500 + 300 * math.sin(i)
-        y = 350 + 150 * math.sin(i) * math.cos(i)
-        path.append((x, y))
-    return path
-
-def generate_zigzag():
-    path = []
-    x = 100
-    y = 350
-    while x < 900:
-        x += 20
-        y += random.randint(-50, 50)
-        y = max(100, min(600, y))
-        path.append((x, y))
-    return path
-
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
-# 경로 생성 
-# path = generate_rectangle()     
-# path = generate_8_shape()
-path = generate_zigzag()
-
-robot_pos = [150, 150]
-robot_yaw = 0.0
-trajectory = []   # 로봇이 지나간 궤적 저장
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    delta, target = pure_pursuit(robot_pos, robot_yaw, path, LOOKAHEAD)
-
-    # 로봇 움직임 업데이트
-    robot_yaw += math.tan(delta) * SPEED / WHEELBASE
-    robot_pos[0] += SPEED * math.cos(robot_yaw)
-    robot_pos[1] += SPEED * math.sin(robot_yaw)
-
-    trajectory.append((robot_pos[0], robot_pos[1]))
-
-    screen.fill((255, 255, 255)) 
+    return load_path("figure_eight")
+
+def generate_zigzag(seed=SEED):
+    return load_path("zigzag", seed=seed, step=20)
 
+# 정적 배경: 격자와 경로 (StaticLayer로 한 번만 그림)
+def draw_background(surf, path):
     # 맵생성
-    grid_size = 50
-    for x in range(0, WIDTH, grid_size):
-        pygame.draw.line(screen, (60, 60, 60), (x, 0), (x, HEIGHT), 1)
-    for y in range(0, HEIGHT, grid_size):
-        pygame.draw.line(screen, (60, 60, 60), (0, y), (WIDTH, y), 1)
+    draw_grid(surf, (60, 60, 60))
 
     # 경로 두께 조절
-    pygame.draw.lines(screen, (0, 0, 0), False, path, 3)
-
-
-    # 로봇 경로 표시
-    if len(trajectory) > 1:
-        pygame.draw.lines(screen, (255, 0, 0), False, trajectory, 2)
-
-    pygame.draw.circle(screen, (0, 255, 255), (int(target[0]), int(target[1])), 5)
-    pygame.draw.circle(screen, (255, 255, 0), (int(robot_pos[0]), int(robot_pos[1])), ROBOT_SIZE)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
+    pygame.draw.lines(surf, (0, 0, 0), False, path.points, 3)
+
+def run_window(path):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    robot_pos = [150, 150]
+    robot_yaw = 0.0
+    trail = TrailLayer((WIDTH, HEIGHT), (255, 0, 0), 2)
+    path = as_path(path)
+    tracker = PathTracker(path)
+    cte_tracker = PathTracker(path)   # 기록용 cross-track error (제어기 tracker 상태와 분리)
+    background = StaticLayer((WIDTH, HEIGHT), lambda surf: draw_background(surf, path))
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    recorder = TrajectoryRecorder(RECORD, PURSUIT_FIELDS, static={"path": path.points},
+                                  meta={"script": "pure_pursuit", "size": [WIDTH, HEIGHT], "robot_size": ROBOT_SIZE,
+                                        "lookahead": LOOKAHEAD, "step_time": 1.0 / STEP_RATE}) if RECORD else None
+
+    stepper = FixedTimestep(1.0 / STEP_RATE, TIME_SCALE)
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": SENSOR_RATE, "control": CONTROL_RATE})
+    sensor = PoseSensor(SENSOR_NOISE)
+    delta, target = 0.0, path[0]
+    prev = (robot_pos[0], robot_pos[1], robot_yaw)
+    frame_time = 0.0
+
+    running = True
+    while running:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        # 지난 프레임 동안 쌓인 시간만큼 고정 간격 스텝 진행
+        for _ in range(stepper.advance(frame_time)):
+            prev = (robot_pos[0], robot_pos[1], robot_yaw)
+            # 센서/제어기는 각자의 rate로, 사이 스텝에서는 마지막 값 유지
+            if scheduler.due("sensor"):
+                mx, my, myaw = sensor.measure(robot_pos[0], robot_pos[1], robot_yaw)
+            if scheduler.due("control"):
+                delta, target = pure_pursuit((mx, my), myaw, path, LOOKAHEAD, tracker)
+            profiler.mark("control")
+
+            # 로봇 움직임 업데이트
+            robot_pos[0], robot_pos[1], robot_yaw = update_robot(robot_pos[0], robot_pos[1], robot_yaw, delta)
+            scheduler.tick()
+            profiler.mark("update")
+
+            trail.add((robot_pos[0], robot_pos[1]))
+            if recorder:
+                recorder.append(robot_pos[0], robot_pos[1], robot_yaw, delta, SPEED, target[0], target[1],
+                                cte_tracker.cross_track_error(robot_pos))
+            profiler.mark("trajectory")
+
+        # 배경 (격자, 경로)
+        background.draw(screen)
+        profiler.mark("background")
+
+        # 로봇 경로 표시
+        trail.draw(screen)
+        profiler.mark("trajectory")
+
+        # 로봇은 마지막 두 스텝 사이를 보간해서 표시
+        x, y, _ = interpolate_pose(prev, (robot_pos[0], robot_pos[1], robot_yaw), stepper.alpha)
+        pygame.draw.circle(screen, (0, 255, 255), (int(target[0]), int(target[1])), 5)
+        pygame.draw.circle(screen, (255, 255, 0), (int(x), int(y)), ROBOT_SIZE)
+
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+    if CONTROL_RATE or SENSOR_RATE:
+        scheduler.report()
+
+if __name__ == "__main__":
+    # 경로 생성 
+    # path = generate_rectangle()     
+    # path = generate_8_shape()
+    path = generate_zigzag()
+
+    if HEADLESS:
+        result = simulate(path)
+        print("steps:", len(result["trajectory"]), "final pos:", result["trajectory"][-1])
+    else:
+        run_window(path)
@@ -1,7 +1,16 @@
-import pygame
 import numpy as np
-import math
-import random
+from mobile_robot import FrameProfiler, PathTracker, as_path
+from mobile_robot import controllers
+from mobile_robot.kinematics import bicycle_step
+from mobile_robot.loop import FixedTimestep, MultiRateScheduler, interpolate_pose
+from mobile_robot.sensor import PoseSensor
+from mobile_robot.render import ProfilerOverlay, StaticLayer, TrailLayer, draw_grid
+from mobile_robot.recorder import PURSUIT_FIELDS, TrajectoryRecorder
+from mobile_robot.pathgen import load_path
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
+kernels = lazy_import("mobile_robot.kernels")   # numba import는 simulate를 처음 부를 때
 
 # parameters
 WIDTH, HEIGHT = 1000, 700
@@ -9,6 +18,22 @@ ROBOT_SIZE = 15
 MIN_LOOKAHEAD = 10.0
 WHEELBASE = 20
 GAIN_X = 1.5 # 4.0
+MAX_SPEED = 4.0   # 조향각 0일 때 속도
+MIN_SPEED = 1.0   # 조향각이 1 rad 이상일 때 속도
+FPS = 60          # 렌더링 FPS
+STEP_RATE = 60    # 시뮬레이션 스텝/초 (렌더링과 독립)
+TIME_SCALE = 1.0  # 시뮬레이션 배속
+CONTROL_RATE = None        # 제어기(조향각+속도) 실행 rate [Hz] (None: 매 스텝), 사이에는 마지막 명령 유지
+SENSOR_RATE = None         # pose 측정 rate [Hz] (None: 매 스텝)
+SENSOR_NOISE = (0.0, 0.0)  # 측정 노이즈 표준편차 (위치 [px], yaw [rad])
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+SEED = 0          # zigzag 경로 seed
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
+JIT = True      # True: numba가 있으면 headless 시뮬레이션 루프 전체를 컴파일된 kernel로 (없으면 NumPy 경로)
 
 # 최소값 보장
 def dynamic_lookahead(speed):
@@ -16,182 +41,173 @@ def dynamic_lookahead(speed):
 
 # 조향각에 따른 속도 변화
 def update_velocity(delta):
-    max_speed = 4.0
-    min_speed = 1.0
     factor = max(0.0, 1.0 - abs(delta)) 
-    speed = min_speed + (max_speed - min_speed) * factor  # delta가 커질수록 속도를 줄임 
+    speed = MIN_SPEED + (MAX_SPEED - MIN_SPEED) * factor  # delta가 커질수록 속도를 줄임 
     return speed
 
-def linear_Interpolation(center, radius, p0, p1):
-    center = np.array(center, dtype=float)
-    p0 = np.array(p0, dtype=float)
-    p1 = np.array(p1, dtype=float)
-    d = p1 - p0
-    a = np.dot(d, d)
-    if a == 0.0:
-        return None  # p0==p1 (0-길이 세그먼트)
-
-    f = p0 - center
-    # |p0 + t*d - center|^2 = radius^2
-    # (d·d) t^2 + 2(d·f) t + (f·f - r^2) = 0
-    b = 2.0 * np.dot(d, f)
-    c = np.dot(f, f) - radius * radius
-    disc = b*b - 4*a*c
-    if disc < 0:
-        return None  # 교점 없음
-
-    sqrt_disc = math.sqrt(disc)
-    t1 = (-b - sqrt_disc) / (2*a)
-    t2 = (-b + sqrt_disc) / (2*a)
-
-    candidates = []
-    for t in (t1, t2):
-        if 0.0 <= t <= 1.0:
-            candidates.append(p0 + t*d)
-
-    if not candidates:
-        return None
-    # 원 중심에 더 가까운 교점 선택
-    dists = [np.linalg.norm(pt - center) for pt in candidates]
-    return candidates[int(np.argmin(dists))]
-
-def pure_pursuit_revisited(robot_pos, robot_yaw, path, speed):
-    Ld = dynamic_lookahead(speed)
-
-    # 가장 가까운 waypoint 인덱스
-    dists = [np.linalg.norm(np.array(robot_pos) - np.array(p)) for p in path]
-    nearest_index = int(np.argmin(dists))
-
-    target = np.array(path[-1], dtype=float)
-
-    # 검색 원 밖의 첫 waypoint를 찾고, 해당 구간(p_{i-1}~p_i)과 원의 교점을 실제 목표로 설정
-    for i in range(max(1, nearest_index), len(path)):
-        dist_i = np.linalg.norm(np.array(robot_pos) - np.array(path[i]))
-        if dist_i > Ld:
-            p1 = np.array(path[i], dtype=float)
-            p0 = np.array(path[i - 1], dtype=float)
-
-            # circle-line intersection: 원 중심=로봇 위치, 반지름=Ld, 선분=p0->p1
-            intersection = linear_Interpolation(robot_pos, Ld, p0, p1)
-
-            if intersection is not None:
-                target = intersection
-            else:
-                # 교점이 없으면 보간 실패 -> 세그먼트 방향으로 근사치
-                d = p1 - p0
-                n = np.linalg.norm(d)
-                if n > 1e-6:
-                    dir_vec = d / n
-                    #로봇 중심에서 세그먼트 방향으로 Ld 이동
-                    to_p1 = p1 - np.array(robot_pos, dtype=float)
-                    m = np.linalg.norm(to_p1)
-                    if m > 1e-6:
-                        dir2 = to_p1 / m
-                        target = np.array(robot_pos, dtype=float) + dir2 * Ld
-                    else:
-                        target = p1
-                else:
-                    target = p1
-            break
-
-    # 조향각 계산 (Pure Pursuit)
-    dx = target[0] - robot_pos[0]
-    dy = target[1] - robot_pos[1]
-    angle_to_target = math.atan2(dy, dx)
-    alpha = angle_to_target - robot_yaw
-
-    # [-pi, pi]로 정규화
-    alpha = math.atan2(math.sin(alpha), math.cos(alpha))
-
-    delta = math.atan2(2.0 * WHEELBASE * math.sin(alpha) / Ld, 1.0)
-    return delta, (float(target[0]), float(target[1]))
+def pure_pursuit_revisited(robot_pos, robot_yaw, path, speed, tracker=None):
+    return controllers.pure_pursuit_revisited(robot_pos, robot_yaw, path, dynamic_lookahead(speed), WHEELBASE, tracker)
+
+# 로봇 움직임 업데이트
+def update_robot(x, y, yaw, delta, speed):
+    return bicycle_step(x, y, yaw, delta, speed, WHEELBASE)
+
+# headless 시뮬레이션: 궤적과 제어 출력을 배열로 반환
+# control_rate/sensor_rate [Hz]는 STEP_RATE 기준 (None: 매 스텝)
+def simulate(path, steps=STEPS, robot_pos=(150.0, 150.0), robot_yaw=0.0, initial_speed=2.0,
+             control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE, sensor_noise=SENSOR_NOISE, seed=0, jit=JIT):
+    x, y = float(robot_pos[0]), float(robot_pos[1])
+    yaw = float(robot_yaw)
+    current_speed = initial_speed
+    path = as_path(path)
+    tracker = PathTracker(path)
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": sensor_rate, "control": control_rate})
+    sensor = PoseSensor(sensor_noise, seed)
+    if jit and kernels.HAVE_NUMBA:
+        # 제어/센서 주기와 노이즈를 미리 뽑아서 루프 전체를 kernel 한 번으로
+        sensor_due = scheduler.schedule("sensor", steps)
+        trajectory, yaws, deltas, speeds, targets = kernels.rollout_pure_pursuit_revisited(
+            path.points, tracker.closed, tracker.window, x, y, yaw, float(current_speed), sensor_due,
+            scheduler.schedule("control", steps), sensor.noise_samples(int(sensor_due.sum())),
+            float(WHEELBASE), float(GAIN_X), float(MIN_LOOKAHEAD), float(MIN_SPEED), float(MAX_SPEED))
+        return {"trajectory": trajectory, "yaw": yaws, "delta": deltas, "speed": speeds, "target": targets}
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    deltas = np.empty(steps)
+    speeds = np.empty(steps)
+    targets = np.empty((steps, 2))
+    for n in range(steps):
+        if scheduler.due("sensor"):
+            mx, my, myaw = sensor.measure(x, y, yaw)
+        if scheduler.due("control"):
+            delta, target = pure_pursuit_revisited((mx, my), myaw, path, current_speed, tracker)
+            current_speed = update_velocity(delta)
+        x, y, yaw = update_robot(x, y, yaw, delta, current_speed)
+        scheduler.tick()
+        trajectory[n] = x, y
+        yaws[n] = yaw
+        deltas[n] = delta
+        speeds[n] = current_speed
+        targets[n] = target
+    return {"trajectory": trajectory, "yaw": yaws, "delta": deltas, "speed": speeds, "target": targets}
 
 # 경로 생성
 def generate_rectangle():
-    path = []
-    for x in range(100, 900): path.append((x, 100))
-    for y in range(100, 500): path.append((900, y))
-    for x in range(900, 100, -1): path.append((x, 500))
-    for y in range(500, 100, -1): path.append((100, y))
-    return path
+    return load_path("rectangle")
 
 def generate_8_shape():
-    t = np.linspace(0, 2*np.pi, 800)
-    path = []
-    for i in t:
-        x = 500 + 300 * math.sin(i)
-        y = 350 + 150 * math.sin(i) * math.cos(i)
-        path.append((x, y))
-    return path
-
-def generate_zigzag():
-    path = []
-    x = 100
-    y = 350
-    while x < 900:
-        x += 30   
-        y += random.randint(-50, 50)
-        y = max(100, min(600, y))
-        path.append((x, y))
-    return path
-
-# pygame 생성
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+    return load_path("figure_eight")
 
-# 경로 생성
-# path = generate_rectangle()
-# path = generate_8_shape()
-path = generate_zigzag()
-
-robot_pos = [150.0, 150.0]
-robot_yaw = 0.0
-trajectory = []   # 로봇이 지나간 궤적 저장
-
-# 초기 속도
-current_speed = 2.0
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    # pure_pursuit_revisited
-    delta, target = pure_pursuit_revisited(robot_pos, robot_yaw, path, current_speed)
-
-    # 속도 갱신 (직선/곡선에 따라)
-    current_speed = update_velocity(delta)
-
-    # 로봇 움직임 업데이트
-    robot_yaw += math.tan(delta) * current_speed / WHEELBASE
-    robot_pos[0] += current_speed * math.cos(robot_yaw)
-    robot_pos[1] += current_speed * math.sin(robot_yaw)
-
-    trajectory.append((robot_pos[0], robot_pos[1]))
-
-    screen.fill((255, 255, 255))
+def generate_zigzag(seed=SEED):
+    return load_path("zigzag", seed=seed, step=30)
 
+# 정적 배경: 격자와 경로 (StaticLayer로 한 번만 그림)
+def draw_background(surf, path):
     # 맵생성
-    grid_size = 50
-    for x in range(0, WIDTH, grid_size):
-        pygame.draw.line(screen, (60, 60, 60), (x, 0), (x, HEIGHT), 1)
-    for y in range(0, HEIGHT, grid_size):
-        pygame.draw.line(screen, (60, 60, 60), (0, y), (WIDTH, y), 1)
+    draw_grid(surf, (60, 60, 60))
 
     # 경로
-    pygame.draw.lines(screen, (0, 0, 0), False, path, 3)
-
-    # 로봇 궤적
-    if len(trajectory) > 1:
-        pygame.draw.lines(screen, (255, 0, 0), False, trajectory, 2)
-
-    # 목표점/로봇 표시
-    pygame.draw.circle(screen, (0, 255, 255), (int(target[0]), int(target[1])), 5)
-    pygame.draw.circle(screen, (255, 255, 0), (int(robot_pos[0]), int(robot_pos[1])), ROBOT_SIZE)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
+    pygame.draw.lines(surf, (0, 0, 0), False, path.points, 3)
+
+def run_window(path):
+    # pygame 생성
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    robot_pos = [150.0, 150.0]
+    robot_yaw = 0.0
+    trail = TrailLayer((WIDTH, HEIGHT), (255, 0, 0), 2)
+    path = as_path(path)
+    tracker = PathTracker(path)
+    cte_tracker = PathTracker(path)   # 기록용 cross-track error (제어기 tracker 상태와 분리)
+    background = StaticLayer((WIDTH, HEIGHT), lambda surf: draw_background(surf, path))
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    recorder = TrajectoryRecorder(RECORD, PURSUIT_FIELDS, static={"path": path.points},
+                                  meta={"script": "pure_pursuit_revisited", "size": [WIDTH, HEIGHT], "robot_size": ROBOT_SIZE,
+                                        "gain_x": GAIN_X, "step_time": 1.0 / STEP_RATE}) if RECORD else None
+
+    # 초기 속도
+    current_speed = 2.0
+
+    stepper = FixedTimestep(1.0 / STEP_RATE, TIME_SCALE)
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": SENSOR_RATE, "control": CONTROL_RATE})
+    sensor = PoseSensor(SENSOR_NOISE)
+    target = path[0]
+    prev = (robot_pos[0], robot_pos[1], robot_yaw)
+    frame_time = 0.0
+
+    running = True
+    while running:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        # 지난 프레임 시간만큼 고정 간격 스텝 진행
+        for _ in range(stepper.advance(frame_time)):
+            prev = (robot_pos[0], robot_pos[1], robot_yaw)
+            if scheduler.due("sensor"):
+                mx, my, myaw = sensor.measure(robot_pos[0], robot_pos[1], robot_yaw)
+
+            # pure_pursuit_revisited + 속도 갱신 (직선/곡선에 따라), 제어 주기 사이에는 마지막 명령 유지
+            if scheduler.due("control"):
+                delta, target = pure_pursuit_revisited((mx, my), myaw, path, current_speed, tracker)
+                current_speed = update_velocity(delta)
+            profiler.mark("control")
+
+            # 로봇 움직임 업데이트
+            robot_pos[0], robot_pos[1], robot_yaw = update_robot(robot_pos[0], robot_pos[1], robot_yaw,
+                                                                 delta, current_speed)
+            scheduler.tick()
+            profiler.mark("update")
+
+            trail.add((robot_pos[0], robot_pos[1]))
+            if recorder:
+                recorder.append(robot_pos[0], robot_pos[1], robot_yaw, delta, current_speed, target[0], target[1],
+                                cte_tracker.cross_track_error(robot_pos))
+            profiler.mark("trajectory")
+
+        # 배경 (격자, 경로)
+        background.draw(screen)
+        profiler.mark("background")
+
+        # 로봇 궤적
+        trail.draw(screen)
+        profiler.mark("trajectory")
+
+        # 목표점/로봇 표시 (로봇은 마지막 두 스텝 사이 보간)
+        x, y, _ = interpolate_pose(prev, (robot_pos[0], robot_pos[1], robot_yaw), stepper.alpha)
+        pygame.draw.circle(screen, (0, 255, 255), (int(target[0]), int(target[1])), 5)
+        pygame.draw.circle(screen, (255, 255, 0), (int(x), int(y)), ROBOT_SIZE)
+
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+    if CONTROL_RATE or SENSOR_RATE:
+        scheduler.report()
+
+if __name__ == "__main__":
+    # 경로 생성
+    # path = generate_rectangle()
+    # path = generate_8_shape()
+    path = generate_zigzag()
+
+    if HEADLESS:
+        result = simulate(path)
+        print("steps:", len(result["trajectory"]), "final pos:", result["trajectory"][-1])
+    else:
+        run_window(path)
@@ -1,7 +1,16 @@
-import pygame
 import numpy as np
-import math
-import matplotlib.pyplot as plt
+from mobile_robot import FrameProfiler, ObstacleMap, PathTracker, as_path
+from mobile_robot import controllers
+from mobile_robot.kinematics import bicycle_step
+from mobile_robot.loop import FixedTimestep, MultiRateScheduler, interpolate_pose
+from mobile_robot.sensor import PoseSensor
+from mobile_robot.render import ProfilerOverlay, StaticLayer, TrailLayer, draw_grid
+from mobile_robot.recorder import PURSUIT_FIELDS, TrajectoryRecorder, load_recording
+from mobile_robot.pathgen import load_path
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
+plt = lazy_import("matplotlib.pyplot")
 
 #parameters
 obstacle_count = 2
@@ -20,163 +29,205 @@ PROX_DIST = 80
 MIN_SPEED = 1.0
 T = 4.0  # 최대 선속도
 R_MIN = 60
+FPS = 60          # 렌더링 FPS
+STEP_RATE = 60    # 시뮬레이션 스텝/초 (렌더링과 독립)
+TIME_SCALE = 1.0  # 시뮬레이션 배속
+CONTROL_RATE = None        # 제어기(조향각+감속) 실행 rate [Hz] (None: 매 스텝), 사이에는 마지막 명령 유지
+SENSOR_RATE = None         # pose 측정 rate [Hz] (None: 매 스텝)
+SENSOR_NOISE = (0.0, 0.0)  # 측정 노이즈 표준편차 (위치 [px], yaw [rad])
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
+SDF_RESOLUTION = 2.0  # 장애물 거리장 격자 크기 [px]
 
 # 장애물 배치
 obstacle_centers = [(250 + OBSTACLE_DIST * i, 300) for i in range(obstacle_count)]
 
-# 경로 생성 
+# 경로 생성 (import만 할 때는 만들지 않음: load_path가 캐시 파일을 쓰므로 필요할 때 호출)
 x_end = 250 + OBSTACLE_DIST * (obstacle_count - 1) + 350  
-x_path = np.linspace(120, x_end, 900)
 x_range = obstacle_centers[-1][0] - obstacle_centers[0][0]
-y_path = 300 + AMPLITUDE * np.sin((x_path - 120) / x_range * 2 * np.pi)
-path = list(zip(x_path, y_path))
+
+def make_path():
+    return load_path("sine", x0=120, x1=x_end, n=900, offset=300, amplitude=AMPLITUDE, wavelength=x_range)
 
 def dynamic_lookahead(speed):
     return max(MIN_LOOKAHEAD, speed * GAIN_X)
 
-def linear_Interpolation(center, radius, p0, p1):
-    center = np.array(center, dtype=float)
-    p0 = np.array(p0, dtype=float)
-    p1 = np.array(p1, dtype=float)
-    d = p1 - p0
-    a = np.dot(d, d)
-    if a == 0.0:
-        return None
-    f = p0 - center
-    b = 2.0 * np.dot(d, f)
-    c = np.dot(f, f) - radius * radius
-    disc = b * b - 4 * a * c
-    if disc < 0:
-        return None
-    sqrt_disc = math.sqrt(disc)
-    t1 = (-b - sqrt_disc) / (2 * a)
-    t2 = (-b + sqrt_disc) / (2 * a)
-    candidates = []
-    for t in (t1, t2):
-        if 0.0 <= t <= 1.0:
-            candidates.append(p0 + t * d)
-    if not candidates:
-        return None
-    dists = [np.linalg.norm(pt - center) for pt in candidates]
-    return candidates[int(np.argmin(dists))]
-
-def regulated_pure_pursuit(robot_pos, robot_yaw, path, speed):
-    Ld = dynamic_lookahead(speed)
-    dists = [np.linalg.norm(np.array(robot_pos) - np.array(p)) for p in path]
-    nearest_index = int(np.argmin(dists))
-    target = np.array(path[-1], dtype=float)
-    for i in range(max(1, nearest_index), len(path)):
-        dist_i = np.linalg.norm(np.array(robot_pos) - np.array(path[i]))
-        if dist_i > Ld:
-            p1 = np.array(path[i], dtype=float)
-            p0 = np.array(path[i - 1], dtype=float)
-            intersection = linear_Interpolation(robot_pos, Ld, p0, p1)
-            if intersection is not None:
-                target = intersection
-            else:
-                d = p1 - p0
-                n = np.linalg.norm(d)
-                if n > 1e-6:
-                    dir_vec = d / n
-                    to_p1 = p1 - np.array(robot_pos, dtype=float)
-                    m = np.linalg.norm(to_p1)
-                    if m > 1e-6:
-                        dir2 = to_p1 / m
-                        target = np.array(robot_pos, dtype=float) + dir2 * Ld
-                    else:
-                        target = p1
-                else:
-                    target = p1
-            break
-    dx = target[0] - robot_pos[0]
-    dy = target[1] - robot_pos[1]
-    angle_to_target = math.atan2(dy, dx)
-    alpha = angle_to_target - robot_yaw
-    alpha = math.atan2(math.sin(alpha), math.cos(alpha))
-    delta = math.atan2(2.0 * WHEELBASE * math.sin(alpha) / Ld, 1.0)
-    return delta, (float(target[0]), float(target[1]))
-
-def regulated_speed(v_max, delta, robot_pos, obstacles, obs_radius,
-                    wheelbase=WHEELBASE, r_min=R_MIN, tmax=T, prox_dist=PROX_DIST, v_min=MIN_SPEED):
-    # 곡률(회전반경) 기반 속도제한
-    if abs(math.tan(delta)) < 1e-5:
-        radius = 1e6
-    else:
-        radius = abs(wheelbase / math.tan(delta))
-    vt_curve = min(tmax, abs(v_max * radius / tmax)) # max속도 or regulated
-    # 장애물 proximity 감속
-    min_dist = float('inf')
-    for center in obstacles:
-        dist = np.linalg.norm(np.array(robot_pos) - np.array(center)) - obs_radius - ROBOT_SIZE
-        if dist < min_dist:
-            min_dist = dist
-    dist_to_obst = max(min_dist, 0.0)
-    if dist_to_obst < prox_dist:
-        factor = (dist_to_obst / prox_dist) * GAIN_OBST
-        vt_curve = max(v_min, vt_curve * factor)
-    else:
-        vt_curve = max(v_min, vt_curve)
-    return vt_curve
-
-# pygame 생성
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
-robot_pos = [float(x_path[0]), float(y_path[0])]
-robot_yaw = 0.0
-trajectory = []
-speeds = []
-
-MAX_SPEED = T
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+def regulated_pure_pursuit(robot_pos, robot_yaw, path, speed, tracker=None):
+    return controllers.pure_pursuit_revisited(robot_pos, robot_yaw, path, dynamic_lookahead(speed), WHEELBASE, tracker)
 
-    # 항상 최대 속도로 곡률/장애물 감속 동시 적용
-    delta, target = regulated_pure_pursuit(robot_pos, robot_yaw, path, MAX_SPEED)
-    current_speed = regulated_speed(MAX_SPEED, delta, robot_pos, obstacle_centers, obstacle_radius)
-    speeds.append(current_speed)
-
-    robot_yaw += math.tan(delta) * current_speed / WHEELBASE
-    robot_pos[0] += current_speed * math.cos(robot_yaw)
-    robot_pos[1] += current_speed * math.sin(robot_yaw)
-    trajectory.append((robot_pos[0], robot_pos[1]))
-
-    screen.fill((255, 255, 255))
+# 장애물 거리장: 장애물 수와 무관하게 proximity 질의 O(1) (PROX_DIST보다 먼 거리는 잘라서 저장)
+def make_obstacle_map(obstacles=obstacle_centers, obs_radius=obstacle_radius):
+    return ObstacleMap.from_circles(obstacles, obs_radius, (WIDTH, HEIGHT), resolution=SDF_RESOLUTION,
+                                    max_dist=PROX_DIST + ROBOT_SIZE + 2 * SDF_RESOLUTION)
 
+def regulated_speed(v_max, delta, robot_pos, obstacles, obs_radius,
+                    wheelbase=WHEELBASE, r_min=R_MIN, tmax=T, prox_dist=PROX_DIST, v_min=MIN_SPEED,
+                    obstacle_map=None):
+    return controllers.regulated_speed(v_max, delta, robot_pos, obstacles, obs_radius, wheelbase, tmax, prox_dist,
+                                       v_min, GAIN_OBST, ROBOT_SIZE, obstacle_map)
+
+# 로봇 움직임 업데이트
+def update_robot(x, y, yaw, delta, speed):
+    return bicycle_step(x, y, yaw, delta, speed, WHEELBASE)
+
+# headless 시뮬레이션: 궤적과 제어 출력을 배열로 반환
+# control_rate/sensor_rate [Hz]는 STEP_RATE 기준 (None: 매 스텝)
+def simulate(path, steps=STEPS, robot_pos=None, robot_yaw=0.0, max_speed=T,
+             obstacles=obstacle_centers, obs_radius=obstacle_radius,
+             control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE, sensor_noise=SENSOR_NOISE, seed=0):
+    if robot_pos is None:
+        robot_pos = path[0]
+    x, y = float(robot_pos[0]), float(robot_pos[1])
+    yaw = float(robot_yaw)
+    path = as_path(path)
+    tracker = PathTracker(path)
+    obstacle_map = make_obstacle_map(obstacles, obs_radius)
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": sensor_rate, "control": control_rate})
+    sensor = PoseSensor(sensor_noise, seed)
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    deltas = np.empty(steps)
+    speeds = np.empty(steps)
+    targets = np.empty((steps, 2))
+    for n in range(steps):
+        if scheduler.due("sensor"):
+            mx, my, myaw = sensor.measure(x, y, yaw)
+        if scheduler.due("control"):
+            delta, target = regulated_pure_pursuit((mx, my), myaw, path, max_speed, tracker)
+            current_speed = regulated_speed(max_speed, delta, (mx, my), obstacles, obs_radius,
+                                            obstacle_map=obstacle_map)
+        x, y, yaw = update_robot(x, y, yaw, delta, current_speed)
+        scheduler.tick()
+        trajectory[n] = x, y
+        yaws[n] = yaw
+        deltas[n] = delta
+        speeds[n] = current_speed
+        targets[n] = target
+    return {"trajectory": trajectory, "yaw": yaws, "delta": deltas, "speed": speeds, "target": targets}
+
+# 정적 배경: 그리드, 경로, 장애물 (StaticLayer로 한 번만 그림)
+def draw_background(surf, path, obstacles=obstacle_centers, obs_radius=obstacle_radius):
     # 그리드
-    grid_size = 50
-    for x in range(0, WIDTH, grid_size):
-        pygame.draw.line(screen, (220, 220, 220), (x, 0), (x, HEIGHT), 1)
-    for y in range(0, HEIGHT, grid_size):
-        pygame.draw.line(screen, (220, 220, 220), (0, y), (WIDTH, y), 1)
+    draw_grid(surf, (220, 220, 220))
 
     # 경로
-    pygame.draw.lines(screen, (0, 60, 180), False, path, 3)
-    if len(trajectory) > 1:
-        pygame.draw.lines(screen, (255, 0, 0), False, trajectory, 2)
+    pygame.draw.lines(surf, (0, 60, 180), False, path.points, 3)
 
     # 장애물(원)
-    for center in obstacle_centers:
-        pygame.draw.circle(screen, (80, 80, 255), (int(center[0]), int(center[1])), obstacle_radius, 2)
-
-    # 목표점/로봇
-    pygame.draw.circle(screen, (0, 255, 255), (int(target[0]), int(target[1])), 6)
-    pygame.draw.circle(screen, (255, 200, 0), (int(robot_pos[0]), int(robot_pos[1])), ROBOT_SIZE)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
-
-plt.figure(figsize=(10,4))
-plt.plot(speeds)
-plt.xlabel('Time step')
-plt.ylabel('Robot speed')
-plt.title('Regulated Robot Speed Over Time')
-plt.grid(True)
-plt.show()
+    for center in obstacles:
+        pygame.draw.circle(surf, (80, 80, 255), (int(center[0]), int(center[1])), obs_radius, 2)
+
+def run_window(path):
+    # pygame 생성
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    path = as_path(path)
+    robot_pos = [float(path.xs[0]), float(path.ys[0])]
+    robot_yaw = 0.0
+    trail = TrailLayer((WIDTH, HEIGHT), (255, 0, 0), 2)
+    tracker = PathTracker(path)
+    cte_tracker = PathTracker(path)   # 기록용 cross-track error (제어기 tracker 상태와 분리)
+    background = StaticLayer((WIDTH, HEIGHT), lambda surf: draw_background(surf, path))
+    obstacle_map = make_obstacle_map()
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    recorder = TrajectoryRecorder(RECORD, PURSUIT_FIELDS, static={"path": path.points},
+                                  meta={"script": "regulated_pure_pursuit", "size": [WIDTH, HEIGHT], "robot_size": ROBOT_SIZE,
+                                        "max_speed": T, "obstacles": obstacle_centers, "obstacle_radius": obstacle_radius,
+                                        "step_time": 1.0 / STEP_RATE}) if RECORD else None
+    speeds = []   # 기록하지 않을 때 속도 그래프용 (전체 스텝)
+
+    MAX_SPEED = T
+
+    stepper = FixedTimestep(1.0 / STEP_RATE, TIME_SCALE)
+    scheduler = MultiRateScheduler(STEP_RATE, {"sensor": SENSOR_RATE, "control": CONTROL_RATE})
+    sensor = PoseSensor(SENSOR_NOISE)
+    target = path[0]
+    prev = (robot_pos[0], robot_pos[1], robot_yaw)
+    frame_time = 0.0
+
+    running = True
+    while running:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        # 지난 프레임 시간만큼 고정 간격 스텝 진행
+        for _ in range(stepper.advance(frame_time)):
+            prev = (robot_pos[0], robot_pos[1], robot_yaw)
+            if scheduler.due("sensor"):
+                mx, my, myaw = sensor.measure(robot_pos[0], robot_pos[1], robot_yaw)
+
+            # 항상 최대 속도로 곡률/장애물 감속 동시 적용 (제어 주기 사이에는 마지막 명령 유지)
+            if scheduler.due("control"):
+                delta, target = regulated_pure_pursuit((mx, my), myaw, path, MAX_SPEED, tracker)
+                current_speed = regulated_speed(MAX_SPEED, delta, (mx, my), obstacle_centers, obstacle_radius,
+                                                obstacle_map=obstacle_map)
+            if not recorder:
+                speeds.append(current_speed)
+            profiler.mark("control")
+
+            robot_pos[0], robot_pos[1], robot_yaw = update_robot(robot_pos[0], robot_pos[1], robot_yaw,
+                                                                 delta, current_speed)
+            scheduler.tick()
+            profiler.mark("update")
+            trail.add((robot_pos[0], robot_pos[1]))
+            if recorder:
+                recorder.append(robot_pos[0], robot_pos[1], robot_yaw, delta, current_speed, target[0], target[1],
+                                cte_tracker.cross_track_error(robot_pos))
+            profiler.mark("trajectory")
+
+        # 배경 (그리드, 경로, 장애물)
+        background.draw(screen)
+        profiler.mark("background")
+        trail.draw(screen)
+        profiler.mark("trajectory")
+
+        # 목표점/로봇 (로봇은 마지막 두 스텝 사이 보간)
+        x, y, _ = interpolate_pose(prev, (robot_pos[0], robot_pos[1], robot_yaw), stepper.alpha)
+        pygame.draw.circle(screen, (0, 255, 255), (int(target[0]), int(target[1])), 6)
+        pygame.draw.circle(screen, (255, 200, 0), (int(x), int(y)), ROBOT_SIZE)
+
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+    if CONTROL_RATE or SENSOR_RATE:
+        scheduler.report()
+
+    # 기록했으면 파일에서 (복사 없이) 전체 속도를 읽음
+    speed = load_recording(RECORD)["speed"] if RECORD else speeds
+    plt.figure(figsize=(10,4))
+    plt.plot(speed)
+    plt.xlabel('Time step')
+    plt.ylabel('Robot speed')
+    plt.title('Regulated Robot Speed Over Time')
+    plt.grid(True)
+    plt.show()
+
+if __name__ == "__main__":
+    path = make_path()
+    if HEADLESS:
+        result = simulate(path)
+        print("steps:", len(result["trajectory"]), "final pos:", result["trajectory"][-1],
+              "mean speed:", result["speed"].mean())
+    else:
+        run_window(path)
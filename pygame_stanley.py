@@ -1,6 +1,17 @@
-import pygame
 import numpy as np
 import math
+from mobile_robot import FrameProfiler, GridIndex, Path
+from mobile_robot import controllers
+from mobile_robot.spline import ArcLengthSpline
+from mobile_robot.loop import FixedTimestep, MultiRateScheduler, interpolate_pose
+from mobile_robot.sensor import PoseSensor
+from mobile_robot.render import ProfilerOverlay, StaticLayer, TrailLayer
+from mobile_robot.recorder import PURSUIT_FIELDS, TrajectoryRecorder
+from mobile_robot.pathgen import load_path
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
+kernels = lazy_import("mobile_robot.kernels")   # numba import는 simulate를 처음 부를 때
 
 # Parameters
 dt = 0.1
@@ -15,25 +26,51 @@ max_steering = np.radians(30)
 WIDTH, HEIGHT = 1000, 700
 SCALE = 10.0
 CENTER = (WIDTH//2, HEIGHT//2)
+FPS = 60          # 렌더링 FPS
+STEP_RATE = 60    # 초당 시뮬레이션 스텝 수 (60: 기존처럼 화면 60 FPS 기준 속도, 1/dt: dt 기준 실시간)
+TIME_SCALE = 1.0  # 시뮬레이션 배속
+CONTROL_RATE = None        # 제어기 실행 rate [Hz, dt 기준 시간] (None: 매 스텝 = 1/dt), 사이에는 마지막 조향각 유지
+SENSOR_RATE = None         # pose 측정 rate [Hz] (None: 매 스텝)
+SENSOR_NOISE = (0.0, 0.0)  # 측정 노이즈 표준편차 (위치 [m], yaw [rad])
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
+PROJECT_TO_SEGMENT = True  # True: 최근접 세그먼트 위로 투영, False: 최근접 waypoint
+ROAD = "circle"            # 따라갈 도로: "linear", "sin", "circle"
+REFERENCE = "spline"       # "spline": waypoint를 지나는 arc length cubic spline 위 연속 투영, "points": waypoint/세그먼트
+SPLINE_POINTS = None       # spline 기준 경로를 만들 waypoint 수 (None: 도로 길이와 최대 곡률로 spline_points가 결정, points 방식은 500)
+SPLINE_TURN = 0.13         # spline_points: waypoint 간격당 최대 방향 변화 [rad] (circle 도로 50점)
+SPLINE_MIN_POINTS = 50     # spline_points 최소값 (직선 도로)
+JIT = True                 # True: numba가 있으면 headless 시뮬레이션 루프 전체를 컴파일된 kernel로 (spline 경로만)
 
 
-# 따라갈 경로 생성
-def make_ref(road="linear"):
+# 따라갈 경로 생성 (n: waypoint 수)
+def make_ref(road="linear", n=500):
     if road == "linear":
-        ref_xs = np.linspace(0, 500, 500)
-        ref_ys = np.zeros_like(ref_xs) + 1.5
+        ref_xs, ref_ys = load_path("line", x0=0, x1=500, n=n, y=1.5).T
         ref_yaws = np.arctan(np.gradient(ref_ys, ref_xs))
     elif road == "sin":
-        ref_xs = np.linspace(0, 500, 500)
-        ref_ys = 5 * np.sin(0.2*ref_xs) + 1
+        ref_xs, ref_ys = load_path("sine", x0=0, x1=500, n=n, offset=1, amplitude=5, wavelength=2*np.pi/0.2).T
         ref_yaws = np.arctan(np.gradient(ref_ys, ref_xs))
     elif road == "circle":
-        theta = np.linspace(0, 2*np.pi, 500)
-        ref_xs = 20 * np.cos(theta) - 20
-        ref_ys = 20 * np.sin(theta)
-        ref_yaws = np.pi/2 + theta
+        ref_xs, ref_ys = load_path("circle", cx=-20, cy=0, radius=20, n=n).T
+        ref_yaws = np.pi/2 + np.linspace(0, 2*np.pi, n)
     return ref_xs, ref_ys, ref_yaws
 
+# spline 기준 경로의 waypoint 수: 간격 * 최대 곡률 <= SPLINE_TURN (촘촘한 waypoint spline으로 길이/곡률 추정)
+# 도로마다 필요한 점 수가 다름 (circle은 50점이면 충분하지만 sin은 같은 50점이면 |P'|가 1에서 0.25까지 벗어남)
+def spline_points(road):
+    if SPLINE_POINTS:
+        return SPLINE_POINTS
+    xs, ys, _ = make_ref(road, 500)
+    ref = ArcLengthSpline(np.column_stack((xs, ys)))
+    _, d1, d2 = ref.evaluate_batch(np.linspace(0, ref.length, 4000))
+    kappa = np.abs(d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]) / np.hypot(d1[:, 0], d1[:, 1]) ** 3
+    return max(SPLINE_MIN_POINTS, math.ceil(ref.length * kappa.max() / SPLINE_TURN) + 1)
+
 # 차량 모델 
 class VehicleModel:
     def __init__(self, x=0.0, y=0.0, yaw=0.0, v=0.0):
@@ -48,32 +85,121 @@ class VehicleModel:
         self.x += self.v * np.cos(self.yaw) * dt
         self.y += self.v * np.sin(self.yaw) * dt
 
-def normalize_angle(angle):
-    return math.atan2(math.sin(angle), math.cos(angle))
+# N대 차량 상태를 배열로 (struct-of-arrays): x, y, yaw, v 각각 (N,)
+# update는 VehicleModel.update와 같은 bicycle 식을 모든 차량에 한 번에 적용 (yaw 입력은 VehicleModel처럼 [deg])
+class VehicleBatch:
+    def __init__(self, x, y, yaw, v):
+        x, y, yaw, v = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (x, y, yaw, v)))
+        self.x = x.copy()
+        self.y = y.copy()
+        self.yaw = np.radians(yaw)
+        self.v = v.copy()
+
+    def __len__(self):
+        return len(self.x)
+
+    def update(self, steer):
+        self.yaw += self.v / L * np.tan(steer) * dt
+        self.yaw %= 2.0*np.pi
+        self.x += self.v * np.cos(self.yaw) * dt
+        self.y += self.v * np.sin(self.yaw) * dt
 
 # stanley
-def stanley_control(x, y, yaw, v, ref_xs, ref_ys, ref_yaws):
-    front_x = x + L * np.cos(yaw)
-    front_y = y + L * np.sin(yaw)
+def stanley_control(x, y, yaw, v, ref_xs, ref_ys, ref_yaws, index=None, project=PROJECT_TO_SEGMENT):
+    return controllers.stanley_control(x, y, yaw, v, ref_xs, ref_ys, ref_yaws, L, k, max_steering, index, project)
 
-    dists = np.hypot(front_x - ref_xs, front_y - ref_ys)
-    min_index = int(np.argmin(dists))
+# spline 기준 경로: 앞바퀴 축을 곡선 위로 투영 (s: 이전 제어 주기의 투영 위치, warm start)
+# heading은 spline 접선에서 바로 계산하므로 waypoint 간격과 무관
+def stanley_control_spline(x, y, yaw, v, spline, s=None):
+    return controllers.stanley_control_spline(x, y, yaw, v, spline, L, k, max_steering, s)
 
-    ref_x = ref_xs[min_index]
-    ref_y = ref_ys[min_index]
-    ref_yaw = ref_yaws[min_index]
+# stanley_control_spline의 배열 버전: 모든 차량의 앞바퀴 축을 한 번에 spline 위로 투영
+def stanley_control_batch(x, y, yaw, v, spline, s=None):
+    return controllers.stanley_control_batch(x, y, yaw, v, spline, L, k, max_steering, s)
 
-    dx = ref_x - front_x
-    dy = ref_y - front_y
-    perp_vec = [np.cos(ref_yaw + np.pi/2), np.sin(ref_yaw + np.pi/2)]
-    cte = np.dot([dx, dy], perp_vec)
+# 앞바퀴 축과 기준점/기준 heading으로 Stanley 조향각 계산
+def stanley_steer(front_x, front_y, yaw, v, ref_x, ref_y, ref_yaw):
+    return controllers.stanley_steer(front_x, front_y, yaw, v, ref_x, ref_y, ref_yaw, k, max_steering)
 
-    psi = normalize_angle(ref_yaw - yaw)
-    cte_term = math.atan2(k*cte, max(v, 1e-3))
+# headless 시뮬레이션: 궤적과 제어 출력을 배열로 반환
+# control_rate/sensor_rate [Hz]는 plant rate 1/dt 기준 (None: 매 스텝)
+# REFERENCE == "spline"이면 (또는 spline을 주면) waypoint를 지나는 spline 위 투영으로 제어
+def simulate(model, ref_xs, ref_ys, ref_yaws, steps=STEPS, index=None,
+             control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE, sensor_noise=SENSOR_NOISE, seed=0, spline=None,
+             jit=JIT):
+    if spline is None and REFERENCE == "spline":
+        spline = ArcLengthSpline(np.column_stack((ref_xs, ref_ys)))
+    if spline is None and index is None:
+        index = GridIndex(Path.from_ref(ref_xs, ref_ys, ref_yaws))
+    s = None
+    scheduler = MultiRateScheduler(1.0 / dt, {"sensor": sensor_rate, "control": control_rate})
+    sensor = PoseSensor(sensor_noise, seed)
+    if jit and kernels.HAVE_NUMBA and spline is not None:
+        # 제어/센서 주기와 노이즈를 미리 뽑아서 루프 전체를 kernel 한 번으로
+        sensor_due = scheduler.schedule("sensor", steps)
+        grid_s, grid_p = spline.grid()
+        trajectory, yaws, steers, refs = kernels.rollout_stanley_spline(
+            spline.knots, spline.coeffs.reshape(-1, 8), spline.length, spline.closed, spline.max_segment,
+            grid_s, grid_p, float(model.x), float(model.y), float(model.yaw), float(model.v), sensor_due,
+            scheduler.schedule("control", steps), sensor.noise_samples(int(sensor_due.sum())),
+            float(L), float(k), float(max_steering), float(dt))
+        if steps:
+            model.x, model.y, model.yaw = trajectory[-1, 0], trajectory[-1, 1], yaws[-1]
+        return {"trajectory": trajectory, "yaw": yaws, "steer": steers, "ref": refs}
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    steers = np.empty(steps)
+    refs = np.empty((steps, 2))
+    for n in range(steps):
+        if scheduler.due("sensor"):
+            mx, my, myaw = sensor.measure(model.x, model.y, model.yaw)
+        if scheduler.due("control"):
+            if spline is not None:
+                steer, rx, ry, s = stanley_control_spline(mx, my, myaw, model.v, spline, s)
+            else:
+                steer, rx, ry = stanley_control(mx, my, myaw, model.v, ref_xs, ref_ys, ref_yaws, index)
+        model.update(steer)
+        scheduler.tick()
+        trajectory[n] = model.x, model.y
+        yaws[n] = model.yaw
+        steers[n] = steer
+        refs[n] = rx, ry
+    return {"trajectory": trajectory, "yaw": yaws, "steer": steers, "ref": refs}
 
-    steer = psi + cte_term
-    steer = np.clip(steer, -max_steering, max_steering)
-    return steer, ref_x, ref_y
+
+# N대 차량 headless 시뮬레이션 (vehicles: VehicleBatch, in-place로 갱신) -> (steps, N, ...) 배열
+# 기준 경로는 항상 spline, 센서 노이즈는 차량마다 다른 realization, 제어/센서 주기는 모든 차량이 같은 schedule
+# cte: 뒷바퀴 축(차량 위치) 기준 부호 있는 cross-track error
+def simulate_batch(vehicles, ref_xs, ref_ys, steps=STEPS, control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE,
+                   sensor_noise=SENSOR_NOISE, seed=0, spline=None):
+    if spline is None:
+        spline = ArcLengthSpline(np.column_stack((ref_xs, ref_ys)))
+    n = len(vehicles)
+    scheduler = MultiRateScheduler(1.0 / dt, {"sensor": sensor_rate, "control": control_rate})
+    pos_std, yaw_std = sensor_noise
+    rng = np.random.default_rng(seed)
+    trajectory = np.empty((steps, n, 2))
+    yaws = np.empty((steps, n))
+    steers = np.empty((steps, n))
+    cte = np.empty((steps, n))
+    s = s_cte = None
+    for i in range(steps):
+        if scheduler.due("sensor"):
+            mx, my, myaw = vehicles.x.copy(), vehicles.y.copy(), vehicles.yaw.copy()
+            if pos_std or yaw_std:
+                mx += rng.normal(0.0, pos_std, n)
+                my += rng.normal(0.0, pos_std, n)
+                myaw += rng.normal(0.0, yaw_std, n)
+        if scheduler.due("control"):
+            steer, _, s = stanley_control_batch(mx, my, myaw, vehicles.v, spline, s)
+        vehicles.update(steer)
+        scheduler.tick()
+        trajectory[i, :, 0] = vehicles.x
+        trajectory[i, :, 1] = vehicles.y
+        yaws[i] = vehicles.yaw
+        steers[i] = steer
+        cte[i], s_cte = spline.cross_track_error_batch(trajectory[i], s_cte)
+    return {"trajectory": trajectory, "yaw": yaws, "steer": steers, "cte": cte}
 
 
 def world_to_screen(x, y):
@@ -81,60 +207,127 @@ def world_to_screen(x, y):
     sy = CENTER[1] - int(y*SCALE)
     return sx, sy
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+# 정적 배경: 경로 (StaticLayer로 한 번만 그림)
+def draw_background(surf, ref_xs, ref_ys):
+    pts = [world_to_screen(ref_xs[i], ref_ys[i]) for i in range(len(ref_xs))]
+    pygame.draw.lines(surf, (0,0,0), False, pts, 2)
+
+def run_window(model, ref_xs, ref_ys, ref_yaws):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
 
-# 경로 생성
-ref_xs, ref_ys, ref_yaws = make_ref(road="circle")
+    trail = TrailLayer((WIDTH, HEIGHT), (255,0,0), 2)
+    spline = ArcLengthSpline(np.column_stack((ref_xs, ref_ys))) if REFERENCE == "spline" else None
+    if spline is not None:
+        # 그리기/기록용 경로는 spline을 촘촘히 샘플링
+        path_xs, path_ys = spline.sample(np.linspace(0, spline.length, 1000)).T
+    else:
+        index = GridIndex(Path.from_ref(ref_xs, ref_ys, ref_yaws))
+        path_xs, path_ys = ref_xs, ref_ys
+    background = StaticLayer((WIDTH, HEIGHT), lambda surf: draw_background(surf, path_xs, path_ys))
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    recorder = TrajectoryRecorder(RECORD, PURSUIT_FIELDS,
+                                  static={"path": np.column_stack((path_xs, path_ys)), "ref_yaw": np.asarray(ref_yaws)},
+                                  meta={"script": "stanley", "size": [WIDTH, HEIGHT], "scale": SCALE,
+                                        "center": list(CENTER), "dt": dt, "k": k, "reference": REFERENCE,
+                                        "step_time": 1.0 / STEP_RATE}) if RECORD else None
 
-# 차량 초기화
-model = VehicleModel(x=10.0, y=15.0, yaw=0, v=5.0) # 시나리오 1
-#model = VehicleModel(x=0.0, y=0.0, yaw=270,v=5.0) # 시나리오 2
+    stepper = FixedTimestep(1.0 / STEP_RATE, TIME_SCALE)
+    scheduler = MultiRateScheduler(1.0 / dt, {"sensor": SENSOR_RATE, "control": CONTROL_RATE})
+    sensor = PoseSensor(SENSOR_NOISE)
+    steer, rx, ry = 0.0, ref_xs[0], ref_ys[0]
+    s = s_cte = None   # spline 투영 warm start (제어용, 기록 CTE용)
+    prev = (model.x, model.y, model.yaw)
+    frame_time = 0.0
 
-trajectory = []
+    running = True
+    while running:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
 
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
+        # 지난 프레임 시간만큼 고정 간격 스텝 진행
+        for _ in range(stepper.advance(frame_time)):
+            prev = (model.x, model.y, model.yaw)
+            if scheduler.due("sensor"):
+                mx, my, myaw = sensor.measure(model.x, model.y, model.yaw)
 
-    # Stanley 제어
-    steer, rx, ry = stanley_control(model.x, model.y, model.yaw, model.v,
-                                    ref_xs, ref_ys, ref_yaws)
+            # Stanley 제어 (제어 주기 사이에는 마지막 조향각 유지)
+            if scheduler.due("control"):
+                if spline is not None:
+                    steer, rx, ry, s = stanley_control_spline(mx, my, myaw, model.v, spline, s)
+                else:
+                    steer, rx, ry = stanley_control(mx, my, myaw, model.v, ref_xs, ref_ys, ref_yaws, index)
+            profiler.mark("control")
 
-    # 차량 업데이트
-    model.update(steer)
-    trajectory.append((model.x, model.y))
+            # 차량 업데이트
+            model.update(steer)
+            scheduler.tick()
+            profiler.mark("update")
+            trail.add(world_to_screen(model.x, model.y))
+            if recorder:
+                if spline is not None:
+                    cte, s_cte = spline.cross_track_error((model.x, model.y), s_cte)
+                else:
+                    cte = index.cross_track_error((model.x, model.y))
+                recorder.append(model.x, model.y, model.yaw, steer, model.v, rx, ry, cte)
+            profiler.mark("trajectory")
 
-    screen.fill((255,255,255))
+        # 경로 (화면 좌표 변환은 view가 바뀔 때만)
+        background.draw(screen, view=(SCALE, CENTER))
+        profiler.mark("background")
 
-    # 경로
-    pts = [world_to_screen(ref_xs[i], ref_ys[i]) for i in range(len(ref_xs))]
-    pygame.draw.lines(screen, (0,0,0), False, pts, 2)
+        # 궤적
+        trail.draw(screen)
+        profiler.mark("trajectory")
+
+        # 차량 위치 (마지막 두 스텝 사이 보간)
+        x, y, yaw = interpolate_pose(prev, (model.x, model.y, model.yaw), stepper.alpha)
+        cx, cy = world_to_screen(x, y)
+        pygame.draw.circle(screen, (255,255,0), (cx,cy), 10)
+
+        # 조향 화살표
+        arrow_len = 40
+        hx = cx + int(arrow_len*math.cos(yaw+steer))
+        hy = cy - int(arrow_len*math.sin(yaw+steer))
+        pygame.draw.line(screen, (0,200,0), (cx,cy), (hx,hy), 3)
+        pygame.draw.circle(screen, (0,200,0), (hx,hy), 5)
+
+        # 참조점
+        rx_s, ry_s = world_to_screen(rx, ry)
+        pygame.draw.circle(screen, (0,255,255), (rx_s, ry_s), 5)
 
-    # 궤적
-    if len(trajectory) > 1:
-        traj_pts = [world_to_screen(px, py) for (px,py) in trajectory]
-        pygame.draw.lines(screen, (255,0,0), False, traj_pts, 2)
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
 
-    # 차량 위치
-    cx, cy = world_to_screen(model.x, model.y)
-    pygame.draw.circle(screen, (255,255,0), (cx,cy), 10)
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
 
-    # 조향 화살표
-    arrow_len = 40
-    hx = cx + int(arrow_len*math.cos(model.yaw+steer))
-    hy = cy - int(arrow_len*math.sin(model.yaw+steer))
-    pygame.draw.line(screen, (0,200,0), (cx,cy), (hx,hy), 3)
-    pygame.draw.circle(screen, (0,200,0), (hx,hy), 5)
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+    if CONTROL_RATE or SENSOR_RATE:
+        scheduler.report()
 
-    # 참조점
-    rx_s, ry_s = world_to_screen(rx, ry)
-    pygame.draw.circle(screen, (0,255,255), (rx_s, ry_s), 5)
+if __name__ == "__main__":
+    # 경로 생성
+    ref_xs, ref_ys, ref_yaws = make_ref(road=ROAD, n=spline_points(ROAD) if REFERENCE == "spline" else 500)
 
-    pygame.display.flip()
-    clock.tick(60)
+    # 차량 초기화
+    model = VehicleModel(x=10.0, y=15.0, yaw=0, v=5.0) # 시나리오 1
+    #model = VehicleModel(x=0.0, y=0.0, yaw=270,v=5.0) # 시나리오 2
 
-pygame.quit()
+    if HEADLESS:
+        result = simulate(model, ref_xs, ref_ys, ref_yaws)
+        print("steps:", len(result["trajectory"]), "final pos:", result["trajectory"][-1])
+    else:
+        run_window(model, ref_xs, ref_ys, ref_yaws)
@@ -1,7 +1,16 @@
-import pygame
 import numpy as np
 import math
-import random
+from mobile_robot import FrameProfiler, PathTracker, as_path
+from mobile_robot import controllers
+from mobile_robot.kinematics import bicycle_step
+from mobile_robot.loop import FixedTimestep, MultiRateScheduler, interpolate_pose
+from mobile_robot.sensor import PoseSensor
+from mobile_robot.render import ProfilerOverlay, StaticLayer, TrailLayer, draw_grid
+from mobile_robot.recorder import PURSUIT_FIELDS, TrajectoryRecorder
+from mobile_robot.pathgen import load_path
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
 
 #parameters
 WIDTH, HEIGHT = 1000, 700
@@ -10,100 +19,166 @@ SPEED = 10.0
 WHEELBASE = 20
 LOOKAHEAD = 25.0
 dt = 0.05
+FPS = 60          # 렌더링 FPS
+STEP_RATE = 60    # 초당 시뮬레이션 스텝 수 (60: 기존처럼 화면 60 FPS 기준 속도, 1/dt: dt 기준 실시간)
+TIME_SCALE = 1.0  # 시뮬레이션 배속
+CONTROL_RATE = None        # 제어기 실행 rate [Hz, dt 기준 시간] (None: 매 스텝 = 1/dt), 사이에는 마지막 조향각 유지
+SENSOR_RATE = None         # pose 측정 rate [Hz] (None: 매 스텝)
+SENSOR_NOISE = (0.0, 0.0)  # 측정 노이즈 표준편차 (위치 [px], yaw [rad])
+HEADLESS = False  # True: 창/그리기/clock 없이 최대 속도로 시뮬레이션
+STEPS = 2000      # headless 모드 스텝 수
+PROFILE = False                       # True: 프레임 단계별 시간 측정
+PROFILE_OVERLAY = True                # 측정 중 화면에 p50/p95 표시
+PROFILE_DUMP = "frame_profile.json"   # 종료 시 histogram 저장 (.json/.csv, None: 저장 안 함)
+SEED = 0          # zigzag 경로 seed
+RECORD = None   # 스텝별 상태를 기록할 파일 (예: "run.rec", None: 기록 안 함)
 
 # vector_pursuit
-def vector_pursuit(robot_pos, robot_yaw, path, lookahead):
-    # 최근접 점 찾기
-    dists = [np.linalg.norm(np.array(robot_pos)-np.array(p)) for p in path]
-    nearest_index = np.argmin(dists)
-
-    # Lookahead Point 선택
-    target = path[-1]
-    for i in range(nearest_index, len(path)):
-        if np.linalg.norm(np.array(robot_pos)-np.array(path[i])) > lookahead:
-            target = path[i]
-            break
-
-    # 로봇 방향 벡터
-    heading_vec = np.array([math.cos(robot_yaw), math.sin(robot_yaw)])
-    # 목표점 벡터
-    target_vec = np.array([target[0]-robot_pos[0], target[1]-robot_pos[1]])
-
-    # 벡터 사이 각도
-    angle = math.atan2(np.cross(heading_vec, target_vec),
-                       np.dot(heading_vec, target_vec))
-
-    # Vector Pursuit 조향각
-    delta = math.atan2(2*WHEELBASE*math.sin(angle)/lookahead, 1)
-    return delta, target
+def vector_pursuit(robot_pos, robot_yaw, path, lookahead, tracker=None):
+    return controllers.vector_pursuit(robot_pos, robot_yaw, path, lookahead, WHEELBASE, tracker)
+
+# 로봇 업데이트
+def update_robot(x, y, yaw, delta, speed=SPEED):
+    return bicycle_step(x, y, yaw, delta, speed, WHEELBASE, dt)
+
+# headless 시뮬레이션: 궤적과 제어 출력을 배열로 반환
+# control_rate/sensor_rate [Hz]는 plant rate 1/dt 기준 (None: 매 스텝)
+def simulate(path, steps=STEPS, robot_pos=(150.0, 150.0), robot_yaw=0.0, lookahead=LOOKAHEAD,
+             control_rate=CONTROL_RATE, sensor_rate=SENSOR_RATE, sensor_noise=SENSOR_NOISE, seed=0):
+    x, y = float(robot_pos[0]), float(robot_pos[1])
+    yaw = float(robot_yaw)
+    path = as_path(path)
+    tracker = PathTracker(path)
+    scheduler = MultiRateScheduler(1.0 / dt, {"sensor": sensor_rate, "control": control_rate})
+    sensor = PoseSensor(sensor_noise, seed)
+    trajectory = np.empty((steps, 2))
+    yaws = np.empty(steps)
+    deltas = np.empty(steps)
+    targets = np.empty((steps, 2))
+    for n in range(steps):
+        if scheduler.due("sensor"):
+            mx, my, myaw = sensor.measure(x, y, yaw)
+        if scheduler.due("control"):
+            delta, target = vector_pursuit((mx, my), myaw, path, lookahead, tracker)
+        x, y, yaw = update_robot(x, y, yaw, delta)
+        scheduler.tick()
+        trajectory[n] = x, y
+        yaws[n] = yaw
+        deltas[n] = delta
+        targets[n] = target
+    return {"trajectory": trajectory, "yaw": yaws, "delta": deltas, "target": targets}
 
 # 경로 생성
-def generate_zigzag():
-    path = []
-    x, y = 100, 350
-    while x < 900:
-        x += 20
-        y += random.randint(-50, 50)
-        y = max(100, min(600, y))
-        path.append((x, y))
-    return path
-
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
-
-path = generate_zigzag()
-
-robot_pos = [150, 150]
-robot_yaw = 0.0
-trajectory = []
-
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    delta, target = vector_pursuit(robot_pos, robot_yaw, path, LOOKAHEAD)
-
-    # 로봇 업데이트
-    robot_yaw += (SPEED/WHEELBASE)*math.tan(delta)*dt
-    robot_pos[0] += SPEED*math.cos(robot_yaw)*dt
-    robot_pos[1] += SPEED*math.sin(robot_yaw)*dt
-    trajectory.append((robot_pos[0], robot_pos[1]))
-
-    # 화면 그리기
-    screen.fill((255,255,255))
+def generate_zigzag(seed=SEED):
+    return load_path("zigzag", seed=seed, step=20)
 
+# 정적 배경: 격자와 경로 (StaticLayer로 한 번만 그림)
+def draw_background(surf, path):
     # 그리드
-    grid_size = 50
-    for x in range(0, WIDTH, grid_size):
-        pygame.draw.line(screen, (200,200,200), (x,0), (x,HEIGHT), 1)
-    for y in range(0, HEIGHT, grid_size):
-        pygame.draw.line(screen, (200,200,200), (0,y), (WIDTH,y), 1)
+    draw_grid(surf, (200,200,200))
 
     # 경로
-    pygame.draw.lines(screen, (0,0,0), False, path, 3)
-
-    # 궤적
-    if len(trajectory) > 1:
-        pygame.draw.lines(screen, (255,0,0), False, trajectory, 2)
-
-    # 로봇
-    cx, cy = int(robot_pos[0]), int(robot_pos[1])
-    pygame.draw.circle(screen, (255,255,0), (cx,cy), ROBOT_SIZE)
-
-    # 조향 화살표
-    arrow_len = 40
-    hx = cx + int(arrow_len*math.cos(robot_yaw+delta))
-    hy = cy + int(arrow_len*math.sin(robot_yaw+delta))
-    pygame.draw.line(screen, (0,200,0), (cx,cy), (hx,hy), 3)
-    pygame.draw.circle(screen, (0,200,0), (hx,hy), 5)
-
-    # 목표점
-    pygame.draw.circle(screen, (0,255,255), (int(target[0]), int(target[1])), 5)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
+    pygame.draw.lines(surf, (0,0,0), False, path.points, 3)
+
+def run_window(path):
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+
+    robot_pos = [150, 150]
+    robot_yaw = 0.0
+    trail = TrailLayer((WIDTH, HEIGHT), (255,0,0), 2)
+    path = as_path(path)
+    tracker = PathTracker(path)
+    cte_tracker = PathTracker(path)   # 기록용 cross-track error (제어기 tracker 상태와 분리)
+    background = StaticLayer((WIDTH, HEIGHT), lambda surf: draw_background(surf, path))
+    profiler = FrameProfiler(enabled=PROFILE)
+    overlay = ProfilerOverlay(profiler) if PROFILE_OVERLAY else None
+    recorder = TrajectoryRecorder(RECORD, PURSUIT_FIELDS, static={"path": path.points},
+                                  meta={"script": "vector_pursuit", "size": [WIDTH, HEIGHT], "robot_size": ROBOT_SIZE,
+                                        "lookahead": LOOKAHEAD, "dt": dt,
+                                        "step_time": 1.0 / STEP_RATE}) if RECORD else None
+
+    stepper = FixedTimestep(1.0 / STEP_RATE, TIME_SCALE)
+    scheduler = MultiRateScheduler(1.0 / dt, {"sensor": SENSOR_RATE, "control": CONTROL_RATE})
+    sensor = PoseSensor(SENSOR_NOISE)
+    delta, target = 0.0, path[0]
+    prev = (robot_pos[0], robot_pos[1], robot_yaw)
+    frame_time = 0.0
+
+    running = True
+    while running:
+        profiler.start_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        profiler.mark("events")
+
+        # 고정 간격 스텝 (렌더링이 느려도 시뮬레이션 결과는 같음)
+        for _ in range(stepper.advance(frame_time)):
+            prev = (robot_pos[0], robot_pos[1], robot_yaw)
+            # 센서/제어기는 각자의 rate로 (zero-order hold)
+            if scheduler.due("sensor"):
+                mx, my, myaw = sensor.measure(robot_pos[0], robot_pos[1], robot_yaw)
+            if scheduler.due("control"):
+                delta, target = vector_pursuit((mx, my), myaw, path, LOOKAHEAD, tracker)
+            profiler.mark("control")
+
+            # 로봇 업데이트
+            robot_pos[0], robot_pos[1], robot_yaw = update_robot(robot_pos[0], robot_pos[1], robot_yaw, delta)
+            scheduler.tick()
+            profiler.mark("update")
+            trail.add((robot_pos[0], robot_pos[1]))
+            if recorder:
+                recorder.append(robot_pos[0], robot_pos[1], robot_yaw, delta, SPEED, target[0], target[1],
+                                cte_tracker.cross_track_error(robot_pos))
+            profiler.mark("trajectory")
+
+        # 화면 그리기
+        background.draw(screen)
+        profiler.mark("background")
+
+        # 궤적
+        trail.draw(screen)
+        profiler.mark("trajectory")
+
+        # 로봇 (마지막 두 스텝 사이 보간)
+        x, y, yaw = interpolate_pose(prev, (robot_pos[0], robot_pos[1], robot_yaw), stepper.alpha)
+        cx, cy = int(x), int(y)
+        pygame.draw.circle(screen, (255,255,0), (cx,cy), ROBOT_SIZE)
+
+        # 조향 화살표
+        arrow_len = 40
+        hx = cx + int(arrow_len*math.cos(yaw+delta))
+        hy = cy + int(arrow_len*math.sin(yaw+delta))
+        pygame.draw.line(screen, (0,200,0), (cx,cy), (hx,hy), 3)
+        pygame.draw.circle(screen, (0,200,0), (hx,hy), 5)
+
+        # 목표점
+        pygame.draw.circle(screen, (0,255,255), (int(target[0]), int(target[1])), 5)
+
+        if overlay:
+            overlay.draw(screen)
+        profiler.mark("overlay")
+
+        pygame.display.flip()
+        profiler.mark("flip")
+        frame_time = clock.tick(FPS) / 1000.0
+        profiler.mark("wait")
+        profiler.end_frame()
+
+    pygame.quit()
+    if recorder:
+        recorder.close()
+    profiler.report(PROFILE_DUMP)
+    if CONTROL_RATE or SENSOR_RATE:
+        scheduler.report()
+
+if __name__ == "__main__":
+    path = generate_zigzag()
+
+    if HEADLESS:
+        result = simulate(path)
+        print("steps:", len(result["trajectory"]), "final pos:", result["trajectory"][-1])
+    else:
+        run_window(path)
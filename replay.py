@@ -0,0 +1,264 @@
+import os
+import sys
+import math
+import importlib
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import numpy as np
+from mobile_robot import as_path, load_recording
+from mobile_robot.render import StaticLayer, TrailLayer
+from mobile_robot.lazy import lazy_import
+
+pygame = lazy_import("pygame")
+
+# parameters
+RECORDING = "run.rec"   # 각 스크립트에서 RECORD로 저장한 파일 (명령행 인자로도 지정 가능)
+RATE = 1.0              # 재생 배속 (위/아래 방향키로 2배씩, 음수면 역재생)
+FPS = 60
+SEEK_STEP = 5.0         # 좌/우 방향키 이동 시간 [s] (shift: 10배)
+STEP_TIME = 1 / 60      # meta에 step_time이 없는 이전 기록의 스텝 간격 (당시 경로 추종 스크립트는 60 스텝/초)
+TRAIL_POINTS = 5000     # seek 후 궤적을 다시 그릴 때 사용할 최대 점 개수
+HEADLESS = False        # True: 창 없이 기록 요약만 출력
+
+# 기록의 meta["script"] -> 원래 스크립트 모듈
+SCRIPTS = {
+    "pure_pursuit": "pygame_pure_pursuit",
+    "vector_pursuit": "pygame_vector_pursuit",
+    "pure_pursuit_revisited": "pygame_pure_pursuit_revisited",
+    "regulated_pure_pursuit": "pygame_regulated_pure_pursuit",
+    "stanley": "pygame_stanley",
+    "differential_drive": "pygame_differential_drive",
+    "swerve": "pygame_Swerve",
+    "mecanum_omni": "pygame_MecanumNOmni",
+}
+
+# 스크립트별 화면 구성
+#   size, fill, background(surf), trail_color, step_time,
+#   to_screen(xs, ys) -> (k,2) 화면 좌표,  draw(screen, row) -> 로봇 (원래 스크립트와 같은 그림)
+def _pursuit_view(rec, mod):
+    path = as_path(np.asarray(rec.static["path"]))
+    robot_size = rec.meta["robot_size"]
+    script = rec.meta["script"]
+    color = (255, 200, 0) if script == "regulated_pure_pursuit" else (255, 255, 0)
+
+    def draw(screen, row):
+        cx, cy = int(row["x"]), int(row["y"])
+        if script == "vector_pursuit":
+            hx = cx + int(40 * math.cos(row["yaw"] + row["steer"]))
+            hy = cy + int(40 * math.sin(row["yaw"] + row["steer"]))
+            pygame.draw.circle(screen, color, (cx, cy), robot_size)
+            pygame.draw.line(screen, (0, 200, 0), (cx, cy), (hx, hy), 3)
+            pygame.draw.circle(screen, (0, 200, 0), (hx, hy), 5)
+            pygame.draw.circle(screen, (0, 255, 255), (int(row["target_x"]), int(row["target_y"])), 5)
+        else:
+            pygame.draw.circle(screen, (0, 255, 255), (int(row["target_x"]), int(row["target_y"])), 5)
+            pygame.draw.circle(screen, color, (cx, cy), robot_size)
+
+    return {
+        "size": tuple(rec.meta["size"]),
+        "fill": (255, 255, 255),
+        "background": lambda surf: mod.draw_background(surf, path),
+        "trail_color": (255, 0, 0),
+        "step_time": rec.meta.get("step_time", STEP_TIME),
+        "to_screen": lambda xs, ys: np.column_stack((xs, ys)).astype(int),
+        "draw": draw,
+    }
+
+def _stanley_view(rec, mod):
+    path = np.asarray(rec.static["path"])
+
+    def draw(screen, row):
+        cx, cy = mod.world_to_screen(row["x"], row["y"])
+        pygame.draw.circle(screen, (255, 255, 0), (cx, cy), 10)
+        hx = cx + int(40 * math.cos(row["yaw"] + row["steer"]))
+        hy = cy - int(40 * math.sin(row["yaw"] + row["steer"]))
+        pygame.draw.line(screen, (0, 200, 0), (cx, cy), (hx, hy), 3)
+        pygame.draw.circle(screen, (0, 200, 0), (hx, hy), 5)
+        pygame.draw.circle(screen, (0, 255, 255), mod.world_to_screen(row["target_x"], row["target_y"]), 5)
+
+    return {
+        "size": tuple(rec.meta["size"]),
+        "fill": (255, 255, 255),
+        "background": lambda surf: mod.draw_background(surf, path[:, 0], path[:, 1]),
+        "trail_color": (255, 0, 0),
+        "step_time": rec.meta.get("step_time", STEP_TIME),
+        "to_screen": lambda xs, ys: np.column_stack((mod.CENTER[0] + (xs * mod.SCALE).astype(int),
+                                                     mod.CENTER[1] - (ys * mod.SCALE).astype(int))),
+        "draw": draw,
+    }
+
+def _differential_drive_view(rec, mod):
+    return {
+        "size": tuple(rec.meta["size"]),
+        "fill": (25, 25, 30),
+        "background": lambda surf: None,
+        "trail_color": (70, 150, 255),
+        "step_time": rec.meta["dt"],
+        "to_screen": lambda xs, ys: np.column_stack((mod.WIDTH // 2 + (xs * mod.scale).astype(int),
+                                                     mod.HEIGHT // 2 - (ys * mod.scale).astype(int))),
+        "draw": lambda screen, row: mod.draw_robot(screen, row["x"], row["y"], row["theta"]),
+    }
+
+def _swerve_view(rec, mod):
+    return {
+        "size": tuple(rec.meta["size"]),
+        "fill": (25, 25, 25),
+        "background": lambda surf: None,
+        "trail_color": (90, 90, 90),
+        "step_time": None,
+        "to_screen": lambda xs, ys: np.column_stack((xs, ys)).astype(int),
+        "draw": lambda screen, row: mod.draw_robot(screen, row["x"], row["y"], row["theta"],
+                                                   np.column_stack((row["wheel_angle"], row["wheel_speed"]))),
+    }
+
+def _mecanum_omni_view(rec, mod):
+    draw_fn = mod.draw_mecanum if rec.meta["mode"] == "mecanum" else mod.draw_omni3
+    return {
+        "size": tuple(rec.meta["size"]),
+        "fill": (25, 25, 25),
+        "background": lambda surf: None,
+        "trail_color": (90, 90, 90),
+        "step_time": None,
+        "to_screen": lambda xs, ys: np.column_stack((xs, ys)).astype(int),
+        "draw": lambda screen, row: draw_fn(screen, row["x"], row["y"], row["theta"], row["wheels"]),
+    }
+
+VIEWS = {
+    "pure_pursuit": _pursuit_view,
+    "vector_pursuit": _pursuit_view,
+    "pure_pursuit_revisited": _pursuit_view,
+    "regulated_pure_pursuit": _pursuit_view,
+    "stanley": _stanley_view,
+    "differential_drive": _differential_drive_view,
+    "swerve": _swerve_view,
+    "mecanum_omni": _mecanum_omni_view,
+}
+
+def make_view(rec):
+    script = rec.meta["script"]
+    return VIEWS[script](rec, importlib.import_module(SCRIPTS[script]))
+
+# 각 스텝의 재생 시각 [s] (0부터 시작): 기록된 dt가 있으면 누적, 없으면 고정 간격
+def step_times(rec, step_time):
+    if "dt" in rec.fields:
+        dt = np.asarray(rec["dt"], dtype=float)
+        return np.cumsum(dt) - dt[0]
+    return np.arange(len(rec)) * step_time
+
+# 재생 시각 t에 해당하는 스텝 인덱스
+def seek(times, t):
+    return min(max(int(np.searchsorted(times, t, side="right")) - 1, 0), len(times) - 1)
+
+# 창 없이 기록 요약 (memmap 필드를 그대로 사용해서 복사 없이 계산)
+def summarize(rec):
+    print(f"{rec.meta['script']}: {len(rec)} steps, fields {', '.join(rec.fields)}")
+    for name in rec.fields:
+        values = rec[name]
+        if values.ndim == 1:
+            print(f"  {name:<10} mean {values.mean():12.4f}  min {values.min():12.4f}  max {values.max():12.4f}")
+    if "cte" in rec.fields:
+        print(f"  rms cte {math.sqrt(float(np.mean(np.square(rec['cte'])))):.4f}")
+
+def draw_timeline(screen, font, bar, t, duration, rate, index, count, paused):
+    pygame.draw.rect(screen, (120, 120, 120), bar)
+    filled = bar.copy()
+    filled.width = int(bar.width * (t / duration if duration > 0 else 1.0))
+    pygame.draw.rect(screen, (255, 140, 0), filled)
+    text = f"{t:8.2f} / {duration:.2f} s   x{rate:g}   step {index + 1}/{count}" + ("   [paused]" if paused else "")
+    label = font.render(text, True, (255, 140, 0))
+    screen.blit(label, (bar.x, bar.y - label.get_height() - 2))
+
+def run_window(rec, rate=RATE):
+    if len(rec) == 0:
+        print("empty recording")
+        return
+    view = make_view(rec)
+    size = view["size"]
+    xs, ys = rec["x"], rec["y"]
+    times = step_times(rec, view["step_time"])
+    duration = float(times[-1])
+
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(f"Replay: {rec.meta['script']} ({rec.filename})")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("monospace", 14)
+    background = StaticLayer(size, view["background"], view["fill"])
+    trail = TrailLayer(size, view["trail_color"], 2)
+    bar = pygame.Rect(10, size[1] - 18, size[0] - 20, 8)
+
+    t = 0.0
+    drawn = -1   # 궤적 레이어에 그려진 마지막 스텝
+    paused = False
+    scrubbing = False
+
+    running = True
+    while running:
+        frame_dt = clock.tick(FPS) / 1000.0
+        index = seek(times, t)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                step = SEEK_STEP * (10 if event.mod & pygame.KMOD_SHIFT else 1)
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    t += step
+                elif event.key == pygame.K_LEFT:
+                    t -= step
+                elif event.key == pygame.K_UP:
+                    rate *= 2
+                elif event.key == pygame.K_DOWN:
+                    rate /= 2
+                elif event.key == pygame.K_r:
+                    rate = -rate
+                elif event.key == pygame.K_HOME:
+                    t = 0.0
+                elif event.key == pygame.K_END:
+                    t = duration
+                # 한 스텝씩 (일시정지 상태에서)
+                elif event.key == pygame.K_PERIOD:
+                    paused = True
+                    t = float(times[min(index + 1, len(times) - 1)])
+                elif event.key == pygame.K_COMMA:
+                    paused = True
+                    t = float(times[max(index - 1, 0)])
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                scrubbing = bar.inflate(0, 16).collidepoint(event.pos)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                scrubbing = False
+
+        # 타임라인 드래그: 마우스 위치로 바로 이동
+        if scrubbing:
+            frac = (pygame.mouse.get_pos()[0] - bar.x) / bar.width
+            t = duration * min(max(frac, 0.0), 1.0)
+        elif not paused:
+            t += frame_dt * rate
+        t = min(max(t, 0.0), duration)
+        index = seek(times, t)
+
+        # 앞으로 조금 진행했으면 새 구간만 이어 그리고, 뒤로 가거나 크게 건너뛰면 간격을 두고 다시 그림
+        if drawn < index <= drawn + TRAIL_POINTS:
+            trail.extend(view["to_screen"](xs[drawn + 1:index + 1], ys[drawn + 1:index + 1]))
+        elif index != drawn:
+            stride = index // TRAIL_POINTS + 1
+            points = view["to_screen"](xs[:index + 1:stride], ys[:index + 1:stride])
+            trail.reset(points)
+            trail.extend(view["to_screen"](xs[index:index + 1], ys[index:index + 1]))
+        drawn = index
+
+        background.draw(screen)
+        trail.draw(screen)
+        view["draw"](screen, rec.data[index])
+        draw_timeline(screen, font, bar, t, duration, rate, index, len(times), paused)
+        pygame.display.flip()
+
+    pygame.quit()
+
+if __name__ == "__main__":
+    rec = load_recording(sys.argv[1] if len(sys.argv) > 1 else RECORDING)
+    if HEADLESS:
+        summarize(rec)
+    else:
+        run_window(rec)
@@ -0,0 +1,58 @@
+import numpy as np
+
+from mobile_robot import Path, cross_track_error_batch
+from mobile_robot.geometry import project_points
+
+
+# 8자 경로 (가운데에서 교차하는 closed 경로)
+def _figure_eight(n=400, size=200.0):
+    t = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return Path(np.column_stack((size * np.sin(t), size * np.sin(t) * np.cos(t))), closed=True)
+
+
+# 경로 인덱스 idx (steps, N)에서 왼쪽으로 offset만큼 떨어진 위치
+def _offset_positions(path, idx, offset):
+    normal = np.stack((-np.sin(path.heading), np.cos(path.heading)), axis=1)
+    return path.points[idx] + offset[:, None] * normal[idx]
+
+
+def _batch_cte(path, positions, window, relocalize_dist):
+    cte = np.empty(positions.shape[:2])
+    nearest = None
+    for n in range(len(positions)):
+        cte[n], nearest = cross_track_error_batch(positions[n], path, nearest, window,
+                                                  relocalize_dist=relocalize_dist)
+    return cte
+
+
+# window보다 빨리 진행하는 로봇, 교차점에서 다른 lobe로 건너뛰는 로봇도 batch cte가 실제 경로까지 거리와 같아야 함
+def test_cross_track_error_batch_matches_projection_on_crossing_path():
+    path = _figure_eight()
+    m = len(path.points)
+    steps = 200
+    k = np.arange(steps)
+    # 시작점은 교차점 (인덱스 0, m/2)이 아닌 곳: 교차점에서 전역 검색하면 두 가지 중 어느 쪽이든 최근접
+    idx = np.column_stack((
+        10 + 2 * k,                                   # window 안에서 진행 (교차점을 여러 번 지남)
+        10 + 90 * k,                                  # 스텝마다 window (32)보다 많이 진행
+        np.where(k < 100, 10 + 3 * k, 10 + 3 * k + m // 2),   # 중간에 경로 반대편으로 이동
+    )) % m
+    positions = _offset_positions(path, idx, np.array([3.0, -3.0, 2.0]))
+
+    cte = _batch_cte(path, positions, window=32, relocalize_dist=10.0)
+    _, _, dist = project_points(positions.reshape(-1, 2), path)
+    dist = dist.reshape(cte.shape)
+    # 교차점 바로 옆에서는 다른 가지가 더 가까울 수 있음 (cte는 따라가는 가지 기준)
+    away = np.hypot(positions[..., 0], positions[..., 1]) > 5.0
+    np.testing.assert_allclose(np.abs(cte)[away], dist[away], atol=1e-6)
+    assert np.all(np.abs(cte) <= 3.0 + 1e-6)
+
+
+def test_cross_track_error_batch_open_path_stops_at_end():
+    t = np.linspace(0.0, 300.0, 151)
+    path = Path(np.column_stack((t, 20.0 * np.sin(t / 30.0))), closed=False)
+    idx = np.minimum(1 + np.arange(60)[:, None] * np.array([1, 11]), len(t) - 1)
+    positions = _offset_positions(path, idx, np.array([2.0, -2.0]))
+    cte = _batch_cte(path, positions, window=8, relocalize_dist=None)
+    _, _, dist = project_points(positions.reshape(-1, 2), path)
+    np.testing.assert_allclose(np.abs(cte), dist.reshape(cte.shape), atol=1e-6)